@@ -0,0 +1,225 @@
+"""
+Compare event throughput and ack latency with PERFORMANCE_PROFILE off and on.
+
+A mix of Socket Mode events (channel messages, shared files, and files shared
+in an auto-scan channel) is dispatched through the app's real Bolt handlers,
+with Slack and Reality Defender stubbed out. Each profile runs in its own
+process, since the event loop can only be chosen at startup.
+
+    uv run --extra fast python benchmarks/bench_profile.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from slack_bolt.app.async_app import AsyncApp
+from slack_bolt.authorization import AuthorizeResult
+from slack_bolt.request.async_request import AsyncBoltRequest
+
+from reality_defender_slack_app.app import App
+from reality_defender_slack_app.config import Config
+from reality_defender_slack_app.performance import apply_profile, loop_factory
+
+CHANNEL = "C0AUTOSCAN"
+
+
+def _file(index: int) -> dict[str, Any]:
+    return {
+        "id": f"F{index:08d}",
+        "name": f"photo-{index}.png",
+        "title": f"photo-{index}.png",
+        "mimetype": "image/png",
+        "filetype": "png",
+        "size": 204800,
+        "url_private": f"https://files.slack.com/files-pri/T1-F{index}/photo.png",
+        "url_private_download": f"https://files.slack.com/files-pri/T1-F{index}/download/photo.png",
+        "thumb_360": f"https://files.slack.com/files-tmb/T1-F{index}/photo_360.png",
+        "permalink": f"https://example.slack.com/files/U1/F{index}/photo.png",
+        "is_external": False,
+        "is_public": True,
+        "user": "U0000001",
+    }
+
+
+def _envelope(index: int) -> dict[str, Any]:
+    kind = index % 10
+    if kind < 5:
+        event: dict[str, Any] = {
+            "type": "message",
+            "channel": "C0GENERAL",
+            "user": "U0000001",
+            "text": "Has anyone looked at the quarterly numbers yet? " * 3,
+            "ts": f"1700000000.{index:06d}",
+            "team": "T0000001",
+            "blocks": [{"type": "rich_text", "block_id": "b", "elements": []}],
+        }
+    elif kind < 8:
+        event = {
+            "type": "file_shared",
+            "channel_id": "C0GENERAL",
+            "file_id": f"F{index:08d}",
+            "user_id": "U0000001",
+            "file": {"id": f"F{index:08d}"},
+            "event_ts": f"1700000000.{index:06d}",
+        }
+    else:
+        event = {
+            "type": "message",
+            "subtype": "file_share",
+            "channel": CHANNEL,
+            "user": "U0000001",
+            "text": "",
+            "ts": f"1700000000.{index:06d}",
+            "team": "T0000001",
+            "files": [_file(index), _file(index + 1)],
+        }
+    return {
+        "token": "verification",
+        "team_id": "T0000001",
+        "api_app_id": "A0000001",
+        "event": event,
+        "type": "event_callback",
+        "event_id": f"Ev{index:08d}",
+        "event_time": 1700000000,
+        "authorizations": [{"team_id": "T0000001", "user_id": "U0BOT", "is_bot": True}],
+    }
+
+
+async def _authorize(**_kwargs: Any) -> AuthorizeResult:
+    return AuthorizeResult(
+        enterprise_id=None,
+        team_id="T0000001",
+        bot_user_id="U0BOT",
+        bot_token="xoxb-bench",
+    )
+
+
+def _bolt_app(**kwargs: Any) -> AsyncApp:
+    return AsyncApp(
+        name=kwargs["name"],
+        logger=kwargs["logger"],
+        authorize=_authorize,
+        request_verification_enabled=False,
+    )
+
+
+async def _run(events: int, concurrency: int) -> dict[str, float]:
+    config = Config.model_validate(
+        {
+            "SLACK_BOT_TOKEN": "xoxb-bench",
+            "SLACK_APP_TOKEN": "xapp-bench",
+            "RD_API_KEYS": "bench-key",
+            "AUTO_SCAN_CHANNELS": CHANNEL,
+            "AUTO_SCAN_QUEUE_SIZE": 1000000,
+            "STATE_DIR": os.devnull + ".state",
+        }
+    )
+    with (
+        patch("reality_defender_slack_app.app.AsyncApp", _bolt_app),
+        patch("reality_defender_slack_app.app.AsyncSocketModeHandler", MagicMock()),
+    ):
+        app = App("xoxb-bench", "xapp-bench", config=config)
+    app.workspaces.default_client = AsyncMock()
+
+    envelopes = [_envelope(index) for index in range(events)]
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def dispatch(body: dict[str, Any]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await app.app.async_dispatch(
+                AsyncBoltRequest(body=body, mode="socket_mode")
+            )
+            latencies.append(time.perf_counter() - start)
+            assert response.status == 200, response.body
+
+    start = time.perf_counter()
+    await asyncio.gather(*(dispatch(body) for body in envelopes))
+    # Listeners run after the ack, wait for them too.
+    current = asyncio.current_task()
+    while pending := [task for task in asyncio.all_tasks() if task is not current]:
+        await asyncio.gather(*pending, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "events_per_second": events / elapsed,
+        "ack_p50_ms": statistics.median(latencies) * 1000,
+        "ack_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "auto_scan_queued": app.auto_scan_queue.qsize(),
+    }
+
+
+def _child(args: argparse.Namespace) -> None:
+    handler = logging.FileHandler(os.devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logging.basicConfig(level=args.log_level, handlers=[handler])
+    apply_profile(args.profile)
+    with asyncio.Runner(loop_factory=loop_factory(args.profile)) as runner:
+        # Warm up imports and code paths before measuring.
+        runner.run(_run(500, args.concurrency))
+        results = [
+            runner.run(_run(args.events, args.concurrency)) for _ in range(args.repeat)
+        ]
+    best = max(results, key=lambda result: result["events_per_second"])
+    print(json.dumps(best))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profile", choices=["standard", "fast"])
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    if args.profile:
+        _child(args)
+        return
+
+    print(
+        f"{'profile':<10}{'log level':<11}{'events/s':>10}{'ack p50 ms':>12}{'ack p99 ms':>12}"
+    )
+    for log_level in ("INFO", "DEBUG"):
+        for profile in ("standard", "fast"):
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--profile",
+                    profile,
+                    "--log-level",
+                    log_level,
+                    "--events",
+                    str(args.events),
+                    "--concurrency",
+                    str(args.concurrency),
+                    "--repeat",
+                    str(args.repeat),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{profile:<10}{log_level:<11}{result['events_per_second']:>10.0f}"
+                f"{result['ack_p50_ms']:>12.2f}{result['ack_p99_ms']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
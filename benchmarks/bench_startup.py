@@ -0,0 +1,119 @@
+"""
+Measure how long a fresh process takes to acknowledge its first Slack event.
+
+Each run starts a new interpreter, which imports the app, loads its
+configuration, builds it and dispatches a Socket Mode event through the real
+Bolt listeners, with Slack stubbed out. The time to the first ack is counted
+from when the process was started. With `--warm-up`, the app's warm-up is
+run too, against the real Slack and Reality Defender hosts.
+
+    uv run python benchmarks/bench_startup.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+PHASES = ("import", "config", "app", "warm_up", "first_ack")
+
+
+def _child(warm: bool) -> None:
+    timings: dict[str, float] = {}
+
+    start = time.perf_counter()
+    from reality_defender_slack_app.app import App
+    from reality_defender_slack_app.config import load_config
+
+    timings["import"] = time.perf_counter() - start
+
+    # Only needed to stub out Slack, outside the measured phases.
+    from bench_profile import _bolt_app, _envelope
+    from slack_bolt.request.async_request import AsyncBoltRequest
+
+    async def run() -> None:
+        start = time.perf_counter()
+        config = load_config(
+            {
+                "SLACK_BOT_TOKEN": "xoxb-bench",
+                "SLACK_APP_TOKEN": "xapp-bench",
+                "RD_API_KEYS": "bench-key",
+                "MEDIA_WORKER_MODE": "thread",
+            }
+        )
+        timings["config"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with (
+            patch("reality_defender_slack_app.app.AsyncApp", _bolt_app),
+            patch("reality_defender_slack_app.app.AsyncSocketModeHandler", MagicMock()),
+        ):
+            app = App("xoxb-bench", "xapp-bench", config=config)
+        timings["app"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if warm:
+            await app.warm_up()
+        timings["warm_up"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await app.app.async_dispatch(
+            AsyncBoltRequest(body=_envelope(0), mode="socket_mode")
+        )
+        assert response.status == 200, response.body
+        timings["first_ack"] = time.perf_counter() - start
+        # The ack is what matters, the rest of the listener is not measured.
+        print(json.dumps(timings), flush=True)
+
+        if warm and app.app.client.session:
+            await app.app.client.session.close()
+            for key in app.key_pool.keys if app.key_pool else []:
+                await key.client.client.close()
+
+    asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--warm-up", action="store_true", help="connect to Slack and Reality Defender"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.warm_up)
+        return
+
+    command = [sys.executable, __file__, "--child"]
+    if args.warm_up:
+        command.append("--warm-up")
+
+    results: dict[str, list[float]] = {phase: [] for phase in PHASES}
+    results["total"] = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        with subprocess.Popen(command, stdout=subprocess.PIPE, text=True) as child:
+            assert child.stdout
+            line = child.stdout.readline()
+            results["total"].append(time.perf_counter() - start)
+        for phase, elapsed in json.loads(line).items():
+            results[phase].append(elapsed)
+
+    print(f"{'phase':<12}{'median ms':>10}{'max ms':>10}")
+    for phase, timings in results.items():
+        print(
+            f"{phase:<12}{statistics.median(timings) * 1000:>10.1f}"
+            f"{max(timings) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
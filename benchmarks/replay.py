@@ -0,0 +1,308 @@
+"""
+Replay traffic captured with CAPTURE_FILE against the app, with Slack and
+Reality Defender faked locally.
+
+Requests go through the app's real Bolt listeners, at the pace they were
+captured, at a multiple of it, or all at once. Slack's Web API, response
+URLs and file downloads are answered by a local server, and analyses by a
+fake Reality Defender client that takes `--analysis-seconds` to reach a
+verdict.
+
+    uv run python benchmarks/replay.py capture.jsonl            # original pace
+    uv run python benchmarks/replay.py capture.jsonl --speed 10 # 10 times faster
+    uv run python benchmarks/replay.py capture.jsonl --speed 0  # all at once
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+from aiohttp import web
+from realitydefender import RealityDefenderError
+from slack_bolt.app.async_app import AsyncApp
+from slack_bolt.authorization import AuthorizeResult
+from slack_bolt.request.async_request import AsyncBoltRequest
+from slack_sdk.web.async_client import AsyncWebClient
+
+from reality_defender_slack_app.app import App
+from reality_defender_slack_app.capture import read_capture, replay
+from reality_defender_slack_app.config import Config
+from reality_defender_slack_app.keypool import KeyPool
+
+VERDICTS = ("MANIPULATED", "AUTHENTIC", "AUTHENTIC", "UNKNOWN")
+
+
+class FakeSlack:
+    """Answers Slack's Web API, response URLs and file downloads."""
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.url = ""
+        self.web_app = web.Application()
+        self.web_app.router.add_post("/api/{method}", self.handle_api)
+        self.web_app.router.add_post("/hooks/{tail:.*}", self.handle_hook)
+        self.web_app.router.add_get("/files/{tail:.*}", self.handle_file)
+        self.web_app.router.add_route("*", "/upload", self.handle_hook)
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.web_app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = site._server.sockets[0].getsockname()[:2]  # type: ignore[union-attr]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle_api(self, request: web.Request) -> web.Response:
+        self.calls[request.match_info["method"]] += 1
+        return web.json_response(
+            {
+                "ok": True,
+                "ts": f"{time.time():.6f}",
+                "channel": {"id": "D0REPLAY"},
+                "messages": [],
+                "has_more": False,
+                "file": {},
+                "upload_url": f"{self.url}/upload",
+                "file_id": "F0REPLAY",
+            }
+        )
+
+    async def handle_hook(self, _request: web.Request) -> web.Response:
+        self.calls["response_url"] += 1
+        return web.Response(text="ok")
+
+    async def handle_file(self, request: web.Request) -> web.Response:
+        self.calls["download"] += 1
+        size = int(request.query.get("size", 1024))
+        return web.Response(body=b"\0" * size)
+
+    def rewrite(self, value: Any, size: int | None = None) -> Any:
+        """Point a payload's Slack URLs at this server."""
+        if isinstance(value, dict):
+            file_size = (
+                value.get("size") if isinstance(value.get("size"), int) else None
+            )
+            return {key: self.rewrite(item, file_size) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.rewrite(item) for item in value]
+        if isinstance(value, str):
+            if value.startswith("https://files.slack.com/"):
+                url = (
+                    f"{self.url}/files/{value.removeprefix('https://files.slack.com/')}"
+                )
+                return f"{url}?size={size}" if size is not None else url
+            if value.startswith("https://hooks.slack.com/"):
+                return (
+                    f"{self.url}/hooks/{value.removeprefix('https://hooks.slack.com/')}"
+                )
+        return value
+
+
+class FakeRealityDefender:
+    """
+    Takes uploads and reaches a verdict after `analysis_seconds`.
+
+    A `failure_rate` share of calls fail like a struggling server would,
+    always the same ones for the same sequence of calls.
+    """
+
+    def __init__(
+        self, upload_seconds: float, analysis_seconds: float, failure_rate: float = 0
+    ):
+        self.upload_seconds = upload_seconds
+        self.analysis_seconds = analysis_seconds
+        self.failure_rate = failure_rate
+        self.uploads = 0
+        self.polls = 0
+        self._ids = itertools.count(1)
+        self._random = random.Random(0)
+        # When each upload still waiting for its verdict was received.
+        self._analyzing: Dict[str, float] = {}
+        self.client = None
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RealityDefenderError("Injected failure", "server_error")
+
+    async def upload(self, file_path: str) -> Dict[str, str]:
+        await asyncio.sleep(self.upload_seconds)
+        self._maybe_fail()
+        request_id = f"replay-{next(self._ids)}"
+        self.uploads += 1
+        self._analyzing[request_id] = time.monotonic()
+        return {"request_id": request_id, "media_id": request_id}
+
+    async def get_result(self, request_id: str, **_kwargs: Any) -> Dict[str, Any]:
+        self.polls += 1
+        self._maybe_fail()
+        if time.monotonic() - self._analyzing[request_id] < self.analysis_seconds:
+            return {"status": "ANALYZING", "score": None}
+        del self._analyzing[request_id]
+        index = int(request_id.rsplit("-", 1)[1])
+        return {"status": VERDICTS[index % len(VERDICTS)], "score": 0.5}
+
+
+def build_app(slack: FakeSlack, rd: FakeRealityDefender, state_dir: str) -> App:
+    config = Config.model_validate(
+        {
+            "SLACK_APP_TOKEN": "xapp-replay",
+            "MEDIA_WORKER_MODE": "thread",
+            "POLL_INTERVAL_SECONDS": 0.5,
+            **os.environ,
+            # Never the real workspace, keys or capture.
+            "SLACK_BOT_TOKEN": "xoxb-replay",
+            "SLACK_INSTALLATION_DIR": "",
+            "RD_API_KEYS": "replay",
+            "CAPTURE_FILE": "",
+            "WARMUP_TIMEOUT": 0,
+            "STATE_DIR": state_dir,
+        }
+    )
+
+    async def authorize(**_kwargs: Any) -> AuthorizeResult:
+        return AuthorizeResult(
+            enterprise_id=None,
+            team_id="T0REPLAY",
+            bot_user_id="U0REPLAY",
+            bot_token="xoxb-replay",
+        )
+
+    def bolt_app(**kwargs: Any) -> AsyncApp:
+        return AsyncApp(
+            name=kwargs["name"],
+            logger=kwargs["logger"],
+            client=AsyncWebClient(base_url=f"{slack.url}/api/"),
+            authorize=authorize,
+            request_verification_enabled=False,
+        )
+
+    with (
+        patch("reality_defender_slack_app.app.AsyncApp", bolt_app),
+        patch("reality_defender_slack_app.app.AsyncSocketModeHandler", MagicMock()),
+    ):
+        app = App("xoxb-replay", "xapp-replay", config=config)
+    app.key_pool = KeyPool(["replay"], client_factory=lambda _key: rd)  # type: ignore[arg-type,return-value]
+    return app
+
+
+async def _run(args: argparse.Namespace) -> None:
+    slack = FakeSlack()
+    await slack.start()
+    rd = FakeRealityDefender(args.upload_seconds, args.analysis_seconds)
+    kinds: Counter[str] = Counter()
+    latencies: list[float] = []
+    # From the end of each upload to its notification.
+    waits: list[float] = []
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        app = build_app(slack, rd, state_dir)
+        notify = app._notify_analysis_complete
+        notified = 0
+
+        async def count_notified(result: Any, request_id: str) -> None:
+            nonlocal notified
+            request = app.active_requests.get(request_id)
+            if request and "submitted_at" in request:
+                waits.append(time.time() - request["submitted_at"])
+            try:
+                await notify(result, request_id)
+            finally:
+                notified += 1
+
+        app._notify_analysis_complete = count_notified  # type: ignore[method-assign]
+        background = [
+            asyncio.create_task(app.poll_results()),
+            asyncio.create_task(app.run_auto_scan()),
+        ]
+
+        async def dispatch(body: Dict[str, Any]) -> None:
+            start = time.perf_counter()
+            response = await app.app.async_dispatch(
+                AsyncBoltRequest(body=slack.rewrite(body), mode="socket_mode")
+            )
+            latencies.append(time.perf_counter() - start)
+            if response.status != 200:
+                print(f"Request answered {response.status}: {response.body}")
+
+        def captured() -> Any:
+            for request in read_capture(args.capture):
+                kinds[request["kind"]] += 1
+                yield request
+
+        start = time.perf_counter()
+        tasks = await replay(captured(), dispatch, speed=args.speed)
+        await asyncio.gather(*tasks)
+        replayed = time.perf_counter() - start
+
+        # Wait for the analyses the requests started to be notified.
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline and (
+            notified < rd.uploads
+            or app.upload_scheduler.running
+            or app.upload_scheduler.pending()
+        ):
+            await asyncio.sleep(0.1)
+        drained = time.perf_counter() - start
+
+        for task in background:
+            task.cancel()
+        app.history.close()
+    await slack.stop()
+
+    latencies.sort()
+    print(f"Replayed {len(latencies)} requests in {replayed:.2f}s: {dict(kinds)}")
+    if latencies:
+        print(
+            f"Ack latency: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, "
+            f"max {latencies[-1] * 1000:.2f} ms"
+        )
+    print(
+        f"Analyses: {rd.uploads} uploaded, {notified} notified, "
+        f"{rd.polls} result polls, done after {drained:.2f}s"
+    )
+    if waits:
+        waits.sort()
+        print(
+            f"Upload to notification: p50 {statistics.median(waits):.2f}s, "
+            f"p99 {waits[int(len(waits) * 0.99)]:.2f}s"
+        )
+    print(f"Slack calls: {dict(sorted(slack.calls.items()))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("capture", help="file written by CAPTURE_FILE")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="multiple of the captured pace, 0 for as fast as possible",
+    )
+    parser.add_argument("--upload-seconds", type=float, default=0.2)
+    parser.add_argument("--analysis-seconds", type=float, default=5.0)
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
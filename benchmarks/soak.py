@@ -0,0 +1,306 @@
+"""
+Soak the app for hours against local fakes of Slack and Reality Defender,
+and fail if it keeps growing.
+
+Synthetic shortcuts, commands and App Home openings from a rotating
+population of users are sent at `--rate` requests per second, or a capture
+written with CAPTURE_FILE is replayed in a loop. Every `--sample-interval`
+seconds the harness records traced memory, object, task, file descriptor
+and temporary file counts, and the sizes of the app's in-memory state.
+
+Once `--warmup` seconds have passed, the first and last thirds of the
+samples are compared. The run fails when memory or a count grew by more
+than its threshold, and the report names the allocation sites that grew
+the most.
+
+    uv run python benchmarks/soak.py --duration 14400            # four hours
+    uv run python benchmarks/soak.py --capture capture.jsonl --duration 3600
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import itertools
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from replay import FakeRealityDefender, FakeSlack, build_app
+from slack_bolt.request.async_request import AsyncBoltRequest
+
+from reality_defender_slack_app.app import App
+from reality_defender_slack_app.capture import CapturedRequest, read_capture
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# Allocations made by the harness and its fakes.
+_IGNORED = (
+    tracemalloc.Filter(False, str(Path(__file__).parent / "*")),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def synthetic(users: int, channels: int) -> Iterator[CapturedRequest]:
+    """
+    Endless traffic of the kinds captured, in the proportions of a busy
+    workspace: mostly shortcuts on one or two files, then status checks and
+    App Home openings.
+    """
+    for index in itertools.count():
+        user_id = f"U{index % users:06d}"
+        channel_id = f"C{index % channels:04d}"
+        if index % 4 == 1:
+            body: Dict[str, Any] = {
+                "command": "/analysis-status",
+                "text": "",
+                "user_id": user_id,
+                "channel_id": channel_id,
+                "team_id": "T0REPLAY",
+                "response_url": f"https://hooks.slack.com/commands/{index}",
+                "trigger_id": f"tr{index}",
+            }
+            kind = "command"
+        elif index % 4 == 3:
+            body = {
+                "team_id": "T0REPLAY",
+                "type": "event_callback",
+                "event": {"type": "app_home_opened", "user": user_id, "tab": "home"},
+                "event_id": f"Ev{index}",
+            }
+            kind = "app_home_opened"
+        else:
+            files = [
+                {
+                    "id": f"F{index}x{n}",
+                    "name": f"soak{index}x{n}.png",
+                    "filetype": "png",
+                    "mimetype": "image/png",
+                    "size": 4096 + index % 1024,
+                    "url_private_download": (
+                        f"https://files.slack.com/files-pri/T0REPLAY-F{index}x{n}/"
+                        f"download/soak{index}x{n}.png"
+                    ),
+                }
+                for n in range(1 + index % 2)
+            ]
+            body = {
+                "type": "message_action",
+                "callback_id": "analyze",
+                "trigger_id": f"tr{index}",
+                "user": {"id": user_id},
+                "channel": {"id": channel_id},
+                "team": {"id": "T0REPLAY"},
+                "message_ts": f"{index}.000100",
+                "message": {"ts": f"{index}.000100", "files": files},
+                "response_url": f"https://hooks.slack.com/app/{index}",
+            }
+            kind = "shortcut"
+        yield {"t": float(index), "kind": kind, "body": body}
+
+
+def looped(path: str) -> Iterator[CapturedRequest]:
+    """A capture replayed over and over, each pass under new message IDs."""
+    for lap in itertools.count():
+        for request in read_capture(path):
+            yield {**request, "body": _relabel(request["body"], lap)}
+
+
+def _relabel(value: Any, lap: int) -> Any:
+    # New file IDs and timestamps, so a lap isn't skipped as already analyzed.
+    if isinstance(value, dict):
+        return {
+            key: (
+                f"{item}-{lap}"
+                if key in ("id", "message_ts", "ts", "event_id") and lap
+                else _relabel(item, lap)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_relabel(item, lap) for item in value]
+    return value
+
+
+def _rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def sample(app: App, elapsed: float) -> Dict[str, float]:
+    """Measure everything that should stay flat over a soak."""
+    gc.collect()
+    return {
+        "elapsed": elapsed,
+        "traced_mb": tracemalloc.get_traced_memory()[0] / 1048576,
+        "rss_mb": _rss() / 1048576,
+        "objects": len(gc.get_objects()),
+        "tasks": len(asyncio.all_tasks()),
+        "fds": len(os.listdir("/proc/self/fd")),
+        "temp_files": sum(1 for _ in Path.cwd().glob("_*")),
+        "active_users": len(app.active_users),
+        "active_requests": len(app.active_requests),
+        "batches": len(app.batches.batches),
+        "open_traces": len(app.tracer._open),
+    }
+
+
+def growth(samples: list[Dict[str, float]], metric: str) -> float:
+    """How much a metric grew, from the first third of a run to the last."""
+    third = max(len(samples) // 3, 1)
+    return statistics.median(s[metric] for s in samples[-third:]) - statistics.median(
+        s[metric] for s in samples[:third]
+    )
+
+
+async def _run(args: argparse.Namespace) -> int:
+    slack = FakeSlack()
+    await slack.start()
+    rd = FakeRealityDefender(
+        args.upload_seconds, args.analysis_seconds, args.failure_rate
+    )
+    requests = (
+        looped(args.capture) if args.capture else synthetic(args.users, args.channels)
+    )
+    samples: list[Dict[str, float]] = []
+    dispatched = failed = 0
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Downloads are written to the working directory.
+        os.chdir(work_dir)
+        app = build_app(slack, rd, work_dir)
+        background = [
+            asyncio.create_task(app.poll_results()),
+            asyncio.create_task(app.run_auto_scan()),
+        ]
+        in_flight: set[asyncio.Task] = set()
+
+        async def dispatch(body: Dict[str, Any]) -> None:
+            nonlocal dispatched, failed
+            response = await app.app.async_dispatch(
+                AsyncBoltRequest(body=slack.rewrite(body), mode="socket_mode")
+            )
+            dispatched += 1
+            if response.status != 200:
+                failed += 1
+
+        start = time.monotonic()
+        next_sample = start + args.warmup
+        baseline: tracemalloc.Snapshot | None = None
+        for index, request in enumerate(requests):
+            now = time.monotonic()
+            if now - start >= args.duration:
+                break
+            if now >= next_sample:
+                samples.append(sample(app, now - start))
+                if baseline is None:
+                    baseline = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+                next_sample += args.sample_interval
+                if args.verbose:
+                    print(_row(samples[-1]), flush=True)
+
+            task = asyncio.create_task(dispatch(request["body"]))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            await asyncio.sleep(max(start + (index + 1) / args.rate - now, 0))
+
+        samples.append(sample(app, time.monotonic() - start))
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+        for task in [*background, *in_flight]:
+            task.cancel()
+        await asyncio.gather(*background, *in_flight, return_exceptions=True)
+        app.history.close()
+        os.chdir(args.cwd)
+    await slack.stop()
+
+    print(
+        f"Sent {dispatched} requests ({failed} failed), "
+        f"{rd.uploads} analyses uploaded, over {samples[-1]['elapsed']:.0f}s"
+    )
+    print(_row({key: key for key in samples[0]}))
+    for row in samples:
+        print(_row(row))
+    print()
+
+    thresholds: Dict[str, float] = {
+        "traced_mb": args.max_memory_growth_mb,
+        "objects": args.max_object_growth,
+        **{
+            metric: args.max_count_growth
+            for metric in samples[0]
+            if metric not in ("elapsed", "traced_mb", "rss_mb", "objects")
+        },
+    }
+    passed = True
+    if len(samples) < 3:
+        print("Too few samples to judge growth, run for longer")
+        passed = False
+    for metric, limit in thresholds.items():
+        grew = growth(samples, metric)
+        ok = grew <= limit
+        passed &= ok
+        print(
+            f"{'ok  ' if ok else 'FAIL'} {metric}: grew {grew:+.1f} (limit {limit:g})"
+        )
+    print(f"     rss_mb: grew {growth(samples, 'rss_mb'):+.1f} (not judged)")
+
+    if baseline is not None:
+        print(f"\nTop {args.top} allocation sites by growth since warm-up:")
+        for stat in snapshot.compare_to(baseline, "lineno")[: args.top]:
+            print(f"  {stat}")
+
+    print("\nPASSED" if passed else "\nFAILED")
+    return 0 if passed else 1
+
+
+def _row(row: Dict[str, Any]) -> str:
+    return " ".join(
+        f"{value:>12.1f}" if isinstance(value, float) else f"{value:>12}"
+        for value in row.values()
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--capture", help="loop this capture instead of synthetic")
+    parser.add_argument("--duration", type=float, default=3600.0)
+    parser.add_argument("--rate", type=float, default=5.0, help="requests per second")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--warmup", type=float, default=120.0)
+    parser.add_argument("--sample-interval", type=float, default=60.0)
+    parser.add_argument("--upload-seconds", type=float, default=0.2)
+    parser.add_argument("--analysis-seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.05,
+        help="share of Reality Defender calls that fail",
+    )
+    parser.add_argument("--max-memory-growth-mb", type=float, default=20.0)
+    parser.add_argument("--max-object-growth", type=float, default=50000)
+    parser.add_argument("--max-count-growth", type=float, default=50)
+    parser.add_argument("--frames", type=int, default=1, help="traceback depth")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--verbose", action="store_true", help="print samples live")
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args()
+    args.cwd = os.getcwd()
+    logging.basicConfig(level=args.log_level)
+    tracemalloc.start(args.frames)
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,9 @@ from types import FrameType
 from typing import Optional
 
 from reality_defender_slack_app.app import App
-from reality_defender_slack_app.config import load_config, setup_logging
+from reality_defender_slack_app.config import Config, load_config, setup_logging
+from reality_defender_slack_app.health import HealthServer
+from reality_defender_slack_app.performance import apply_profile, loop_factory
 
 logger = logging.getLogger(__name__)
 
@@ -19,36 +21,73 @@ def signal_handler(signum: int, _frame: Optional[FrameType]) -> None:
     sys.exit(0)
 
 
-async def main() -> None:
+async def main(current_config: Optional[Config] = None) -> None:
     """Main application entry point"""
     # Setup signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
     # Validate configuration
-    current_config = load_config()
+    current_config = current_config or load_config()
 
     # Setup logging
     setup_logging(current_config.log_level)
+    apply_profile(current_config.performance_profile)
 
     # Create and start our Slack bot
     slack_app: App = App(
         slack_bot_token=current_config.slack_bot_token,
         slack_app_token=current_config.slack_app_token,
+        config=current_config,
     )
 
     logger.info("Starting Slack application...")
 
+    # Serve probes and the analysis backlog to the orchestrator.
+    health_server: Optional[HealthServer] = None
+    if current_config.health_port:
+        health_server = HealthServer(
+            slack_app,
+            host=current_config.health_host,
+            port=current_config.health_port,
+            max_loop_lag=current_config.health_max_loop_lag,
+        )
+        await health_server.start()
+
+    # Connect to Slack and Reality Defender, the app is ready once done.
+    asyncio.create_task(slack_app.warm_up())
+
     # Start the long polling.
     asyncio.create_task(slack_app.poll_results())
 
+    # Start exporting analysis traces, if enabled.
+    asyncio.create_task(slack_app.tracer.run())
+
+    # Start analyzing media from auto-scan channels.
+    asyncio.create_task(slack_app.run_auto_scan())
+
     # Start listening.
     asyncio.create_task(slack_app.start())
 
-    # Keep the application running
-    while True:
-        await asyncio.sleep(1)
+    # Keep the application running, until a signal cancels it.
+    try:
+        while True:
+            await asyncio.sleep(1)
+    finally:
+        logger.info("Shutting down...")
+        if health_server:
+            await health_server.stop()
+        await slack_app.close()
+
+
+def run() -> None:
+    """Run the app, on the event loop chosen by the performance profile."""
+    current_config = load_config()
+    with asyncio.Runner(
+        loop_factory=loop_factory(current_config.performance_profile)
+    ) as runner:
+        runner.run(main(current_config))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -1,28 +1,153 @@
 from __future__ import annotations
 
-import array
 import asyncio
-import json
+import functools
+import hashlib
+import itertools
 import logging
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, TypedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    NotRequired,
+    TypedDict,
+    TypeVar,
+)
 
-import requests
-from realitydefender import RealityDefender
+from realitydefender import RealityDefender, RealityDefenderError
+from realitydefender.detection.upload import get_signed_url
 from slack_bolt.adapter.socket_mode.aiohttp import AsyncSocketModeHandler
 from slack_bolt.app.async_app import AsyncApp
+from slack_sdk.oauth.installation_store import FileInstallationStore
+from slack_sdk.oauth.installation_store.async_cacheable_installation_store import (
+    AsyncCacheableInstallationStore,
+)
 
+from reality_defender_slack_app.autoscan import AutoScanPolicy
+from reality_defender_slack_app.breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    retry_with_backoff,
+)
+from reality_defender_slack_app.batching import AnalysisBatch, BatchKey, BatchTracker
+from reality_defender_slack_app.capture import TrafficRecorder
+from reality_defender_slack_app.config import Config
+from reality_defender_slack_app.credentials import INVALID, KeyValidator
+from reality_defender_slack_app.delivery import (
+    ChannelAccess,
+    Delivery,
+    is_undeliverable,
+)
+from reality_defender_slack_app.estimator import CompletionEstimator
+from reality_defender_slack_app.connections import (
+    SLACK_FILES_URL,
+    create_download_session,
+    create_session,
+    open_rd_connection,
+    warm_up,
+)
+from reality_defender_slack_app.export import (
+    ExportFormat,
+    parse_export_args,
+    write_export,
+)
+from reality_defender_slack_app.history import (
+    HISTORY_FILENAME,
+    HistoryStore,
+    HistoryQuery,
+    parse_history_args,
+)
+from reality_defender_slack_app.keypool import KeyPool
+from reality_defender_slack_app.media import (
+    SNIFF_BYTES,
+    DownloadedMedia,
+    MediaPlan,
+    MediaRejectedError,
+    check_size,
+    filetype_from_name,
+    is_slack_file_url,
+    media_format,
+    plan_media,
+    preview_plan,
+    sniff_filetype,
+)
+from reality_defender_slack_app.performance import LazyJson, dumps, loads
+from reality_defender_slack_app.preprocess import ImageOptimizer
+from reality_defender_slack_app.scan import (
+    CheckpointStore,
+    KnownMediaCache,
+    ScanCheckpoint,
+    iter_history_pages,
+    record_verdict,
+)
+from reality_defender_slack_app.scheduler import Priority, WorkScheduler
+from reality_defender_slack_app.stats import UserStatsTracker
+from reality_defender_slack_app.tracing import (
+    CollectorSpanExporter,
+    FileSpanExporter,
+    Span,
+    SpanExporter,
+    Tracer,
+)
+from reality_defender_slack_app.uploads import (
+    ChunkedUploader,
+    UploadManifest,
+    UploadStore,
+    parse_signed_url,
+)
 from reality_defender_slack_app.views import (
     app_home_default,
     app_home_first_boot,
+    describe_verdict,
     notify_acknowledge_analysis_request,
+    notify_batch_complete,
     notify_error_analysis_request,
+    notify_error_invalid_key,
     notify_error_user_unavailable,
+    notify_media_rejected,
+    notify_preview_complete,
+    preview_message,
+    notify_service_degraded,
+    post_scan_progress,
+    respond_analysis_history,
 )
+from reality_defender_slack_app.workers import MediaWorkers
+from reality_defender_slack_app.workspaces import Workspaces
+
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# A user's own client, or the pool of shared organisation keys.
+RDClient = RealityDefender | KeyPool
+
+
+# Statuses returned by Reality Defender while an analysis is still running.
+IN_PROGRESS_STATUSES = frozenset({"ANALYZING", "DOWNLOADING"})
+
+INVALID_KEY_MESSAGE = (
+    "Reality Defender rejected that API key. Check it and register it again "
+    "with `/setup-rd your-key`."
+)
+
+NO_KEY_MESSAGE = (
+    "Use the `/setup-rd your-key` command to add your Reality Defender API key first."
+)
+
+DEGRADED_MESSAGE = (
+    "⏳ Reality Defender is currently degraded and can't accept new analyses. "
+    "Please try again in a few minutes."
+)
+
 
 class RequestData(TypedDict):
     user_id: str
@@ -30,30 +155,215 @@ class RequestData(TypedDict):
     channel_id: str
     message_ts: str
     status: str
+    # Set when the request belongs to a multi-file batch for its message.
+    batched: NotRequired[bool]
+    # Name of the file as shared, for results and history.
+    filename: NotRequired[str]
+    # Scheduling priority, interactive when missing.
+    priority: NotRequired[int]
+    # Identify the analyzed media and its content, to avoid analyzing it twice.
+    media_key: NotRequired[str]
+    content_key: NotRequired[str]
+    # Bytes not uploaded thanks to image optimization.
+    bytes_saved: NotRequired[int]
+    # Workspace the request came from, when serving several.
+    team_id: NotRequired[str]
+    # When the media was uploaded.
+    submitted_at: NotRequired[float]
+    # Type and size of the uploaded file, and how long its analysis was
+    # expected to take, to time the first check of its result.
+    filetype: NotRequired[str]
+    size: NotRequired[int]
+    expected_seconds: NotRequired[float]
+    # Set when a thumbnail was analyzed instead of this file, to triage it.
+    preview_of: NotRequired[MediaPlan]
+
+
+class AutoScanItem(TypedDict):
+    user_id: str
+    channel_id: str
+    message_ts: str
+    media: list[MediaPlan]
+    team_id: NotRequired[str]
 
 
 class App:
     """Slack bot that integrates with Reality Defender SDK for content analysis."""
 
-    def __init__(self, slack_bot_token: str, slack_app_token: str):
+    def __init__(
+        self,
+        slack_bot_token: str,
+        slack_app_token: str,
+        config: Config | None = None,
+    ):
         """
         Initialize the Slack app.
 
         Args:
             slack_bot_token: Slack Bot User OAuth Token
             slack_app_token: Slack App-Level Token
+            config: application configuration, defaults are used when omitted
         """
         self.bot_token = slack_bot_token
-        self.app = AsyncApp(
-            name="Reality Defender",
-            logger=logger,
-            token=self.bot_token,
+        self.config = config or Config.model_validate(
+            {"SLACK_BOT_TOKEN": slack_bot_token, "SLACK_APP_TOKEN": slack_app_token}
         )
+        installation_store: AsyncCacheableInstallationStore | None = None
+        if self.config.slack_installation_dir:
+            # Serve every workspace the app is installed in, with their tokens
+            # cached in memory.
+            installation_store = AsyncCacheableInstallationStore(
+                FileInstallationStore(base_dir=self.config.slack_installation_dir)
+            )
+            self.app = AsyncApp(
+                name="Reality Defender",
+                logger=logger,
+                installation_store=installation_store,
+                installation_store_bot_only=True,
+            )
+        else:
+            self.app = AsyncApp(
+                name="Reality Defender",
+                logger=logger,
+                token=self.bot_token,
+            )
         self.handler = AsyncSocketModeHandler(self.app, app_token=slack_app_token)
 
+        # Slack clients and upload limits for each workspace.
+        self.workspaces = Workspaces(
+            self.app.client,
+            self.bot_token,
+            installation_store=installation_store,
+            team_concurrency=self.config.team_concurrency,
+        )
+
         # Track active user sessions and analysis requests.
         self.active_users: Dict[str, RealityDefender] = {}
         self.active_requests: Dict[str, RequestData] = {}
+        # Each user's analyses, for their home tab.
+        self.user_stats = UserStatsTracker()
+
+        # Whether the keys users registered are accepted by Reality Defender.
+        self.key_validator: KeyValidator | None = None
+        if self.config.key_validation_ttl:
+            self.key_validator = KeyValidator(ttl=self.config.key_validation_ttl)
+
+        # Organisation keys shared by every user, instead of their own.
+        self.key_pool: KeyPool | None = None
+        if self.config.rd_api_key_list:
+            self.key_pool = KeyPool(
+                self.config.rd_api_key_list,
+                rate_per_minute=self.config.rd_key_rate_limit,
+                cooldown=self.config.rd_key_cooldown_seconds,
+            )
+
+        # Results go to the channel they were asked for in when the bot can
+        # post there, to the requester otherwise.
+        self.delivery = Delivery(ChannelAccess(ttl=self.config.channel_access_ttl))
+
+        # Group results from multi-file messages into a single reply.
+        self.batches = BatchTracker(
+            self._notify_batch_complete, timeout=self.config.batch_timeout_seconds
+        )
+
+        # Uploads and result polls are scheduled by priority, so background
+        # work never delays users running the shortcut by hand.
+        self.upload_scheduler = WorkScheduler(
+            concurrency=self.config.upload_concurrency, name="upload"
+        )
+        self.poll_scheduler = WorkScheduler(
+            concurrency=self.config.poll_concurrency, name="poll"
+        )
+
+        # CPU-bound media work runs in its own pool, so it can use every core
+        # without holding up the event loop.
+        self.media_workers = MediaWorkers(
+            workers=self.config.media_workers or os.cpu_count() or 1,
+            mode=self.config.media_worker_mode,
+        )
+
+        # Optional downsampling of oversized images before they are uploaded.
+        self.image_optimizer = ImageOptimizer(
+            self.config.image_max_dimension, self.media_workers
+        )
+
+        # Fail fast while Reality Defender is struggling, instead of piling up
+        # more work on it.
+        self.breakers: Dict[str, CircuitBreaker] = {
+            "upload": CircuitBreaker(
+                "upload",
+                failure_rate=self.config.breaker_failure_rate,
+                latency_threshold=self.config.breaker_upload_latency,
+                reset_timeout=self.config.breaker_reset_seconds,
+            ),
+            "result": CircuitBreaker(
+                "result",
+                failure_rate=self.config.breaker_failure_rate,
+                latency_threshold=self.config.breaker_result_latency,
+                reset_timeout=self.config.breaker_reset_seconds,
+            ),
+        }
+
+        # Automatic analysis of media shared in opted-in channels.
+        self.auto_scan = AutoScanPolicy(
+            channels=self.config.auto_scan_channel_ids,
+            sample_rate=self.config.auto_scan_sample_rate,
+            rate_per_minute=self.config.auto_scan_rate_limit,
+            directory=self.config.state_dir,
+        )
+        self.auto_scan.load()
+        self.auto_scan_queue: asyncio.Queue[AutoScanItem] = asyncio.Queue(
+            maxsize=self.config.auto_scan_queue_size
+        )
+
+        # Retroactive channel scans, checkpointed so they survive restarts.
+        self.known_media = KnownMediaCache(self.config.known_media_cache_size)
+        self.scan_checkpoints = CheckpointStore(self.config.state_dir)
+        self.channel_scans: Dict[str, asyncio.Task] = {}
+        # Latest scan of each channel still waiting for verdicts, to summarize.
+        self.scan_reports: Dict[str, ScanCheckpoint] = {}
+
+        # Large files are uploaded in resumable chunks, tracked on disk.
+        self.chunked_uploads = ChunkedUploader(
+            UploadStore(self.config.state_dir),
+            chunk_size=self.config.upload_chunk_size_mb * 1048576,
+            attempts=self.config.retry_attempts,
+        )
+
+        # Where the time of each analysis goes, from download to notification.
+        exporter: SpanExporter | None = None
+        if self.config.trace_collector_url:
+            exporter = CollectorSpanExporter(self.config.trace_collector_url)
+        elif self.config.trace_file:
+            exporter = FileSpanExporter(self.config.trace_file)
+        self.tracer = Tracer(exporter, sample_rate=self.config.trace_sample_rate)
+
+        # How long analyses take, learned as they complete, to check for a
+        # result around when it should be ready.
+        self.estimator = CompletionEstimator(
+            self.config.poll_interval_seconds,
+            alpha=self.config.estimate_smoothing,
+            directory=self.config.state_dir,
+        )
+        self.estimator.load()
+        # Wakes the polling loop up as soon as a request is ready to poll.
+        self.requests_pending = asyncio.Event()
+
+        # Completed analyses, for /analysis-history.
+        self.history = HistoryStore(
+            str(Path(self.config.state_dir) / HISTORY_FILENAME),
+            max_rows=self.config.history_max_rows,
+        )
+
+        # Incoming traffic recorded for replay, when enabled.
+        self.recorder: TrafficRecorder | None = None
+        if self.config.capture_file:
+            self.recorder = TrafficRecorder(self.config.capture_file)
+            self.app.use(self.recorder.middleware)
+
+        # Connections are opened during warm-up, the app is ready after that.
+        self.warmed_up = False
+        self._download_session: requests.Session | None = None
 
         self._setup_handlers()
 
@@ -70,13 +380,24 @@ class App:
 
         @self.app.event("app_home_opened")
         async def show_home_tab(client: Any, event: Any) -> None:
-            logger.debug(f"Received event: {json.dumps(event, indent=2)}")
+            logger.debug("Received event: %s", LazyJson(event))
 
-            if event.get("user") in self.active_users:
-                await app_home_default(client, event)
+            user_id = event.get("user", "")
+            if self._rd_client(user_id):
+                await app_home_default(client, event, self.user_stats.get(user_id))
             else:
                 await app_home_first_boot(client, event)
 
+        @self.app.event("app_uninstalled")
+        async def handle_app_uninstalled(context: Any) -> None:
+            """Forget a workspace the app was removed from."""
+            logger.info(f"App uninstalled from {context.team_id}")
+            if self.app.installation_store:
+                await self.app.installation_store.async_delete_all(
+                    enterprise_id=context.enterprise_id, team_id=context.team_id
+                )
+            self.workspaces.forget(context.team_id)
+
         @self.app.command("/setup-rd")
         async def handle_configure_rd_command(
             ack: Any, respond: Any, command: Any
@@ -84,21 +405,203 @@ class App:
             """Handle /configure-rd slash command."""
             await ack()
 
-            logger.debug(f"Received setup-rd command: {json.dumps(command, indent=2)}")
+            logger.debug("Received setup-rd command: %s", LazyJson(command))
 
-            self.active_users[command.get("user_id")] = RealityDefender(
-                api_key=command.get("text")
-            )
+            if self.key_pool:
+                await respond(
+                    "This workspace uses shared Reality Defender API keys, there is "
+                    "nothing to set up."
+                )
+                return
+
+            user_id: str = command.get("user_id", "")
+            rd_client = RealityDefender(api_key=command.get("text"))
+            if (
+                self.key_validator
+                and self.key_validator.status(rd_client.api_key) == INVALID
+            ):
+                await respond(INVALID_KEY_MESSAGE)
+                return
+
+            self.active_users[user_id] = rd_client
             await respond("Your user has been registered.")
+
+            if self.key_validator:
+                # Checking the key connects ahead of the first analysis too.
+                asyncio.create_task(
+                    self._check_user_key(
+                        self.key_validator, user_id, rd_client, respond
+                    )
+                )
+                return
+
+            # Connect ahead of the user's first analysis.
+            if self.config.warmup_timeout:
+                asyncio.create_task(
+                    warm_up(
+                        {"Reality Defender": open_rd_connection(rd_client)},
+                        self.config.warmup_timeout,
+                    )
+                )
+
+            # Pick up any channel scan that was interrupted by a restart.
+            self._resume_channel_scans(user_id)
+            self._resume_uploads(user_id)
             return
 
+        @self.app.command("/scan-channel")
+        async def handle_scan_channel_command(
+            ack: Any, respond: Any, command: Any
+        ) -> None:
+            """Handle /scan-channel slash command to analyze past channel media."""
+            await ack()
+            logger.debug("Received scan-channel command: %s", LazyJson(command))
+
+            user_id: str = command.get("user_id", "")
+            channel_id: str = command.get("channel_id", "")
+            text: str = command.get("text", "").strip()
+
+            if not self._rd_client(user_id):
+                await respond(
+                    "Use the `/setup-rd your-key` command to add your Reality Defender "
+                    "API key first."
+                )
+                return
+
+            if channel_id in self.channel_scans:
+                await respond("A scan of this channel is already running.")
+                return
+
+            if text.split(maxsplit=1)[:1] == ["restart"]:
+                self.scan_checkpoints.delete(channel_id)
+                text = text[len("restart") :].strip()
+
+            checkpoint = self.scan_checkpoints.load(channel_id)
+            if checkpoint:
+                await respond("Resuming the interrupted scan of this channel.")
+            else:
+                try:
+                    days = int(text) if text else 7
+                except ValueError:
+                    days = 0
+                if not 0 < days <= self.config.scan_max_days:
+                    await respond(
+                        "Usage: `/scan-channel [restart] [days]`, where days is "
+                        f"between 1 and {self.config.scan_max_days}."
+                    )
+                    return
+
+                checkpoint = {
+                    "channel_id": channel_id,
+                    "user_id": user_id,
+                    "team_id": command.get("team_id", ""),
+                    "oldest": str(time.time() - days * 86400),
+                    "cursor": None,
+                    "status_ts": None,
+                    "scanned": 0,
+                    "queued": 0,
+                    "skipped": 0,
+                }
+                self.scan_checkpoints.save(checkpoint)
+                await respond(f"Scanning the last {days} days of this channel.")
+
+            self._start_channel_scan(checkpoint)
+
+        @self.app.command("/auto-scan")
+        async def handle_auto_scan_command(
+            ack: Any, respond: Any, command: Any
+        ) -> None:
+            """Handle /auto-scan slash command to opt a channel in or out."""
+            await ack()
+            logger.debug("Received auto-scan command: %s", LazyJson(command))
+
+            channel_id: str = command.get("channel_id", "")
+            action: str = command.get("text", "").strip().lower()
+
+            if action in ("on", "off") and (
+                command.get("user_id") not in self.config.admin_user_ids
+            ):
+                # Media is analyzed with the key of whoever shared it.
+                await respond("Only administrators can change automatic analysis.")
+            elif action == "on":
+                self.auto_scan.enable(channel_id)
+                await respond(
+                    "Media shared in this channel will now be analyzed automatically."
+                )
+            elif action == "off":
+                self.auto_scan.disable(channel_id)
+                await respond("Automatic analysis is now disabled for this channel.")
+            else:
+                state = (
+                    "enabled" if self.auto_scan.is_enabled(channel_id) else "disabled"
+                )
+                await respond(
+                    f"Automatic analysis is {state} for this channel. "
+                    "Use `/auto-scan on` or `/auto-scan off` to change it."
+                )
+
+        @self.app.event("message")
+        async def handle_message_event(event: Any) -> None:
+            """Queue media shared in auto-scan channels for analysis."""
+            if event.get("subtype") not in (None, "file_share") or event.get("bot_id"):
+                return
+
+            channel_id: str = event.get("channel", "")
+            if not self.auto_scan.is_enabled(channel_id):
+                return
+
+            user_id: str = event.get("user", "")
+            if not self._rd_client(user_id):
+                # We can only analyze on behalf of users with a registered key.
+                return
+
+            team_id: str = event.get("team", "")
+            media, _ = await plan_media(event, await self.workspaces.client(team_id))
+            if not media or not self.auto_scan.admit(channel_id, len(media)):
+                return
+
+            try:
+                self.auto_scan_queue.put_nowait(
+                    {
+                        "user_id": user_id,
+                        "channel_id": channel_id,
+                        "message_ts": event.get("ts", ""),
+                        "media": media,
+                        "team_id": team_id,
+                    }
+                )
+            except asyncio.QueueFull:
+                logger.warning(
+                    f"Auto-scan queue full, skipping message in {channel_id}"
+                )
+
+        async def handle_membership_event(event: Any, context: Any) -> None:
+            """Forget how to deliver results for a channel the bot joined or left."""
+            # The bot is told it left with `channel_left` or `group_left`, and
+            # sees members join or leave, itself included.
+            bot_left = event.get("type") in ("channel_left", "group_left")
+            if bot_left or event.get("user") == context.get("bot_user_id"):
+                self.delivery.access.forget(event.get("channel", ""))
+
+        for event_type in (
+            "member_joined_channel",
+            "member_left_channel",
+            "channel_left",
+            "group_left",
+        ):
+            self.app.event(event_type)(handle_membership_event)
+
+        @self.app.event("file_shared")
+        async def handle_file_shared_event(event: Any) -> None:
+            # Files shared in a channel also arrive as a `file_share` message,
+            # which carries the full file objects, so that's where we scan them.
+            logger.debug("Received file_shared event: %s", LazyJson(event))
+
         @self.app.command("/analysis-status")
         async def handle_status_command(ack: Any, respond: Any, command: Any) -> None:
             """Handle /analysis-status slash command to check analysis status."""
             await ack()
-            logger.debug(
-                f"Received analysis-status command: {json.dumps(command, indent=2)}"
-            )
+            logger.debug("Received analysis-status command: %s", LazyJson(command))
 
             try:
                 user_id = command.get("user_id")
@@ -125,6 +628,9 @@ class App:
                     req_data = self.active_requests[request_id]
                     if req_data.get("user_id") == user_id:
                         status = req_data.get("status", "unknown")
+                        percent = self.chunked_uploads.percent(request_id)
+                        if percent is not None:
+                            status = f"{status} ({percent}%)"
                         await respond(f"Analysis `{request_id}` status: {status}")
                     else:
                         await respond(
@@ -137,127 +643,995 @@ class App:
                 logger.warning(f"Error handling status command: {e}")
                 await respond("❌ An error occurred while checking status.")
 
+        @self.app.command("/analysis-history")
+        async def handle_history_command(ack: Any, respond: Any, command: Any) -> None:
+            """Handle /analysis-history slash command to list past analyses."""
+            await ack()
+            logger.debug("Received analysis-history command: %s", LazyJson(command))
+
+            text = command.get("text", "").strip()
+            now = time.time()
+            user_id: str = command.get("user_id", "")
+            query = parse_history_args(
+                text,
+                user_id,
+                command.get("channel_id"),
+                now=now,
+                admin=user_id in self.config.admin_user_ids,
+            )
+            if query is None:
+                await respond(
+                    "Usage: `/analysis-history [here] [manipulated|authentic|unknown] "
+                    "[days]`"
+                )
+                return
+            await self._respond_history(respond, query, text, now)
+
+        @self.app.action("analysis_history_next")
+        async def handle_history_next(ack: Any, respond: Any, body: Any) -> None:
+            """Show the next page of /analysis-history."""
+            await ack()
+
+            page = loads(body["actions"][0]["value"])
+            user_id: str = body["user"]["id"]
+            query = parse_history_args(
+                page["text"],
+                user_id,
+                body.get("channel", {}).get("id", ""),
+                now=page["now"],
+                admin=user_id in self.config.admin_user_ids,
+            )
+            if query is not None:
+                await self._respond_history(
+                    respond, query, page["text"], page["now"], page["cursor"]
+                )
+
+        @self.app.action("analyze_full_file")
+        async def handle_analyze_full_file(
+            ack: Any, body: Any, respond: Any, client: Any
+        ) -> None:
+            """Analyze a file in full after a preliminary verdict from its thumbnail."""
+            await ack()
+
+            user_id: str = body["user"]["id"]
+            rd_client = await self._analysis_client(client, body["trigger_id"], user_id)
+            if not rd_client:
+                return
+
+            # The button goes, so the file is only analyzed in full once.
+            full = loads(body["actions"][0]["value"])
+            text, blocks = preview_message(
+                full["user_id"], full["request_id"], full["status"], full["score"]
+            )
+            await respond(text=text, blocks=blocks, replace_original=True)
+            await self._analyze_full_file(
+                rd_client,
+                user_id,
+                full["channel_id"],
+                full["message_ts"],
+                full["plan"],
+                full["team_id"],
+            )
+
+        @self.app.command("/analysis-export")
+        async def handle_export_command(
+            ack: Any, respond: Any, command: Any, client: Any
+        ) -> None:
+            """Handle /analysis-export slash command, for admins only."""
+            await ack()
+            logger.debug("Received analysis-export command: %s", LazyJson(command))
+
+            user_id = command.get("user_id")
+            if user_id not in self.config.admin_user_ids:
+                await respond("Only administrators can export analyses.")
+                return
+
+            parsed = parse_export_args(command.get("text", ""))
+            if parsed is None:
+                await respond(
+                    "Usage: `/analysis-export [jsonl|csv] "
+                    "[manipulated|authentic|unknown] [days]`"
+                )
+                return
+
+            await respond("Preparing the export, it will be sent to you directly.")
+            try:
+                await self._send_export(client, user_id, *parsed)
+            except Exception as e:
+                logger.warning(f"Error exporting analyses: {e}", exc_info=True)
+                await respond("❌ An error occurred while exporting analyses.")
+
         @self.app.shortcut("analyze")
         async def handle_analyze_shortcut(ack: Any, shortcut: Any, client: Any) -> None:
             await ack()
 
-            logger.debug(f"Received analyze shortcut: {json.dumps(shortcut, indent=2)}")
+            logger.debug("Received analyze shortcut: %s", LazyJson(shortcut))
             user_id: str = shortcut.get("user", {}).get("id", "")
             channel_id: str = shortcut.get("channel", {}).get("id", "")
             message_ts: str = shortcut.get("message_ts", "")
             trigger_id: str = shortcut.get("trigger_id", "")
+            team_id: str = shortcut.get("team", {}).get("id", "")
 
-            rd_client: RealityDefender | None = self.active_users.get(user_id)
+            rd_client = await self._analysis_client(client, trigger_id, user_id)
             if not rd_client:
-                await notify_error_user_unavailable(client, trigger_id)
                 return
 
             try:
-                blocks: array.array = shortcut.get("message", {}).get("blocks", [])
-                files: array.array = shortcut.get("message", {}).get("files", [])
-
-                urls: list = []
+                media, rejected = await plan_media(shortcut.get("message", {}), client)
 
-                urls.extend(
-                    [
-                        block.get("image_url") or block.get("slack_file", {}).get("url")
-                        for block in blocks
-                        if block.get("type") == "image"
-                    ]
-                )
-                urls.extend(
-                    [
-                        file.get("url_private") or file.get("url_private_download", {})
-                        for file in files
-                        if file.get("filetype") in ["jpg", "jpeg", "png", "mp4"]
-                    ]
-                )
-
-                if not urls:
-                    await notify_acknowledge_analysis_request(
-                        client, trigger_id, unsupported=True
-                    )
+                if not media:
+                    if any(e.reason != "unsupported file type" for e in rejected):
+                        await notify_media_rejected(
+                            client, trigger_id, [str(e) for e in rejected]
+                        )
+                    else:
+                        await notify_acknowledge_analysis_request(
+                            client, trigger_id, unsupported=True
+                        )
                     return
 
-                for url in urls:
-                    filename = self._download_media(url)
-                    await self._upload_media(
-                        rd_client, user_id, channel_id, message_ts, filename
+                if self.config.triage_threshold_mb and len(media) == 1:
+                    # Large files get a quick verdict from their thumbnail.
+                    preview = preview_plan(
+                        media[0], self.config.triage_threshold_mb * 1048576
                     )
+                    if preview:
+                        media = [preview]
+
+                await self._analyze_media(
+                    rd_client,
+                    user_id,
+                    channel_id,
+                    message_ts,
+                    media,
+                    priority=Priority.INTERACTIVE,
+                    team_id=team_id,
+                )
 
                 await notify_acknowledge_analysis_request(client, trigger_id)
 
+            except MediaRejectedError as e:
+                logger.info(f"Rejected media from analyze shortcut: {e}")
+                await notify_media_rejected(client, trigger_id, [str(e)])
+
+            except CircuitOpenError:
+                logger.warning("Reality Defender unavailable, rejecting shortcut")
+                await notify_service_degraded(client, trigger_id)
+
             except Exception:
                 logger.warning("Error handling analyze shortcut", exc_info=True)
                 # Surely this should be more informative.
                 await notify_error_analysis_request(client, trigger_id)
 
+    async def warm_up(self) -> None:
+        """
+        Connect to Slack and Reality Defender before reporting ready.
+
+        Slack calls from every workspace share one pool of connections. It is
+        opened here, along with connections to Slack's file host and to
+        Reality Defender for each shared key, so the first analysis after a
+        deploy doesn't wait on DNS lookups and TLS handshakes. Connections
+        that fail are logged and opened on first use instead.
+        """
+        if not self.app.client.session:
+            self.app.client.session = create_session()
+
+        if self.config.warmup_timeout:
+            downloads = self._downloads()
+            connections: Dict[str, Awaitable[Any]] = {
+                "Slack": self.app.client.api_test(),
+                "Slack files": asyncio.to_thread(
+                    downloads.head,
+                    SLACK_FILES_URL,
+                    timeout=self.config.warmup_timeout,
+                ),
+            }
+            for key in self.key_pool.keys if self.key_pool else []:
+                connections[f"Reality Defender with {key.label}"] = open_rd_connection(
+                    key.client
+                )
+            start = time.perf_counter()
+            elapsed = await warm_up(connections, self.config.warmup_timeout)
+            logger.info(
+                f"Warmed up {sum(t is not None for t in elapsed.values())} of "
+                f"{len(elapsed)} connections in {time.perf_counter() - start:.2f}s"
+            )
+
+        self.warmed_up = True
+
+    async def close(self) -> None:
+        """Release worker processes, sessions and files on shutdown."""
+        await self.tracer.close()
+        await self.chunked_uploads.close()
+        self.media_workers.shutdown()
+        self.history.close()
+        if self.recorder:
+            self.recorder.close()
+        if self._download_session:
+            self._download_session.close()
+
     async def start(self) -> None:
+        if self.key_pool:
+            # No one needs to register a key first, pick up interrupted work.
+            self._resume_channel_scans()
+            self._resume_uploads()
         await self.handler.start_async()
 
-    def _download_media(self, url: str) -> str:
-        # Create a unique filename.
-        filename = f"./_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{url.split('/')[-1]}"
-
-        with (
-            requests.get(
-                url,
-                headers={"Authorization": "Bearer " + self.bot_token},
-                stream=True,
-            ) as r,
-            open(filename, "wb") as f,
+    async def _check_user_key(
+        self,
+        validator: KeyValidator,
+        user_id: str,
+        rd_client: RealityDefender,
+        respond: Any,
+    ) -> None:
+        """
+        Check the key a user registered, and unregister them if it's rejected.
+
+        Work interrupted by a restart only resumes once the key is known not
+        to be rejected.
+        """
+        if await validator.validate(rd_client) == INVALID:
+            self._forget_user(user_id, rd_client)
+            await respond(INVALID_KEY_MESSAGE)
+            return
+        self._resume_channel_scans(user_id)
+        self._resume_uploads(user_id)
+
+    def _forget_user(self, user_id: str, rd_client: RealityDefender) -> None:
+        """Unregister a user whose key was rejected, unless they registered again."""
+        if self.active_users.get(user_id) is rd_client:
+            logger.info(f"Unregistering {user_id}, their API key was rejected")
+            del self.active_users[user_id]
+
+    def _rd_client(self, user_id: str) -> RDClient | None:
+        """The client to analyze media with on behalf of a user, if any."""
+        return self.key_pool or self.active_users.get(user_id)
+
+    async def _analysis_client(
+        self,
+        client: Any,
+        trigger_id: str | None,
+        user_id: str,
+        post: Callable[[str], Awaitable[Any]] | None = None,
+    ) -> RDClient | None:
+        """
+        The client to analyze media a user asked for with, if analyzing it is
+        worth a try. Otherwise the user is told why not, and None returned:
+        in a modal when there is a trigger, or else with `post`, e.g. when a
+        file is analyzed in full after its thumbnail.
+        """
+
+        async def reject(
+            modal: Callable[[Any, str], Awaitable[None]], text: str
+        ) -> None:
+            if trigger_id:
+                await modal(client, trigger_id)
+            elif post:
+                await post(text)
+
+        rd_client = self._rd_client(user_id)
+        if not rd_client:
+            await reject(notify_error_user_unavailable, NO_KEY_MESSAGE)
+            return None
+
+        if (
+            self.key_validator
+            and isinstance(rd_client, RealityDefender)
+            # Slack gives up on the trigger after 3 seconds.
+            and await self.key_validator.validate(rd_client, wait=1.0) == INVALID
         ):
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
+            self._forget_user(user_id, rd_client)
+            await reject(notify_error_invalid_key, INVALID_KEY_MESSAGE)
+            return None
+
+        if self.breakers["upload"].is_open:
+            await reject(notify_service_degraded, DEGRADED_MESSAGE)
+            return None
+        return rd_client
+
+    async def _analyze_media(
+        self,
+        rd_client: RDClient,
+        user_id: str,
+        channel_id: str,
+        message_ts: str,
+        media: list[MediaPlan],
+        priority: Priority = Priority.INTERACTIVE,
+        team_id: str | None = None,
+    ) -> None:
+        """
+        Download and upload every planned piece of media found in a message.
+
+        Each file waits for an upload slot, after one of its workspace's slots
+        when those are capped. Interactive work is owned by the requesting
+        user, background work by the channel it came from.
+        """
+        owner = user_id if priority == Priority.INTERACTIVE else channel_id
+        token = await self.workspaces.token(team_id)
+
+        batch_key: BatchKey | None = None
+        if len(media) > 1:
+            batch_key = self.batches.open(
+                channel_id, message_ts, user_id, len(media), team_id=team_id
+            )
 
-        return filename
+        async def transfer(plan: MediaPlan, root: Span, queued_at: float) -> None:
+            self.tracer.start_span(root, "queue", start=queued_at).end()
+
+            # Downloading, sniffing and hashing happen in a single pass on a
+            # thread. hashlib releases the GIL, so concurrent downloads hash in
+            # parallel.
+            with self.tracer.span(root, "download"):
+                download = await asyncio.to_thread(
+                    self._download_media, plan["url"], plan, token
+                )
+            root.set("file.type", download.filetype)
+            root.set("file.size", download.size)
+
+            content_key = f"sha256:{download.sha256}"
+            if priority != Priority.INTERACTIVE and content_key in self.known_media:
+                # Same content already analyzed under another name, e.g. a
+                # file that was shared again.
+                logger.info(f"Skipping duplicate content {plan['name']}")
+                Path(download.path).unlink()
+                root.set("skipped", "duplicate")
+                root.end()
+                return
+
+            with self.tracer.span(root, "optimize") as span:
+                optimized = await self.image_optimizer.optimize(
+                    download.path, download.filetype
+                )
+                span.set("bytes_saved", optimized.bytes_saved)
+            if optimized.path != download.path:
+                Path(download.path).unlink()
+
+            with self.tracer.span(root, "upload"):
+                request_id = await self._upload_media(
+                    rd_client,
+                    user_id,
+                    channel_id,
+                    message_ts,
+                    optimized.path,
+                    batch_key=batch_key,
+                    priority=priority,
+                    media_key=plan["key"],
+                    content_key=content_key,
+                    bytes_saved=optimized.bytes_saved,
+                    team_id=team_id,
+                    filetype=download.filetype,
+                    size=download.size - optimized.bytes_saved,
+                    preview_of=plan.get("preview_of"),
+                    display_name=plan["name"],
+                )
+            root.set("request_id", request_id)
+            self.tracer.attach(request_id, root)
+
+        try:
+            for plan in media:
+                root = self.tracer.start_trace(
+                    "analysis", priority=priority.name.lower(), channel_id=channel_id
+                )
+                try:
+                    async with self.workspaces.limit(team_id):
+                        await self.upload_scheduler.run(
+                            priority,
+                            owner,
+                            functools.partial(transfer, plan, root, time.time()),
+                        )
+                except BaseException as e:
+                    root.end(error=f"{type(e).__name__}: {e}")
+                    raise
+        finally:
+            if batch_key:
+                # Anything not uploaded by now never will be.
+                await self.batches.seal(batch_key)
+
+    def _resume_channel_scans(self, user_id: str | None = None) -> None:
+        """
+        Restart checkpointed scans started by a user, once their key is known.
+
+        Every scan is restarted when no user is given.
+        """
+        for checkpoint in self.scan_checkpoints.all():
+            if (
+                user_id in (None, checkpoint["user_id"])
+                and checkpoint["channel_id"] not in self.channel_scans
+            ):
+                logger.info(f"Resuming scan of {checkpoint['channel_id']}")
+                self._start_channel_scan(checkpoint)
+
+    def _start_channel_scan(self, checkpoint: ScanCheckpoint) -> None:
+        channel_id = checkpoint["channel_id"]
+        task = asyncio.create_task(self._run_channel_scan(checkpoint))
+        self.channel_scans[channel_id] = task
+        task.add_done_callback(lambda _: self.channel_scans.pop(channel_id, None))
+
+    async def _run_channel_scan(self, checkpoint: ScanCheckpoint) -> None:
+        """
+        Page through a channel's history and analyze any media not seen before.
+
+        The checkpoint is saved after every page, so an interrupted scan picks
+        up where it left off instead of starting over.
+        """
+        channel_id = checkpoint["channel_id"]
+        user_id = checkpoint["user_id"]
+        team_id = checkpoint.get("team_id")
+
+        self.scan_reports[channel_id] = checkpoint
+        client = None
+        try:
+            client = await self.workspaces.client(team_id)
+            await self._post_scan_progress(client, checkpoint)
+
+            async for messages, next_cursor in iter_history_pages(
+                client, channel_id, checkpoint["oldest"], checkpoint["cursor"]
+            ):
+                for message in messages:
+                    checkpoint["scanned"] += 1
+                    if message.get("subtype") == "bot_message" or message.get("bot_id"):
+                        # Only media people shared is analyzed unasked.
+                        continue
+
+                    message_ts = message.get("ts", "")
+                    planned, _ = await plan_media(message, client)
+                    # Media analyzed before a restart is only in the history.
+                    analyzed = await self.history.verdicts(
+                        [
+                            plan["key"]
+                            for plan in planned
+                            if plan["key"] not in self.known_media
+                        ]
+                    )
+                    media: list[MediaPlan] = []
+                    for plan in planned:
+                        if plan["key"] in analyzed:
+                            self.known_media.add(plan["key"], analyzed[plan["key"]])
+                        elif plan["key"] not in self.known_media:
+                            media.append(plan)
+                            continue
+                        checkpoint["skipped"] += 1
+                        status = self.known_media.get(plan["key"])
+                        if status:
+                            record_verdict(checkpoint, status, message_ts, plan["name"])
+                    if not media:
+                        continue
+
+                    rd_client = self._rd_client(user_id)
+                    if not rd_client:
+                        logger.warning(f"Stopping scan of {channel_id}, no API key")
+                        return
+
+                    try:
+                        await self._analyze_media(
+                            rd_client,
+                            user_id,
+                            channel_id,
+                            message_ts,
+                            media,
+                            priority=Priority.BULK,
+                            team_id=team_id,
+                        )
+                        checkpoint["queued"] += len(media)
+                    except Exception:
+                        # One broken file shouldn't stop the whole scan.
+                        logger.warning(
+                            f"Error analyzing message {message.get('ts')} in {channel_id}",
+                            exc_info=True,
+                        )
+
+                checkpoint["cursor"] = next_cursor
+                self.scan_checkpoints.save(checkpoint)
+                await self._post_scan_progress(client, checkpoint)
+
+            checkpoint["done"] = True
+            self.scan_checkpoints.delete(channel_id)
+            await self._post_scan_progress(client, checkpoint)
+
+        except Exception as e:
+            logger.warning(f"Error scanning channel {channel_id}", exc_info=True)
+            self.scan_reports.pop(channel_id, None)
+            if is_undeliverable(e):
+                # Resuming would only fail the same way, so start over next time.
+                self.scan_checkpoints.delete(channel_id)
+                text = (
+                    "❌ The scan of this channel failed, as I can't access it. "
+                    "Invite me to the channel, then run `/scan-channel` again."
+                )
+            else:
+                # The checkpoint is kept, so the scan can be resumed later on.
+                text = (
+                    "❌ The scan of this channel failed. Run `/scan-channel` to "
+                    "resume it, or `/scan-channel restart` to start over."
+                )
+            if client is not None:
+                try:
+                    await self.delivery.post(client, channel_id, user_id, text)
+                except Exception:
+                    logger.warning(
+                        f"Error notifying {user_id} of the failed scan", exc_info=True
+                    )
+
+    async def _post_scan_progress(
+        self, client: Any, checkpoint: ScanCheckpoint
+    ) -> None:
+        """
+        Show a scan's progress, then its summary once done.
+
+        The scan is forgotten once the summary has every verdict it will get.
+        """
+        pending = checkpoint["queued"] - checkpoint.get("completed", 0)
+        done = checkpoint.get("done", False)
+        if done and pending <= 0:
+            self.scan_reports.pop(checkpoint["channel_id"], None)
+        checkpoint["status_ts"] = await post_scan_progress(
+            client,
+            checkpoint["channel_id"],
+            checkpoint["status_ts"],
+            checkpoint["scanned"],
+            checkpoint["queued"],
+            checkpoint["skipped"],
+            done=done,
+            verdicts=checkpoint.get("verdicts"),
+            manipulated=checkpoint.get("manipulated"),
+            pending=max(pending, 0),
+        )
+
+    async def _record_scan_verdict(self, req_data: RequestData, status: str) -> None:
+        """Count the verdict of an analysis queued by a channel scan."""
+        checkpoint = self.scan_reports.get(req_data["channel_id"])
+        if not checkpoint:
+            return
+        checkpoint["completed"] = checkpoint.get("completed", 0) + 1
+        record_verdict(
+            checkpoint, status, req_data["message_ts"], req_data.get("filename")
+        )
+        # Progress is shown after every page, so only the summary is updated.
+        if checkpoint.get("done"):
+            client = await self.workspaces.client(req_data.get("team_id"))
+            await self._post_scan_progress(client, checkpoint)
+
+    async def run_auto_scan(self) -> None:
+        """
+        Analyze queued auto-scan messages one at a time, in the background.
+        """
+        while True:
+            item = await self.auto_scan_queue.get()
+            try:
+                rd_client = self._rd_client(item["user_id"])
+                if rd_client:
+                    await self._analyze_media(
+                        rd_client,
+                        item["user_id"],
+                        item["channel_id"],
+                        item["message_ts"],
+                        item["media"],
+                        priority=Priority.BACKGROUND,
+                        team_id=item.get("team_id"),
+                    )
+            except Exception:
+                logger.warning("Error handling auto-scan message", exc_info=True)
+            finally:
+                self.auto_scan_queue.task_done()
+
+    def _downloads(self) -> requests.Session:
+        """Session downloads share, keeping connections to Slack open."""
+        if not self._download_session:
+            self._download_session = create_download_session(
+                max(10, self.config.upload_concurrency)
+            )
+        return self._download_session
+
+    def _download_media(
+        self, url: str, media: MediaPlan | None = None, token: str | None = None
+    ) -> DownloadedMedia:
+        """
+        Download media to a local file in a single pass.
+
+        The size announced by the server is checked before anything is
+        written, and media of unknown type is identified from its first
+        bytes. While the rest streams to disk the content is hashed and
+        counted, and the download is aborted as soon as it goes over the size
+        limit, so large files are never read twice.
+
+        Raises:
+            MediaRejectedError: if the media is too large, not supported or
+                was truncated
+        """
+        # Create a unique filename.
+        name = url.split("?")[0].split("/")[-1]
+        filename = f"./_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{name}"
+        filetype = media["filetype"] if media else filetype_from_name(name)
+
+        # The bot token never leaves Slack, e.g. for image blocks pointing
+        # at other sites.
+        headers = {}
+        if is_slack_file_url(url):
+            headers["Authorization"] = "Bearer " + (token or self.bot_token)
+        with self._downloads().get(url, headers=headers, stream=True) as r:
+            r.raise_for_status()
+
+            length = r.headers.get("Content-Length")
+            if length:
+                check_size(name, filetype, int(length))
+
+            chunks = iter(r.iter_content(chunk_size=8192))
+            head = b""
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= SNIFF_BYTES:
+                    break
+
+            fmt = media_format(filetype)
+            if not filetype or not fmt:
+                filetype = sniff_filetype(head)
+                fmt = media_format(filetype)
+                if not filetype or not fmt:
+                    raise MediaRejectedError(name, "unsupported file type")
+                # Reality Defender relies on the extension to identify media.
+                filename = f"{filename}.{filetype}"
+                if length:
+                    check_size(name, filetype, int(length))
+
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with open(filename, "wb") as f:
+                    for chunk in itertools.chain((head,), chunks):
+                        size += len(chunk)
+                        if size > fmt["size_limit"]:
+                            check_size(name, filetype, size)
+                        digest.update(chunk)
+                        f.write(chunk)
+
+                expected = int(length) if length else (media["size"] if media else None)
+                if expected is not None and size != expected:
+                    raise MediaRejectedError(
+                        name, f"download was incomplete ({size} of {expected} bytes)"
+                    )
+            except BaseException:
+                Path(filename).unlink(missing_ok=True)
+                raise
+
+        return DownloadedMedia(filename, filetype, size, digest.hexdigest())
 
     async def _upload_media(
         self,
-        rd_client: RealityDefender,
+        rd_client: RDClient,
         user_id: str,
         channel_id: str,
         message_ts: str,
         filename: str,
-    ) -> None:
-        """Upload media to Reality Defender."""
-        upload_result = await rd_client.upload(file_path=filename)
-        self.active_requests[upload_result["request_id"]] = {
+        batch_key: BatchKey | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+        media_key: str | None = None,
+        content_key: str | None = None,
+        bytes_saved: int = 0,
+        team_id: str | None = None,
+        filetype: str | None = None,
+        size: int | None = None,
+        preview_of: MediaPlan | None = None,
+        display_name: str | None = None,
+    ) -> str:
+        """
+        Upload media to Reality Defender.
+
+        Files over the chunked upload threshold are sent in resumable chunks,
+        everything else in a single request. When the type and size of the
+        file are given, its result is first checked when its analysis is
+        expected to be done. `preview_of` is the file a thumbnail is uploaded
+        for, to analyze once the thumbnail's verdict is known if need be.
+        `display_name` is what the file is called in results and history,
+        taken from `filename` when not given.
+
+        Returns:
+            the request ID assigned to the upload
+        """
+        threshold = self.config.chunked_upload_threshold_mb * 1048576
+        chunked = bool(threshold) and Path(filename).stat().st_size >= threshold
+
+        try:
+            if chunked:
+                name = Path(filename).name
+                signed = parse_signed_url(
+                    await self._call_rd(
+                        "upload",
+                        lambda: (
+                            rd_client.signed_url(name)
+                            if isinstance(rd_client, KeyPool)
+                            else get_signed_url(rd_client.client, name)
+                        ),
+                    )
+                )
+                request_id, media_id = signed["request_id"], signed["media_id"]
+            else:
+                upload_result = await self._call_rd(
+                    "upload", lambda: rd_client.upload(file_path=filename)
+                )
+                request_id, media_id = (
+                    upload_result["request_id"],
+                    upload_result["media_id"],
+                )
+        except BaseException:
+            # Nothing will ever pick the file up again.
+            Path(filename).unlink(missing_ok=True)
+            raise
+
+        request: RequestData = {
             "user_id": user_id,
-            "media_id": upload_result["media_id"],
+            "media_id": media_id,
             "channel_id": channel_id,
             "message_ts": message_ts,
-            "status": "pending",
+            "status": "uploading" if chunked else "pending",
+            "submitted_at": time.time(),
         }
+        if priority != Priority.INTERACTIVE:
+            request["priority"] = int(priority)
+        if media_key:
+            request["media_key"] = media_key
+            self.known_media.add(media_key)
+        if content_key:
+            request["content_key"] = content_key
+            self.known_media.add(content_key)
+        if bytes_saved:
+            request["bytes_saved"] = bytes_saved
+        if team_id:
+            request["team_id"] = team_id
+        if filetype and size is not None:
+            request["filetype"] = filetype
+            request["size"] = size
+            request["expected_seconds"] = self.estimator.predict(filetype, size)
+        if preview_of:
+            request["preview_of"] = preview_of
+        if batch_key:
+            request["batched"] = True
+        # Strip the unique prefix added by _download_media.
+        request["filename"] = display_name or Path(filename).name.split("_", 3)[-1]
+
+        self.active_requests[request_id] = request
+        self.user_stats.submitted(
+            user_id,
+            request_id,
+            channel_id,
+            request["filename"],
+            request["submitted_at"],
+        )
+        if chunked:
+            manifest = self.chunked_uploads.start(signed, filename, dict(request))
+            try:
+                await self._upload_chunks(manifest, request)
+            except Exception:
+                # The manifest is gone, nothing will resume the upload. The
+                # file is kept on cancellation, when the manifest is too.
+                Path(filename).unlink(missing_ok=True)
+                raise
+
+        if batch_key:
+            self.batches.attach(batch_key, request_id, request["filename"])
         Path(filename).unlink()
+        self.requests_pending.set()
+        return request_id
+
+    async def _upload_chunks(
+        self, manifest: UploadManifest, request: RequestData
+    ) -> None:
+        """
+        Send a chunked upload, then queue its request for polling.
+
+        On failure the request and its manifest are dropped. When cancelled,
+        e.g. on shutdown, the manifest is kept to resume the upload later.
+        """
+        request_id = manifest["request_id"]
+        try:
+            await self.chunked_uploads.upload(manifest)
+        except Exception:
+            self.active_requests.pop(request_id, None)
+            self.user_stats.dropped(request["user_id"], request_id)
+            self.chunked_uploads.store.delete(request_id)
+            raise
+        request["submitted_at"] = time.time()
+        request["status"] = "pending"
+        self.requests_pending.set()
+
+    def _resume_uploads(self, user_id: str | None = None) -> None:
+        """
+        Restart chunked uploads interrupted by a restart, once the key is known.
+
+        Every upload is restarted when no user is given.
+        """
+        for manifest in self.chunked_uploads.store.all():
+            request_id = manifest["request_id"]
+            if (
+                user_id not in (None, manifest["request"].get("user_id"))
+                or request_id in self.active_requests
+            ):
+                continue
+
+            if not Path(manifest["file_path"]).exists():
+                logger.warning(f"Dropping upload {request_id}, its file is gone")
+                self.chunked_uploads.store.delete(request_id)
+                continue
+
+            logger.info(f"Resuming upload {request_id}")
+            asyncio.create_task(self._resume_upload(manifest))
+
+    async def _resume_upload(self, manifest: UploadManifest) -> None:
+        request_id = manifest["request_id"]
+        request: RequestData = manifest["request"]  # type: ignore[assignment]
+        # Batches don't survive restarts, the result is reported on its own.
+        request.pop("batched", None)
+        request["status"] = "uploading"
+        self.active_requests[request_id] = request
+        self.user_stats.submitted(
+            request["user_id"],
+            request_id,
+            request["channel_id"],
+            request.get("filename"),
+            request.get("submitted_at"),
+        )
+
+        priority = Priority(request.get("priority", Priority.INTERACTIVE))
+        owner = (
+            request["user_id"]
+            if priority == Priority.INTERACTIVE
+            else request["channel_id"]
+        )
+        try:
+            await self.upload_scheduler.run(
+                priority,
+                owner,
+                functools.partial(self._upload_chunks, manifest, request),
+            )
+        except Exception:
+            # Dropped along with its manifest. Cancelled uploads keep both.
+            logger.warning(f"Could not resume upload {request_id}", exc_info=True)
+        Path(manifest["file_path"]).unlink(missing_ok=True)
 
     async def poll_results(self) -> None:
         """
         Poll for analysis results and notify when complete.
         """
         while True:
+            self.requests_pending.clear()
             for request_id in self.active_requests.keys():
                 request: RequestData | None = self.active_requests.get(request_id)
                 if request and request.get("status") == "pending":
-                    rd_client: RealityDefender | None = self.active_users.get(
-                        request["user_id"]
-                    )
+                    rd_client = self._rd_client(request["user_id"])
                     if rd_client:
                         request["status"] = "processing"
+                        asyncio.create_task(
+                            self._poll_request(rd_client, request_id, request)
+                        )
+
+            logger.debug(f"Scheduler wait times: {self.scheduler_stats()}")
+            logger.debug(f"Media workers: {self.media_workers.stats()}")
+            if self.key_pool:
+                logger.debug(f"Shared API keys: {self.key_pool.stats()}")
+            logger.debug(f"Channel access: {self.delivery.access.stats()}")
+            if self.estimator.dirty:
+                logger.debug(f"Completion estimates: {self.estimator.stats()}")
+                await asyncio.to_thread(self.estimator.save)
+            try:
+                await asyncio.wait_for(self.requests_pending.wait(), 5)
+            except asyncio.TimeoutError:
+                pass
 
-                        async def analysis() -> None:
-                            """
-                            Run analysis and wait for completion.
-                            """
-                            result = await rd_client.get_result(
-                                request_id, max_attempts=60
-                            )
+    def scheduler_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Wait-time statistics per priority class for uploads and polls."""
+        return {
+            "upload": self.upload_scheduler.stats(),
+            "poll": self.poll_scheduler.stats(),
+        }
+
+    async def _poll_request(
+        self, rd_client: RDClient, request_id: str, request: RequestData
+    ) -> None:
+        """
+        Wait for the result of a single request and notify when complete.
+        """
+        priority = Priority(request.get("priority", Priority.INTERACTIVE))
+        owner = (
+            request["user_id"]
+            if priority == Priority.INTERACTIVE
+            else request["channel_id"]
+        )
+
+        root = self.tracer.get(request_id)
+        # Time spent waiting for the polling loop to pick the request up.
+        self.tracer.start_span(
+            root, "wait_for_poll", start=request.get("submitted_at")
+        ).end()
+        span = self.tracer.start_span(root, "poll")
 
-                            await self._notify_analysis_complete(result, request_id)
+        # Check for the first time around when the analysis should be done.
+        submitted_at = request.get("submitted_at") or time.time()
+        expected = request.get("expected_seconds")
+        if expected is not None:
+            span.set("poll.expected_seconds", round(expected, 3))
+            await asyncio.sleep(max(submitted_at + expected - time.time(), 0))
+        # Checks around the expected time are closer together, so a
+        # slightly early first check doesn't cost a whole interval.
+        interval = self.config.poll_interval_seconds
+        if expected is not None:
+            interval /= 2
+        # When the result was last fetched, and last seen unfinished. Had it
+        # been checked before, it would have been one interval earlier.
+        checked_at = submitted_at
+        unfinished_at = max(submitted_at, time.time() - interval)
 
-                        asyncio.create_task(analysis())
+        result: Any = None
+        attempts = 0
+        while attempts < self.config.poll_max_attempts:
+            try:
+                result = await self.poll_scheduler.run(
+                    priority,
+                    owner,
+                    lambda: self._call_rd(
+                        "result", lambda: self._get_result(rd_client, request_id)
+                    ),
+                )
+                checked_at = time.time()
+            except CircuitOpenError as e:
+                # Wait for the breaker instead of burning through attempts.
+                await asyncio.sleep(e.retry_after or self.config.poll_interval_seconds)
+                continue
+            except Exception:
+                logger.warning(f"Error polling result for {request_id}", exc_info=True)
 
-            await asyncio.sleep(5)
+            attempts += 1
+            if result and result.get("status") not in IN_PROGRESS_STATUSES:
+                break
+            unfinished_at = checked_at
+            await asyncio.sleep(interval)
+            interval = self.config.poll_interval_seconds
+
+        if (
+            expected is not None
+            and result
+            and result.get("status") not in IN_PROGRESS_STATUSES
+        ):
+            # It finished somewhere between the last two checks.
+            actual = (unfinished_at + checked_at) / 2 - submitted_at
+            span.set("poll.actual_seconds", round(actual, 3))
+            self.estimator.observe(
+                request.get("filetype"), request.get("size", 0), actual, expected
+            )
+
+        span.set("poll.attempts", attempts)
+        span.end()
+        await self._notify_analysis_complete(
+            result or {"status": "UNKNOWN"}, request_id
+        )
+
+    async def _get_result(self, rd_client: RDClient, request_id: str) -> Any:
+        """
+        Fetch the result of a request once.
+
+        Reality Defender answers `not_found` until a result is ready. That is
+        an analysis in progress, not a failure, so it is neither retried nor
+        held against the result breaker.
+        """
+        try:
+            return await rd_client.get_result(request_id, max_attempts=1)
+        except RealityDefenderError as e:
+            if e.code != "not_found":
+                raise
+            return {"status": "ANALYZING"}
+
+    async def _call_rd(self, endpoint: str, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call Reality Defender through the endpoint's circuit breaker, retrying
+        transient failures.
+
+        Args:
+            endpoint: endpoint class, either "upload" or "result"
+            work: factory for the SDK call
+        """
+        return await retry_with_backoff(
+            work,
+            attempts=self.config.retry_attempts,
+            breaker=self.breakers[endpoint],
+        )
 
     async def _notify_analysis_complete(self, result: Any, request_id: str) -> None:
         """
@@ -268,8 +1642,11 @@ class App:
             request_id: Analysis ID
         """
         logger.debug(
-            f"Notifying analysis complete for {request_id}: {json.dumps(result, indent=2)}"
+            "Notifying analysis complete for %s: %s", request_id, LazyJson(result)
         )
+        root = self.tracer.detach(request_id)
+        root.set("verdict", result.get("status", "UNKNOWN"))
+        span = self.tracer.start_span(root, "notify")
         try:
             req_data: RequestData | None = self.active_requests.pop(request_id, None)
             if not req_data:
@@ -279,22 +1656,46 @@ class App:
             user_id: str = req_data["user_id"]
             message_ts: str = req_data["message_ts"]
 
+            # A thumbnail's verdict is only preliminary, so it isn't recorded
+            # as an analysis of the file.
+            preview_of = req_data.get("preview_of")
+            if preview_of:
+                self.user_stats.dropped(user_id, request_id)
+                await self._notify_preview_complete(
+                    req_data, request_id, result, preview_of
+                )
+                span.set("preview", True)
+                return
+
+            for key in (req_data.get("media_key"), req_data.get("content_key")):
+                if key:
+                    self.known_media.add(key, result.get("status", "UNKNOWN"))
+            await self._record_history(req_data, request_id, result)
+            if req_data.get("priority") == Priority.BULK:
+                await self._record_scan_verdict(
+                    req_data, result.get("status", "UNKNOWN")
+                )
+            self.user_stats.completed(
+                user_id,
+                request_id,
+                channel_id,
+                result.get("status", "UNKNOWN"),
+                result.get("score"),
+            )
+
+            # Results for multi-file messages are posted together once the
+            # batch is done, unless the batch has already timed out.
+            if req_data.get("batched") and await self.batches.record(
+                (channel_id, message_ts), request_id, result
+            ):
+                return
+
             # Format results
             confidence_score: float = result.get("score") or 0.0
             status: str = result.get("status", "UNKNOWN")
 
             # Create a result message
-            if status == "MANIPULATED":
-                status_emoji = "⚠️"
-                status_text = "MANIPULATED CONTENT DETECTED"
-            elif status == "AUTHENTIC":
-                status_emoji = "✅"
-                status_text = "Content appears authentic"
-            else:
-                status_emoji = "❓"
-                status_text = (
-                    "Could not determine content authenticity. Please try again later."
-                )
+            status_emoji, status_text = describe_verdict(status)
 
             message = f"""{status_emoji} **Analysis Complete** - ID: `{request_id}`
 <@{user_id}> Your content analysis is ready:
@@ -303,12 +1704,249 @@ class App:
             """.strip()
 
             # Send notification
-            await self.app.client.chat_postMessage(
-                channel=channel_id, text=message, thread_ts=message_ts
+            client = await self.workspaces.client(req_data.get("team_id"))
+            route = await self.delivery.post(
+                client, channel_id, user_id, message, thread_ts=message_ts
             )
+            span.set("route", route)
 
         except Exception as e:
+            span.end(error=str(e))
             logger.warning(
                 f"Error notifying analysis complete for {request_id}: {e}",
                 exc_info=True,
             )
+        finally:
+            span.end()
+            root.end()
+
+    async def _respond_history(
+        self,
+        respond: Any,
+        query: HistoryQuery,
+        text: str,
+        now: float,
+        cursor: str | None = None,
+    ) -> None:
+        """
+        Reply with a page of history, and a button for the next one.
+
+        Args:
+            respond: responder for the command or action
+            query: the filters
+            text: the command arguments, to fetch the next page with
+            now: when the first page was fetched, so days are counted the same
+            cursor: where the previous page ended
+        """
+        try:
+            entries, next_cursor = await self.history.query(query, cursor=cursor)
+        except Exception as e:
+            logger.warning(f"Error reading analysis history: {e}", exc_info=True)
+            await respond("❌ An error occurred while reading the history.")
+            return
+
+        next_page = None
+        if next_cursor:
+            next_page = dumps({"text": text, "now": now, "cursor": next_cursor})
+        await respond_analysis_history(
+            respond, entries, next_page, replace_original=cursor is not None
+        )
+
+    async def _send_export(
+        self,
+        client: Any,
+        user_id: str,
+        export_format: ExportFormat,
+        query: HistoryQuery,
+    ) -> None:
+        """
+        Export analyses to a file and send it to a user in a direct message.
+
+        The file is written from a thread as the history is read, so neither the
+        event loop nor memory use depend on how much there is to export.
+        """
+        directory = Path(self.config.state_dir) / "exports"
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = directory / f"analyses-{stamp}-{user_id}.{export_format}"
+
+        def export() -> int:
+            with open(path, "w", newline="", encoding="utf-8") as out:
+                return write_export(
+                    self.history.iter_entries(query), out, export_format
+                )
+
+        try:
+            count = await asyncio.to_thread(export)
+            dm = await client.conversations_open(users=user_id)
+            await client.files_upload_v2(
+                channel=dm["channel"]["id"],
+                file=str(path),
+                filename=path.name,
+                initial_comment=f"Analyses exported: {count}",
+            )
+        finally:
+            path.unlink(missing_ok=True)
+
+    async def _record_history(
+        self, req_data: RequestData, request_id: str, result: Any
+    ) -> None:
+        """Add a completed analysis to the history, never failing the caller."""
+        try:
+            await self.history.record(
+                request_id,
+                req_data["user_id"],
+                req_data["channel_id"],
+                req_data["message_ts"],
+                result.get("status", "UNKNOWN"),
+                score=result.get("score"),
+                filename=req_data.get("filename"),
+                team_id=req_data.get("team_id"),
+                submitted_at=req_data.get("submitted_at"),
+                media_key=req_data.get("media_key"),
+            )
+        except Exception as e:
+            logger.warning(f"Error recording history for {request_id}: {e}")
+
+    async def _notify_preview_complete(
+        self,
+        req_data: RequestData,
+        request_id: str,
+        result: Any,
+        plan: MediaPlan,
+    ) -> None:
+        """
+        Post the verdict from a file's thumbnail, and analyze the full file
+        straight away unless the thumbnail was found authentic. Users are
+        offered to analyze authentic files in full instead, as well as files
+        that can't be analyzed right now.
+        """
+        user_id = req_data["user_id"]
+        channel_id = req_data["channel_id"]
+        status: str = result.get("status", "UNKNOWN")
+        client = await self.workspaces.client(req_data.get("team_id"))
+        rd_client: RDClient | None = None
+        if status != "AUTHENTIC":
+            rd_client = await self._analysis_client(
+                client,
+                None,
+                user_id,
+                post=functools.partial(
+                    self.delivery.post,
+                    client,
+                    channel_id,
+                    user_id,
+                    thread_ts=req_data["message_ts"],
+                ),
+            )
+
+        full_analysis: str | None = None
+        if not rd_client:
+            full_analysis = dumps(
+                {
+                    "plan": plan,
+                    "channel_id": channel_id,
+                    "message_ts": req_data["message_ts"],
+                    "team_id": req_data.get("team_id"),
+                    # To show the verdict again without the button once used.
+                    "user_id": user_id,
+                    "request_id": request_id,
+                    "status": status,
+                    "score": result.get("score"),
+                }
+            )
+        else:
+            logger.info(f"Preview {request_id} is {status}, analyzing the full file")
+            asyncio.create_task(
+                self._analyze_full_file(
+                    rd_client,
+                    user_id,
+                    channel_id,
+                    req_data["message_ts"],
+                    plan,
+                    req_data.get("team_id"),
+                )
+            )
+
+        await notify_preview_complete(
+            client,
+            channel_id,
+            req_data["message_ts"],
+            user_id,
+            request_id,
+            status,
+            result.get("score"),
+            full_analysis=full_analysis,
+            post=functools.partial(self.delivery.post, client, user_id=user_id),
+        )
+
+    async def _analyze_full_file(
+        self,
+        rd_client: RDClient,
+        user_id: str,
+        channel_id: str,
+        message_ts: str,
+        plan: MediaPlan,
+        team_id: str | None,
+    ) -> None:
+        """
+        Analyze a file whose thumbnail was analyzed first, never failing.
+
+        The user was told the file is being analyzed, so they are told in the
+        message's thread if it can't be.
+        """
+        try:
+            await self._analyze_media(
+                rd_client,
+                user_id,
+                channel_id,
+                message_ts,
+                [plan],
+                priority=Priority.INTERACTIVE,
+                team_id=team_id,
+            )
+            return
+        except MediaRejectedError as e:
+            logger.info(f"Rejected full file {plan['name']}: {e}")
+            text = f"❌ The full file can't be analyzed: {e}"
+        except CircuitOpenError:
+            logger.warning(
+                f"Reality Defender unavailable, not analyzing {plan['name']}"
+            )
+            text = DEGRADED_MESSAGE
+        except Exception as e:
+            logger.warning(
+                f"Error analyzing {plan['name']} in full: {e}", exc_info=True
+            )
+            text = "❌ An error occurred while analyzing the full file."
+
+        try:
+            client = await self.workspaces.client(team_id)
+            await self.delivery.post(
+                client, channel_id, user_id, text, thread_ts=message_ts
+            )
+        except Exception:
+            logger.warning(
+                f"Error notifying {user_id} of the failed analysis", exc_info=True
+            )
+
+    async def _notify_batch_complete(
+        self, batch: AnalysisBatch, timed_out: bool
+    ) -> None:
+        """
+        Post a single summary for every file analyzed from one message.
+
+        Args:
+            batch: the finished (or timed out) batch
+            timed_out: whether some files are still being analyzed
+        """
+        client = await self.workspaces.client(batch.team_id)
+        await notify_batch_complete(
+            client,
+            batch.channel_id,
+            batch.message_ts,
+            batch.user_id,
+            [dict(entry) for entry in batch.entries.values()],
+            timed_out=timed_out,
+            post=functools.partial(self.delivery.post, client, user_id=batch.user_id),
+        )
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Channels opted in or out with `/auto-scan`, kept across restarts.
+AUTO_SCAN_FILENAME = "auto_scan.json"
+
+
+class TokenBucket:
+    """A simple token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(rate_per_minute, 1.0)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+
+    def take(self, tokens: float = 1.0) -> bool:
+        """
+        Consume `tokens` if available, without blocking.
+
+        More tokens than the bucket holds are taken once it is full, leaving it
+        in debt until refilled, so they aren't refused forever and the rate
+        still holds over time.
+        """
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+        if self.tokens < min(tokens, self.capacity):
+            return False
+        self.tokens -= tokens
+        return True
+
+
+class AutoScanPolicy:
+    """
+    Decides which messages are analyzed automatically.
+
+    Channels have to opt in, either through configuration or the `/auto-scan`
+    command. Opted-in messages are then sampled and rate limited per channel.
+    Channels opted in or out with the command are saved in `directory`, and
+    take precedence over the configuration.
+    """
+
+    def __init__(
+        self,
+        channels: Iterable[str] = (),
+        sample_rate: float = 1.0,
+        rate_per_minute: float = 10.0,
+        rng: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.monotonic,
+        directory: Optional[str] = None,
+    ):
+        self.channels: Set[str] = set(channels)
+        self.sample_rate = sample_rate
+        self.rate_per_minute = rate_per_minute
+        self.rng = rng
+        self.clock = clock
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.path = Path(directory) / AUTO_SCAN_FILENAME if directory else None
+        # Whether each channel was opted in or out with the command.
+        self.overrides: Dict[str, bool] = {}
+
+    def enable(self, channel_id: str) -> None:
+        self.channels.add(channel_id)
+        self.overrides[channel_id] = True
+        self.save()
+
+    def disable(self, channel_id: str) -> None:
+        self.channels.discard(channel_id)
+        self.buckets.pop(channel_id, None)
+        self.overrides[channel_id] = False
+        self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.overrides))
+        # Atomic, so a crash never leaves a half written file behind.
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """Pick up the channels opted in or out before a restart, if any."""
+        if not self.path:
+            return
+        try:
+            self.overrides = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Ignoring unreadable auto-scan channels in {self.path}")
+            return
+        for channel_id, enabled in self.overrides.items():
+            if enabled:
+                self.channels.add(channel_id)
+            else:
+                self.channels.discard(channel_id)
+
+    def is_enabled(self, channel_id: str) -> bool:
+        return channel_id in self.channels
+
+    def admit(self, channel_id: str, items: int = 1) -> bool:
+        """
+        Check whether `items` pieces of media from a channel should be analyzed.
+
+        Args:
+            channel_id: channel the media was shared in
+            items: number of files in the message, each one costs a token
+        """
+        if not self.is_enabled(channel_id):
+            return False
+
+        if self.sample_rate < 1.0 and self.rng() >= self.sample_rate:
+            return False
+
+        bucket = self.buckets.get(channel_id)
+        if not bucket:
+            bucket = self.buckets[channel_id] = TokenBucket(
+                self.rate_per_minute, clock=self.clock
+            )
+        if not bucket.take(items):
+            logger.debug(f"Auto-scan rate limit reached in {channel_id}")
+            return False
+        return True
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypedDict
+
+logger = logging.getLogger(__name__)
+
+BatchKey = Tuple[str, str]
+
+
+class BatchEntry(TypedDict):
+    request_id: str
+    filename: str
+    status: Optional[str]
+    score: Optional[float]
+
+
+class AnalysisBatch:
+    """All analyses started from a single shortcut on a single message."""
+
+    def __init__(
+        self,
+        channel_id: str,
+        message_ts: str,
+        user_id: str,
+        expected: int,
+        team_id: Optional[str] = None,
+    ):
+        self.channel_id = channel_id
+        self.message_ts = message_ts
+        self.user_id = user_id
+        self.team_id = team_id
+        self.expected = expected
+        self.entries: Dict[str, BatchEntry] = {}
+        self.created_at = time.monotonic()
+
+    @property
+    def key(self) -> BatchKey:
+        return self.channel_id, self.message_ts
+
+    @property
+    def completed(self) -> int:
+        return sum(1 for entry in self.entries.values() if entry["status"] is not None)
+
+    @property
+    def is_complete(self) -> bool:
+        return len(self.entries) >= self.expected and self.completed >= self.expected
+
+
+FlushCallback = Callable[[AnalysisBatch, bool], Awaitable[None]]
+
+
+class BatchTracker:
+    """
+    Groups analyses from the same `(channel_id, message_ts)` shortcut.
+
+    A batch is flushed through `on_flush` exactly once, either when every file
+    has a result or when `timeout` seconds have passed since it was opened.
+    """
+
+    def __init__(self, on_flush: FlushCallback, timeout: float = 300.0):
+        self.on_flush = on_flush
+        self.timeout = timeout
+        self.batches: Dict[BatchKey, AnalysisBatch] = {}
+        self._timers: Dict[BatchKey, asyncio.Task] = {}
+
+    def open(
+        self,
+        channel_id: str,
+        message_ts: str,
+        user_id: str,
+        expected: int,
+        team_id: Optional[str] = None,
+    ) -> BatchKey:
+        """
+        Open a batch, or join the one already open for the same message.
+
+        Args:
+            channel_id: channel the message was posted in
+            message_ts: timestamp of the analyzed message
+            user_id: user who ran the shortcut
+            expected: number of files that will be attached to the batch
+            team_id: workspace of the channel, when serving several
+        """
+        key: BatchKey = (channel_id, message_ts)
+        batch = self.batches.get(key)
+        if batch:
+            batch.expected += expected
+            return key
+
+        self.batches[key] = AnalysisBatch(
+            channel_id, message_ts, user_id, expected, team_id
+        )
+        self._timers[key] = asyncio.create_task(self._expire(key))
+        return key
+
+    def attach(self, key: BatchKey, request_id: str, filename: str) -> None:
+        """Attach an uploaded request to its batch."""
+        batch = self.batches.get(key)
+        if batch:
+            batch.entries[request_id] = {
+                "request_id": request_id,
+                "filename": filename,
+                "status": None,
+                "score": None,
+            }
+
+    async def seal(self, key: BatchKey) -> None:
+        """
+        Stop waiting for files that were never uploaded.
+
+        Used when the shortcut fails part way through, so the batch completes
+        with whatever was attached so far.
+        """
+        batch = self.batches.get(key)
+        if not batch:
+            return
+
+        batch.expected = len(batch.entries)
+        if batch.expected == 0:
+            self._close(key)
+        elif batch.is_complete:
+            await self._flush(key, timed_out=False)
+
+    async def record(self, key: BatchKey, request_id: str, result: dict) -> bool:
+        """
+        Record a finished analysis.
+
+        Returns:
+            False if the request doesn't belong to an open batch, in which case
+            the caller is responsible for notifying on its own.
+        """
+        batch = self.batches.get(key)
+        if not batch or request_id not in batch.entries:
+            return False
+
+        entry = batch.entries[request_id]
+        entry["status"] = result.get("status") or "UNKNOWN"
+        entry["score"] = result.get("score")
+
+        if batch.is_complete:
+            await self._flush(key, timed_out=False)
+        return True
+
+    async def _expire(self, key: BatchKey) -> None:
+        await asyncio.sleep(self.timeout)
+        # Drop our own reference first so _close doesn't cancel this task.
+        self._timers.pop(key, None)
+        if key in self.batches:
+            logger.info(f"Batch {key} timed out, flushing partial results")
+            await self._flush(key, timed_out=True)
+
+    async def _flush(self, key: BatchKey, timed_out: bool) -> None:
+        batch = self._close(key)
+        if not batch:
+            return
+        try:
+            await self.on_flush(batch, timed_out)
+        except Exception:
+            logger.warning(f"Error flushing batch {key}", exc_info=True)
+
+    def _close(self, key: BatchKey) -> Optional[AnalysisBatch]:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        return self.batches.pop(key, None)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Tuple, TypeVar
+
+from realitydefender import RealityDefenderError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Errors caused by the request itself rather than the health of the API. They
+# are neither retried nor held against the breaker.
+CLIENT_ERROR_CODES = frozenset(
+    {"unauthorized", "invalid_request", "invalid_file", "file_too_large"}
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def is_client_error(error: BaseException) -> bool:
+    return isinstance(error, RealityDefenderError) and error.code in CLIENT_ERROR_CODES
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a rolling window of calls to one endpoint class.
+
+    The breaker opens when, over the last `window` calls (and at least
+    `min_calls`), the share of failures or of calls slower than
+    `latency_threshold` reaches `failure_rate`. After `reset_timeout` seconds a
+    single probe call is let through (half-open); its outcome closes the
+    breaker again or re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        latency_threshold: float | None = None,
+        window: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.latency_threshold = latency_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        # (failed, slow) for each recent call.
+        self.calls: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._probing = False
+
+    @property
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected."""
+        if self.state == OPEN:
+            return self.retry_after > 0
+        return self.state == HALF_OPEN and self._probing
+
+    def allow(self) -> bool:
+        """Check whether a call may go through, claiming the probe if half-open."""
+        if self.state == OPEN and self.retry_after <= 0:
+            self._transition(HALF_OPEN)
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self, latency: float) -> None:
+        slow = self.latency_threshold is not None and latency > self.latency_threshold
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self._transition(OPEN if slow else CLOSED)
+            return
+        self._record(failed=False, slow=slow)
+
+    def record_failure(self) -> None:
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self._transition(OPEN)
+            return
+        self._record(failed=True, slow=False)
+
+    async def call(self, work: Callable[[], Awaitable[T]]) -> T:
+        """Run `work` through the breaker."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after)
+
+        started = self.clock()
+        try:
+            result = await work()
+        except BaseException as e:
+            if is_client_error(e) or isinstance(e, asyncio.CancelledError):
+                # Not the endpoint's fault, release the probe if we held it.
+                if self.state == HALF_OPEN:
+                    self._probing = False
+            else:
+                self.record_failure()
+            raise
+
+        self.record_success(self.clock() - started)
+        return result
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        self.calls.append((failed, slow))
+        if self.state != CLOSED or len(self.calls) < self.min_calls:
+            return
+
+        bad = sum(1 for failed, slow in self.calls if failed or slow)
+        if bad / len(self.calls) >= self.failure_rate:
+            self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            if state == OPEN:
+                self.opened_at = self.clock()
+            return
+
+        logger.warning(f"Circuit '{self.name}' {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self.opened_at = self.clock()
+        elif state == CLOSED:
+            self.calls.clear()
+
+
+async def retry_with_backoff(
+    work: Callable[[], Awaitable[T]],
+    attempts: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+    breaker: CircuitBreaker | None = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    rng: Callable[[], float] = random.random,
+) -> T:
+    """
+    Run `work`, retrying server-side failures with full-jitter backoff.
+
+    Retries adapt to the breaker: once it stops being closed there is no point
+    in trying again, so the error is raised straight away.
+
+    Args:
+        work: factory for the coroutine to run
+        attempts: maximum number of calls, including the first one
+        base_delay: backoff before the second call, doubled after each failure
+        max_delay: upper bound for a single backoff
+        breaker: breaker guarding the endpoint, if any
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if breaker:
+                return await breaker.call(work)
+            return await work()
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if (
+                attempt >= attempts
+                or is_client_error(e)
+                or (breaker and breaker.state != CLOSED)
+            ):
+                raise
+
+            delay = rng() * min(max_delay, base_delay * 2 ** (attempt - 1))
+            logger.info(
+                f"Retrying after error ({e}), attempt {attempt + 1} in {delay:.2f}s"
+            )
+            await sleep(delay)
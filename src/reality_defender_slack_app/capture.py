@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    TypedDict,
+)
+
+from reality_defender_slack_app.performance import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "[redacted]"
+
+# Events captured besides shortcuts and commands.
+CAPTURED_EVENTS = frozenset({"app_home_opened"})
+
+# Fields that hold credentials, wherever they appear in a payload.
+SECRET_FIELDS = frozenset(
+    {"token", "api_key", "access_token", "bot_token", "app_token", "user_token"}
+)
+
+# Commands whose text is a credential, such as a Reality Defender API key.
+SECRET_COMMANDS = frozenset({"/setup-rd"})
+
+_SLACK_TOKEN = re.compile(r"\b(?:xox[a-z]|xapp)-[A-Za-z0-9-]+")
+# Anyone holding a response URL can post as the app for half an hour.
+_RESPONSE_URL = re.compile(r"^(https://hooks\.slack\.com/[a-z]+/).+$")
+
+
+class CapturedRequest(TypedDict):
+    # When the request was received, as a Unix time.
+    t: float
+    # "shortcut", "command" or the event type.
+    kind: str
+    body: Dict[str, Any]
+
+
+def capture_kind(body: Dict[str, Any]) -> Optional[str]:
+    """What kind of captured request a Slack payload is, None if not captured."""
+    if body.get("command"):
+        return "command"
+    if body.get("type") in ("shortcut", "message_action"):
+        return "shortcut"
+    if body.get("type") == "event_callback":
+        event_type = body.get("event", {}).get("type")
+        if event_type in CAPTURED_EVENTS:
+            return str(event_type)
+    return None
+
+
+def scrub(value: Any) -> Any:
+    """
+    A copy of a payload without credentials: tokens, API keys, response URLs
+    and the text of commands that register a key.
+    """
+    if isinstance(value, dict):
+        scrubbed = {
+            key: REDACTED if key in SECRET_FIELDS else scrub(item)
+            for key, item in value.items()
+        }
+        if scrubbed.get("command") in SECRET_COMMANDS and "text" in scrubbed:
+            scrubbed["text"] = REDACTED
+        return scrubbed
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    if isinstance(value, str):
+        return _RESPONSE_URL.sub(r"\1" + REDACTED, _SLACK_TOKEN.sub(REDACTED, value))
+    return value
+
+
+class TrafficRecorder:
+    """
+    Records the shortcuts, commands and App Home openings the app receives,
+    to replay them later.
+
+    Each request is appended to a JSONL file as it arrives, scrubbed of
+    credentials, with the time it was received. It is installed as a Bolt
+    middleware, ahead of every listener.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.clock = clock
+        self.recorded = 0
+        self._file: Optional[IO[str]] = None
+
+    def record(self, body: Dict[str, Any]) -> bool:
+        """
+        Append a request to the capture, if it is of a kind captured.
+
+        Returns:
+            whether the request was recorded
+        """
+        kind = capture_kind(body)
+        if not kind:
+            return False
+        captured: CapturedRequest = {
+            "t": round(self.clock(), 3),
+            "kind": kind,
+            "body": scrub(body),
+        }
+        if not self._file:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(dumps(captured) + "\n")
+        self._file.flush()
+        self.recorded += 1
+        return True
+
+    async def middleware(self, body: Dict[str, Any], next: Callable[[], Any]) -> Any:
+        try:
+            self.record(body)
+        except Exception:
+            # Capturing traffic must never get in the way of serving it.
+            logger.warning("Could not capture a request", exc_info=True)
+        return await next()
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    """Read captured requests back, in the order they were received."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+async def replay(
+    requests: Iterable[CapturedRequest],
+    dispatch: Callable[[Dict[str, Any]], Awaitable[Any]],
+    speed: float = 1.0,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+) -> list[asyncio.Task]:
+    """
+    Feed captured requests back in, keeping the gaps between them.
+
+    Each request is dispatched on its own task, so a slow one doesn't delay
+    the next.
+
+    Args:
+        requests: captured requests, in the order they were received
+        dispatch: handles the body of a request
+        speed: multiple of the original pace, 0 to send everything at once
+
+    Returns:
+        the dispatch task of each request
+    """
+    tasks: list[asyncio.Task] = []
+    first: Optional[float] = None
+    start = clock()
+    for request in requests:
+        if first is None:
+            first = request["t"]
+        if speed:
+            delay = (request["t"] - first) / speed - (clock() - start)
+            if delay > 0:
+                await sleep(delay)
+        tasks.append(asyncio.ensure_future(dispatch(request["body"])))
+    return tasks
@@ -1,20 +1,22 @@
 import os
 import logging
-from pydantic import BaseModel, Field
+from typing import Literal
+from pydantic import BaseModel, Field, model_validator
 
+from reality_defender_slack_app.performance import PerformanceProfile
 
 from dotenv import load_dotenv
 
-load_dotenv()
-
 
 class Config(BaseModel):
     """Configuration management for the Slack bot."""
 
     # Slack configuration
     slack_bot_token: str = Field(
+        "",
         alias="SLACK_BOT_TOKEN",
-        description="Token for the Slack bot user.",
+        description="Token for the Slack bot user. Not used when serving several "
+        "workspaces from an installation store.",
     )
 
     slack_app_token: str = Field(
@@ -22,12 +24,351 @@ class Config(BaseModel):
         description="Token for the Slack app.",
     )
 
+    slack_installation_dir: str = Field(
+        "",
+        alias="SLACK_INSTALLATION_DIR",
+        description="Directory of the Slack installation store. When set, every "
+        "workspace installed there is served, each with its own bot token.",
+    )
+
+    team_concurrency: int = Field(
+        0,
+        alias="TEAM_CONCURRENCY",
+        ge=0,
+        description="Maximum number of files uploaded at once for a single "
+        "workspace, 0 for no limit besides UPLOAD_CONCURRENCY.",
+    )
+
+    # Reality Defender configuration
+    rd_api_keys: str = Field(
+        "",
+        alias="RD_API_KEYS",
+        description="Comma-separated organisation API keys shared by every user. "
+        "When set, users don't register keys of their own.",
+    )
+
+    rd_key_rate_limit: float = Field(
+        0,
+        alias="RD_KEY_RATE_LIMIT",
+        ge=0,
+        description="Maximum uploads per minute for each shared API key, 0 for no "
+        "limit.",
+    )
+
+    rd_key_cooldown_seconds: float = Field(
+        300.0,
+        alias="RD_KEY_COOLDOWN_SECONDS",
+        gt=0,
+        description="How long a shared API key that ran out of quota is left unused.",
+    )
+
     # Application configuration
     log_level: str = Field("INFO", alias="LOG_LEVEL", description="Current log level")
 
+    # Analysis configuration
+    batch_timeout_seconds: float = Field(
+        300.0,
+        alias="BATCH_TIMEOUT_SECONDS",
+        description="How long to wait for every file of a multi-file message before "
+        "posting a partial summary.",
+    )
+
+    upload_concurrency: int = Field(
+        4,
+        alias="UPLOAD_CONCURRENCY",
+        gt=0,
+        description="Maximum number of files downloaded and uploaded at once.",
+    )
+
+    poll_concurrency: int = Field(
+        32,
+        alias="POLL_CONCURRENCY",
+        gt=0,
+        description="Maximum number of analysis results polled at once.",
+    )
+
+    poll_interval_seconds: float = Field(
+        2.0,
+        alias="POLL_INTERVAL_SECONDS",
+        gt=0.0,
+        description="Time between two checks of the same analysis result.",
+    )
+
+    poll_max_attempts: int = Field(
+        60,
+        alias="POLL_MAX_ATTEMPTS",
+        gt=0,
+        description="Maximum number of checks of an analysis result.",
+    )
+
+    estimate_smoothing: float = Field(
+        0.2,
+        alias="ESTIMATE_SMOOTHING",
+        gt=0.0,
+        le=1.0,
+        description="Weight of the latest completed analysis in the expected "
+        "analysis time, which decides when a result is first checked.",
+    )
+
+    # Media preprocessing
+    image_max_dimension: int = Field(
+        0,
+        alias="IMAGE_MAX_DIMENSION",
+        ge=0,
+        description="Downsample larger images to this many pixels per side before "
+        "uploading them, 0 disables it. Values under 1024 are raised to 1024. "
+        "Requires the `images` extra.",
+    )
+
+    media_workers: int = Field(
+        0,
+        alias="MEDIA_WORKERS",
+        ge=0,
+        description="Number of workers for CPU-bound media processing, 0 uses one "
+        "per CPU core.",
+    )
+
+    media_worker_mode: Literal["process", "thread"] = Field(
+        "process",
+        alias="MEDIA_WORKER_MODE",
+        description="Whether media is processed in worker processes, which can use "
+        "every core, or in threads.",
+    )
+
+    # Large uploads
+    chunked_upload_threshold_mb: int = Field(
+        0,
+        alias="CHUNKED_UPLOAD_THRESHOLD_MB",
+        ge=0,
+        description="Upload files of at least this many MB in resumable chunks, 0 "
+        "disables it. Requires an upload endpoint that accepts resumable "
+        "`Content-Range` uploads.",
+    )
+
+    upload_chunk_size_mb: int = Field(
+        8,
+        alias="UPLOAD_CHUNK_SIZE_MB",
+        gt=0,
+        description="Size of each chunk of a chunked upload.",
+    )
+
+    triage_threshold_mb: int = Field(
+        0,
+        alias="TRIAGE_THRESHOLD_MB",
+        ge=0,
+        description="When a single file of at least this many MB is analyzed with "
+        "the shortcut, analyze its Slack thumbnail first. The full file is "
+        "analyzed when the preview isn't found authentic, or when asked for. "
+        "0 disables it.",
+    )
+
+    # Reality Defender API resilience
+    retry_attempts: int = Field(
+        3,
+        alias="RETRY_ATTEMPTS",
+        gt=0,
+        description="Maximum number of calls for a single Reality Defender request.",
+    )
+
+    breaker_failure_rate: float = Field(
+        0.5,
+        alias="BREAKER_FAILURE_RATE",
+        gt=0.0,
+        le=1.0,
+        description="Share of failed or slow calls that opens a circuit breaker.",
+    )
+
+    breaker_upload_latency: float = Field(
+        120.0,
+        alias="BREAKER_UPLOAD_LATENCY",
+        gt=0.0,
+        description="Uploads slower than this many seconds count against the breaker.",
+    )
+
+    breaker_result_latency: float = Field(
+        10.0,
+        alias="BREAKER_RESULT_LATENCY",
+        gt=0.0,
+        description="Result checks slower than this many seconds count against the "
+        "breaker.",
+    )
+
+    breaker_reset_seconds: float = Field(
+        30.0,
+        alias="BREAKER_RESET_SECONDS",
+        gt=0.0,
+        description="How long an open breaker waits before probing the API again.",
+    )
+
+    # Auto-scan configuration
+    auto_scan_channels: str = Field(
+        "",
+        alias="AUTO_SCAN_CHANNELS",
+        description="Comma separated IDs of channels where shared media is analyzed "
+        "automatically.",
+    )
+
+    auto_scan_sample_rate: float = Field(
+        1.0,
+        alias="AUTO_SCAN_SAMPLE_RATE",
+        ge=0.0,
+        le=1.0,
+        description="Fraction of eligible messages that are analyzed automatically.",
+    )
+
+    auto_scan_rate_limit: float = Field(
+        10.0,
+        alias="AUTO_SCAN_RATE_LIMIT",
+        gt=0.0,
+        description="Maximum number of files analyzed automatically per channel and "
+        "minute.",
+    )
+
+    auto_scan_queue_size: int = Field(
+        100,
+        alias="AUTO_SCAN_QUEUE_SIZE",
+        gt=0,
+        description="Maximum number of auto-scan messages waiting for analysis.",
+    )
+
+    # Channel scan configuration
+    scan_max_days: int = Field(
+        90,
+        alias="SCAN_MAX_DAYS",
+        gt=0,
+        description="How far back /scan-channel is allowed to look.",
+    )
+
+    known_media_cache_size: int = Field(
+        10000,
+        alias="KNOWN_MEDIA_CACHE_SIZE",
+        gt=0,
+        description="Number of analyzed media items remembered to avoid duplicate work.",
+    )
+
+    state_dir: str = Field(
+        "./state",
+        alias="STATE_DIR",
+        description="Directory where state that must survive restarts is kept.",
+    )
+
+    history_max_rows: int = Field(
+        1000000,
+        alias="HISTORY_MAX_ROWS",
+        gt=0,
+        description="Number of completed analyses kept for /analysis-history.",
+    )
+
+    admin_users: str = Field(
+        "",
+        alias="ADMIN_USERS",
+        description="Comma-separated Slack user IDs allowed to run /analysis-export.",
+    )
+
+    trace_file: str = Field(
+        "",
+        alias="TRACE_FILE",
+        description="File to append analysis traces to, as JSON lines.",
+    )
+
+    trace_collector_url: str = Field(
+        "",
+        alias="TRACE_COLLECTOR_URL",
+        description="OTLP/HTTP endpoint to send analysis traces to, instead of a file.",
+    )
+
+    trace_sample_rate: float = Field(
+        1.0,
+        alias="TRACE_SAMPLE_RATE",
+        ge=0.0,
+        le=1.0,
+        description="Fraction of analyses traced, when tracing is enabled.",
+    )
+
+    capture_file: str = Field(
+        "",
+        alias="CAPTURE_FILE",
+        description="JSONL file to record incoming shortcuts, commands and App Home "
+        "openings to, scrubbed of tokens and API keys, for replay.",
+    )
+
+    health_port: int = Field(
+        0,
+        alias="HEALTH_PORT",
+        ge=0,
+        le=65535,
+        description="Port for the health, readiness and queue endpoints, 0 to disable.",
+    )
+
+    health_host: str = Field(
+        "0.0.0.0",
+        alias="HEALTH_HOST",
+        description="Address the health endpoints listen on.",
+    )
+
+    health_max_loop_lag: float = Field(
+        1.0,
+        alias="HEALTH_MAX_LOOP_LAG",
+        gt=0,
+        description="Event loop lag, in seconds, past which liveness fails.",
+    )
+
+    warmup_timeout: float = Field(
+        10.0,
+        alias="WARMUP_TIMEOUT",
+        ge=0,
+        description="How long to spend connecting to Slack and Reality Defender "
+        "before reporting ready, 0 to connect on first use instead.",
+    )
+
+    channel_access_ttl: float = Field(
+        3600.0,
+        alias="CHANNEL_ACCESS_TTL",
+        gt=0,
+        description="How long to remember how results can be delivered for a "
+        "channel, in seconds, unless the bot joins or leaves it sooner.",
+    )
+
+    key_validation_ttl: float = Field(
+        3600.0,
+        alias="KEY_VALIDATION_TTL",
+        ge=0,
+        description="How long the outcome of checking a key registered with "
+        "/setup-rd is trusted, in seconds, 0 to accept keys unchecked.",
+    )
+
+    performance_profile: PerformanceProfile = Field(
+        "standard",
+        alias="PERFORMANCE_PROFILE",
+        description="`fast` runs on uvloop and serializes with orjson, when installed.",
+    )
+
+    @model_validator(mode="after")
+    def check_slack_credentials(self) -> "Config":
+        if not self.slack_bot_token and not self.slack_installation_dir:
+            raise ValueError(
+                "Either SLACK_BOT_TOKEN or SLACK_INSTALLATION_DIR is required"
+            )
+        return self
+
+    @property
+    def auto_scan_channel_ids(self) -> list[str]:
+        return [c.strip() for c in self.auto_scan_channels.split(",") if c.strip()]
+
+    @property
+    def admin_user_ids(self) -> list[str]:
+        return [u.strip() for u in self.admin_users.split(",") if u.strip()]
+
+    @property
+    def rd_api_key_list(self) -> list[str]:
+        return [k.strip() for k in self.rd_api_keys.split(",") if k.strip()]
+
 
 def load_config(env: dict[str, str] | None = None) -> Config:
-    env = env or dict(os.environ)
+    if not env:
+        # Only read .env when configuring from the environment, not on import.
+        load_dotenv()
+        env = dict(os.environ)
 
     return Config.model_validate(env)
 
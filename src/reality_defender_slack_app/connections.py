@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    import requests
+    from realitydefender import RealityDefender
+
+logger = logging.getLogger(__name__)
+
+# Where Slack serves the files shared in it.
+SLACK_FILES_URL = "https://files.slack.com/"
+
+
+def create_session(limit: int = 100) -> aiohttp.ClientSession:
+    """
+    An HTTP session whose connections are kept open and shared by every call.
+
+    DNS answers are cached for five minutes rather than aiohttp's ten seconds.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit, ttl_dns_cache=300)
+    )
+
+
+def create_download_session(pool_size: int = 10) -> requests.Session:
+    """
+    A session for downloading media on threads, keeping up to `pool_size`
+    connections open per host.
+    """
+    # Only needed once media is downloaded, so not imported at startup.
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+async def open_connection(session: aiohttp.ClientSession, url: str) -> None:
+    """
+    Connect to a host, and leave the connection in the session's pool.
+
+    Any answer will do, all that matters is the DNS lookup and TLS handshake.
+    A GET rather than a HEAD: aiohttp closes the connection after a HEAD
+    answered without a Content-Length.
+    """
+    async with session.get(url, allow_redirects=False) as response:
+        await response.read()
+
+
+async def open_rd_connection(client: RealityDefender) -> None:
+    """Connect a Reality Defender client to its API."""
+    session = await client.client.ensure_session()
+    await open_connection(session, client.client.base_url)
+
+
+async def warm_up(
+    connections: Dict[str, Awaitable[Any]], timeout: float
+) -> Dict[str, Optional[float]]:
+    """
+    Open connections concurrently, waiting at most `timeout` seconds in all.
+
+    Returns:
+        how long each connection took, None for those that failed
+    """
+
+    async def timed(name: str, connect: Awaitable[Any]) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            await connect
+        except Exception as e:
+            logger.warning(f"Could not connect to {name} ahead of time: {e!r}")
+            return None
+        return time.perf_counter() - start
+
+    tasks = {
+        name: asyncio.ensure_future(timed(name, connect))
+        for name, connect in connections.items()
+    }
+    if tasks:
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for name, task in tasks.items():
+            if task in pending:
+                logger.warning(f"Connecting to {name} took over {timeout}s")
+    return {
+        name: None if task.cancelled() else task.result()
+        for name, task in tasks.items()
+    }
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from realitydefender import RealityDefender, RealityDefenderError
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of a key check. Keys that couldn't be checked, e.g. while Reality
+# Defender is down, are neither accepted nor rejected.
+VALID = "valid"
+INVALID = "invalid"
+UNKNOWN = "unknown"
+
+
+async def check_key(client: RealityDefender) -> None:
+    """
+    Make the cheapest authenticated call there is with a client's key.
+
+    Raises:
+        RealityDefenderError: with the `unauthorized` code if the key is
+            rejected
+    """
+    await client.get_results(size=1, max_attempts=1)
+
+
+def _fingerprint(api_key: str) -> str:
+    # Keys are remembered by hash, so the cache never holds them in clear.
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class KeyValidator:
+    """
+    Checks Reality Defender API keys against the API, and remembers whether
+    each was accepted for `ttl` seconds.
+
+    Concurrent checks of the same key share a single call. Keys that can't be
+    checked are reported `UNKNOWN` and checked again next time.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        check: Callable[[RealityDefender], Awaitable[None]] = check_key,
+        timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_size: int = 10000,
+    ):
+        self.ttl = ttl
+        self.check = check
+        self.timeout = timeout
+        self.clock = clock
+        self.max_size = max_size
+        # Outcome and expiry of each key checked, by fingerprint.
+        self._outcomes: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._checks: Dict[str, asyncio.Future[str]] = {}
+
+    def status(self, api_key: str) -> Optional[str]:
+        """The remembered outcome of a key, None if not checked recently."""
+        outcome = self._outcomes.get(_fingerprint(api_key))
+        if outcome and outcome[1] > self.clock():
+            return outcome[0]
+        return None
+
+    async def validate(
+        self, client: RealityDefender, wait: Optional[float] = None
+    ) -> str:
+        """
+        Check a client's key, unless its outcome is still remembered.
+
+        Args:
+            client: client holding the key
+            wait: how long to wait for the outcome, at most. The check goes on
+                in the background if it takes longer, and `UNKNOWN` is
+                returned meanwhile.
+        """
+        fingerprint = _fingerprint(client.api_key)
+        status = self.status(client.api_key)
+        if status:
+            return status
+
+        check = self._checks.get(fingerprint)
+        if not check:
+            check = asyncio.ensure_future(self._check(fingerprint, client))
+            self._checks[fingerprint] = check
+            check.add_done_callback(lambda _: self._checks.pop(fingerprint, None))
+        try:
+            return await asyncio.wait_for(asyncio.shield(check), wait)
+        except asyncio.TimeoutError:
+            return UNKNOWN
+
+    async def _check(self, fingerprint: str, client: RealityDefender) -> str:
+        try:
+            await asyncio.wait_for(self.check(client), self.timeout)
+        except RealityDefenderError as e:
+            if e.code != "unauthorized":
+                logger.warning(f"Could not check an API key: {e}")
+                return UNKNOWN
+            status = INVALID
+        except Exception as e:
+            logger.warning(f"Could not check an API key: {e!r}")
+            return UNKNOWN
+        else:
+            status = VALID
+
+        self._outcomes[fingerprint] = (status, self.clock() + self.ttl)
+        self._outcomes.move_to_end(fingerprint)
+        while len(self._outcomes) > self.max_size:
+            self._outcomes.popitem(last=False)
+        return status
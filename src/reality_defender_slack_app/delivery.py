@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from slack_sdk.errors import SlackApiError
+
+logger = logging.getLogger(__name__)
+
+# Ways of delivering a message about a channel, from most to least visible:
+# in the channel itself, as a message only the requester sees there, or in a
+# direct message to the requester.
+CHANNEL = "channel"
+EPHEMERAL = "ephemeral"
+DM = "dm"
+ROUTES = (CHANNEL, EPHEMERAL, DM)
+
+# Slack errors meaning a route will keep failing for a channel, however
+# often it is tried, until the bot's membership or the channel changes.
+UNDELIVERABLE_ERRORS = frozenset(
+    {
+        "not_in_channel",
+        "channel_not_found",
+        "is_archived",
+        "restricted_action",
+        "restricted_action_read_only_channel",
+        "restricted_action_thread_only_channel",
+        "restricted_action_non_threadable_channel",
+        "ekm_access_denied",
+        "team_access_not_granted",
+        "user_not_in_channel",
+    }
+)
+
+
+def is_undeliverable(error: Exception) -> bool:
+    return (
+        isinstance(error, SlackApiError)
+        and error.response.get("error") in UNDELIVERABLE_ERRORS
+    )
+
+
+class ChannelAccess:
+    """
+    Remembers how messages can be delivered for each channel.
+
+    A channel the bot can't post in is only tried once, rather than once per
+    result. Entries are forgotten when the bot joins or leaves the channel,
+    and after `ttl` seconds in case that event was missed.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_size: int = 10000,
+    ):
+        self.ttl = ttl
+        self.clock = clock
+        self.max_size = max_size
+        # Route and expiry of each channel, by channel ID.
+        self._routes: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+
+    def route(self, channel_id: str) -> Optional[str]:
+        """The route known to work for a channel, None if not known."""
+        entry = self._routes.get(channel_id)
+        if entry and entry[1] > self.clock():
+            return entry[0]
+        return None
+
+    def remember(self, channel_id: str, route: str) -> None:
+        self._routes[channel_id] = (route, self.clock() + self.ttl)
+        self._routes.move_to_end(channel_id)
+        while len(self._routes) > self.max_size:
+            self._routes.popitem(last=False)
+
+    def forget(self, channel_id: str) -> None:
+        self._routes.pop(channel_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of channels known to work with each route."""
+        counts = dict.fromkeys(ROUTES, 0)
+        for route, _ in self._routes.values():
+            counts[route] += 1
+        return counts
+
+
+class Delivery:
+    """
+    Delivers messages about a channel to the user who asked for them.
+
+    Messages are posted in the channel when the bot can, and otherwise fall
+    back to an ephemeral message in the channel, then to a direct message.
+    The route that worked is remembered in `access`, so later messages for
+    the same channel go straight to it.
+    """
+
+    def __init__(self, access: ChannelAccess):
+        self.access = access
+
+    async def post(
+        self,
+        client: Any,
+        channel: str,
+        user_id: str,
+        text: str,
+        thread_ts: Optional[str] = None,
+        blocks: Optional[list[dict[str, Any]]] = None,
+    ) -> str:
+        """
+        Post a message by the first route that works.
+
+        Returns:
+            the route the message was delivered by
+
+        Raises:
+            SlackApiError: if no route works, or on any error that isn't about
+                access to the channel
+        """
+        known = self.access.route(channel)
+        route = known or CHANNEL
+        while True:
+            try:
+                await self._send(
+                    client, route, channel, user_id, text, thread_ts, blocks
+                )
+            except SlackApiError as e:
+                if route == DM or not is_undeliverable(e):
+                    raise
+                logger.info(
+                    f"Can't deliver by {route} in {channel} "
+                    f"({e.response.get('error')}), falling back"
+                )
+                route = ROUTES[ROUTES.index(route) + 1]
+                continue
+            if route != known:
+                self.access.remember(channel, route)
+            return route
+
+    async def _send(
+        self,
+        client: Any,
+        route: str,
+        channel: str,
+        user_id: str,
+        text: str,
+        thread_ts: Optional[str],
+        blocks: Optional[list[dict[str, Any]]],
+    ) -> None:
+        kwargs: Dict[str, Any] = {"text": text}
+        if blocks:
+            kwargs["blocks"] = blocks
+        if route == CHANNEL:
+            await client.chat_postMessage(
+                channel=channel, thread_ts=thread_ts, **kwargs
+            )
+        elif route == EPHEMERAL:
+            await client.chat_postEphemeral(
+                channel=channel, user=user_id, thread_ts=thread_ts, **kwargs
+            )
+        else:
+            dm = await client.conversations_open(users=user_id)
+            await client.chat_postMessage(channel=dm["channel"]["id"], **kwargs)
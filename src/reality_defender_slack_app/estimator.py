@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, TypedDict
+
+from reality_defender_slack_app.media import media_format
+
+logger = logging.getLogger(__name__)
+
+# Name of the file the estimates are kept in, in the state directory.
+ESTIMATES_FILENAME = "estimates.json"
+
+# Upper bounds of the size buckets, in MB. Larger files share a last bucket.
+SIZE_BUCKETS_MB = (1, 4, 16, 64, 256)
+
+
+class Estimate(TypedDict):
+    # Smoothed analysis duration, in seconds.
+    seconds: float
+    # Smoothed error of the predictions made for this group, actual minus
+    # predicted: positive when they were too early.
+    bias: float
+    # Smoothed absolute error of those predictions.
+    error: float
+    samples: int
+
+
+def size_bucket(size: int) -> str:
+    """Name the size bucket of a file, e.g. `<4MB` or `256MB+`."""
+    for bound in SIZE_BUCKETS_MB:
+        if size < bound * 1048576:
+            return f"<{bound}MB"
+    return f"{SIZE_BUCKETS_MB[-1]}MB+"
+
+
+def media_kind(filetype: Optional[str]) -> str:
+    """`image`, `video`, `audio`, or `other` when the type isn't supported."""
+    media = media_format(filetype)
+    return media["kind"] if media else "other"
+
+
+class CompletionEstimator:
+    """
+    Learns how long Reality Defender takes to analyze media, from the
+    analyses that completed.
+
+    Durations are smoothed with an exponentially weighted moving average per
+    kind of media and size bucket, and per kind alone. A bucket that hasn't
+    completed an analysis yet borrows the estimate of its kind, and a kind
+    that hasn't either falls back to `default`.
+
+    The error of each prediction is smoothed too, to check how well the
+    estimates hold up.
+    """
+
+    def __init__(
+        self, default: float, alpha: float = 0.2, directory: Optional[str] = None
+    ):
+        self.default = default
+        self.alpha = alpha
+        self.path = Path(directory) / ESTIMATES_FILENAME if directory else None
+        self.estimates: Dict[str, Estimate] = {}
+        # Whether there are estimates not saved yet.
+        self.dirty = False
+
+    def predict(self, filetype: Optional[str], size: int) -> float:
+        """Expected time, in seconds, to analyze a file of this type and size."""
+        kind = media_kind(filetype)
+        for key in (f"{kind}:{size_bucket(size)}", kind):
+            if key in self.estimates:
+                return self.estimates[key]["seconds"]
+        return self.default
+
+    def observe(
+        self, filetype: Optional[str], size: int, seconds: float, predicted: float
+    ) -> None:
+        """Learn from the time an analysis actually took."""
+        kind = media_kind(filetype)
+        for key in (f"{kind}:{size_bucket(size)}", kind):
+            estimate = self.estimates.get(key)
+            if estimate is None:
+                self.estimates[key] = {
+                    "seconds": seconds,
+                    "bias": seconds - predicted,
+                    "error": abs(seconds - predicted),
+                    "samples": 1,
+                }
+                continue
+            estimate["seconds"] += self.alpha * (seconds - estimate["seconds"])
+            estimate["bias"] += self.alpha * (seconds - predicted - estimate["bias"])
+            estimate["error"] += self.alpha * (
+                abs(seconds - predicted) - estimate["error"]
+            )
+            estimate["samples"] += 1
+        self.dirty = True
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Estimates and their accuracy, rounded for logs."""
+        return {
+            key: {
+                "seconds": round(estimate["seconds"], 2),
+                "bias": round(estimate["bias"], 2),
+                "error": round(estimate["error"], 2),
+                "samples": estimate["samples"],
+            }
+            for key, estimate in sorted(self.estimates.items())
+        }
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.estimates))
+        # Atomic, so a crash never leaves half written estimates behind.
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def load(self) -> None:
+        """Pick up the estimates learned before a restart, if any."""
+        if not self.path:
+            return
+        try:
+            self.estimates = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            logger.warning(f"Ignoring unreadable estimates in {self.path}")
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Literal, Optional, TextIO, get_args
+
+from dotenv import load_dotenv
+
+from reality_defender_slack_app.performance import dumps
+from reality_defender_slack_app.history import (
+    HISTORY_FILENAME,
+    VERDICTS,
+    HistoryEntry,
+    HistoryQuery,
+    HistoryStore,
+    parse_days,
+)
+
+ExportFormat = Literal["jsonl", "csv"]
+
+# Columns of an export, in order.
+EXPORT_FIELDS = (
+    "request_id",
+    "team_id",
+    "user_id",
+    "channel_id",
+    "message_ts",
+    "filename",
+    "status",
+    "score",
+    "submitted_at",
+    "completed_at",
+    "duration_seconds",
+)
+
+# Spreadsheets treat cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+def export_record(
+    entry: HistoryEntry, export_format: ExportFormat = "jsonl"
+) -> Dict[str, Any]:
+    """
+    An analysis as exported, with ISO 8601 times and how long it took.
+
+    In CSV exports, text that a spreadsheet would run as a formula, e.g. a
+    file named `=HYPERLINK(...)`, is quoted with a leading `'`.
+    """
+    submitted_at = entry.get("submitted_at")
+    duration = None
+    if submitted_at is not None:
+        duration = round(entry["completed_at"] - submitted_at, 3)
+    record: Dict[str, Any] = {
+        "request_id": entry["request_id"],
+        "team_id": entry.get("team_id"),
+        "user_id": entry["user_id"],
+        "channel_id": entry["channel_id"],
+        "message_ts": entry["message_ts"],
+        "filename": entry.get("filename"),
+        "status": entry["status"],
+        "score": entry.get("score"),
+        "submitted_at": _timestamp(submitted_at),
+        "completed_at": _timestamp(entry["completed_at"]),
+        "duration_seconds": duration,
+    }
+    if export_format == "csv":
+        for field, value in record.items():
+            if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+                record[field] = "'" + value
+    return record
+
+
+def write_export(
+    entries: Iterable[HistoryEntry], out: TextIO, export_format: ExportFormat
+) -> int:
+    """
+    Write analyses to a file as they are read, one line each.
+
+    Nothing is kept once written, so memory use doesn't grow with the export.
+
+    Returns:
+        the number of analyses written
+    """
+    count = 0
+    if export_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for entry in entries:
+            writer.writerow(export_record(entry, export_format))
+            count += 1
+    else:
+        for entry in entries:
+            out.write(dumps(export_record(entry)) + "\n")
+            count += 1
+    return count
+
+
+def parse_export_args(
+    text: str, now: Optional[float] = None
+) -> Optional[tuple[ExportFormat, HistoryQuery]]:
+    """
+    Turn `/analysis-export` arguments into a format and a query.
+
+    Everything is exported as JSONL by default. `csv` or `jsonl` pick the
+    format, a verdict keeps only those analyses, and a number of days (e.g. `30`
+    or `30d`) how far back to go.
+
+    Returns:
+        the format and query, or None when the arguments aren't understood
+    """
+    export_format: ExportFormat = "jsonl"
+    query: HistoryQuery = {}
+    for arg in text.lower().split():
+        if arg in get_args(ExportFormat):
+            export_format = arg  # type: ignore[assignment]
+        elif arg.upper() in VERDICTS:
+            query["status"] = arg.upper()
+        elif days := parse_days(arg):
+            query["since"] = (now if now is not None else time.time()) - days * 86400
+        else:
+            return None
+    return export_format, query
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Export the analysis history from the command line."""
+    # STATE_DIR may be set in the same .env as the app's.
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        prog="rd-slack-export",
+        description="Export completed Reality Defender analyses as JSONL or CSV.",
+    )
+    parser.add_argument(
+        "--state-dir",
+        default=os.environ.get("STATE_DIR", "./state"),
+        help="the app's STATE_DIR (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--format", choices=get_args(ExportFormat), default="jsonl", dest="fmt"
+    )
+    parser.add_argument(
+        "--output", "-o", help="file to write, standard output if omitted"
+    )
+    parser.add_argument("--days", type=int, help="only analyses from the last days")
+    parser.add_argument("--user", help="only analyses run by this user ID")
+    parser.add_argument("--channel", help="only analyses from this channel ID")
+    parser.add_argument("--status", type=str.upper, choices=VERDICTS)
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="analyses read at a time"
+    )
+    args = parser.parse_args(argv)
+
+    query: HistoryQuery = {}
+    if args.days:
+        query["since"] = time.time() - args.days * 86400
+    if args.user:
+        query["user_id"] = args.user
+    if args.channel:
+        query["channel_id"] = args.channel
+    if args.status:
+        query["status"] = args.status
+
+    path = Path(args.state_dir) / HISTORY_FILENAME
+    if not path.exists():
+        print(f"No analysis history found at {path}", file=sys.stderr)
+        return 1
+
+    store = HistoryStore(str(path))
+    try:
+        entries = store.iter_entries(query, chunk_size=args.chunk_size)
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as out:
+                count = write_export(entries, out, args.fmt)
+        else:
+            count = write_export(entries, sys.stdout, args.fmt)
+    finally:
+        store.close()
+    print(f"Exported {count} analyses", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
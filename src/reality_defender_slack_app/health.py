@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from reality_defender_slack_app.app import App
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Measures how responsive the event loop is.
+
+    A timer is scheduled every `interval` seconds, and how late it fires is
+    the loop's lag: the time some callback held the loop without yielding.
+    """
+
+    def __init__(
+        self, interval: float = 0.5, clock: Callable[[], float] = time.monotonic
+    ):
+        self.interval = interval
+        self.clock = clock
+        self.lag = 0.0
+        self.last_beat = clock()
+
+    async def run(self) -> None:
+        while True:
+            expected = self.clock() + self.interval
+            await asyncio.sleep(self.interval)
+            now = self.clock()
+            self.lag = max(0.0, now - expected)
+            self.last_beat = now
+
+    def stalled_for(self) -> float:
+        """How long the loop has been held, beyond the last measured lag."""
+        return max(0.0, self.clock() - self.last_beat - self.interval)
+
+    def responsive(self, max_lag: float) -> bool:
+        return self.lag <= max_lag and self.stalled_for() <= max_lag
+
+
+class HealthServer:
+    """
+    Small HTTP server for probes and autoscaling.
+
+    - `/healthz` (liveness) fails when the event loop lags more than
+      `max_loop_lag` seconds. A loop that is fully wedged can't answer at
+      all, which probes count as a failure too.
+    - `/readyz` (readiness) fails until Socket Mode is connected and
+      connections are warmed up, and while a Reality Defender circuit breaker
+      is open.
+    - `/queue` reports the analysis backlog, for autoscaling on pending work
+      rather than CPU.
+    """
+
+    def __init__(
+        self,
+        app: App,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        max_loop_lag: float = 1.0,
+        monitor: Optional[LoopMonitor] = None,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.max_loop_lag = max_loop_lag
+        self.monitor = monitor or LoopMonitor()
+        self._runner: Optional[web.AppRunner] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+        self.web_app = web.Application()
+        self.web_app.router.add_get("/healthz", self.handle_liveness)
+        self.web_app.router.add_get("/readyz", self.handle_readiness)
+        self.web_app.router.add_get("/queue", self.handle_queue)
+
+    async def start(self) -> None:
+        self._monitor_task = asyncio.create_task(self.monitor.run())
+        self._runner = web.AppRunner(self.web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Health endpoints listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle_liveness(self, _request: web.Request) -> web.Response:
+        alive = self.monitor.responsive(self.max_loop_lag)
+        return web.json_response(
+            {
+                "alive": alive,
+                "loop_lag": round(self.monitor.lag, 4),
+                "stalled_for": round(self.monitor.stalled_for(), 4),
+            },
+            status=200 if alive else 503,
+        )
+
+    async def _socket_mode_connected(self) -> bool:
+        try:
+            connected: bool = await self.app.handler.client.is_connected()
+            return connected
+        except Exception:
+            logger.debug("Could not check the Socket Mode connection", exc_info=True)
+            return False
+
+    async def handle_readiness(self, _request: web.Request) -> web.Response:
+        connected = await self._socket_mode_connected()
+        breakers = {name: breaker.state for name, breaker in self.app.breakers.items()}
+        degraded = [
+            name for name, breaker in self.app.breakers.items() if breaker.is_open
+        ]
+        ready = connected and self.app.warmed_up and not degraded
+        return web.json_response(
+            {
+                "ready": ready,
+                "socket_mode_connected": connected,
+                "warmed_up": self.app.warmed_up,
+                "breakers": breakers,
+            },
+            status=200 if ready else 503,
+        )
+
+    def queue_depth(self) -> Dict[str, Any]:
+        """Work waiting on this instance, with `backlog` summing all of it."""
+        statuses: Dict[str, int] = {}
+        for request in list(self.app.active_requests.values()):
+            status = request.get("status", "unknown")
+            statuses[status] = statuses.get(status, 0) + 1
+
+        uploads_queued = self.app.upload_scheduler.pending()
+        auto_scan_queued = self.app.auto_scan_queue.qsize()
+        # Chunked uploads in progress are already counted as running uploads.
+        awaiting_results = sum(
+            count for status, count in statuses.items() if status != "uploading"
+        )
+        return {
+            "backlog": auto_scan_queued
+            + uploads_queued
+            + self.app.upload_scheduler.running
+            + awaiting_results,
+            "uploads": {
+                "queued": uploads_queued,
+                "running": self.app.upload_scheduler.running,
+            },
+            "polls": {
+                "queued": self.app.poll_scheduler.pending(),
+                "running": self.app.poll_scheduler.running,
+            },
+            "auto_scan_queued": auto_scan_queued,
+            "analyses": statuses,
+            "media_workers": self.app.media_workers.stats(),
+        }
+
+    async def handle_queue(self, _request: web.Request) -> web.Response:
+        return web.json_response(self.queue_depth())
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypedDict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Name of the history database in the state directory.
+HISTORY_FILENAME = "history.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    request_id TEXT NOT NULL UNIQUE,
+    team_id TEXT,
+    user_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    message_ts TEXT NOT NULL,
+    filename TEXT,
+    status TEXT NOT NULL,
+    score REAL,
+    submitted_at REAL,
+    completed_at REAL NOT NULL,
+    media_key TEXT
+);
+CREATE INDEX IF NOT EXISTS analyses_by_user
+    ON analyses (user_id, completed_at, id);
+CREATE INDEX IF NOT EXISTS analyses_by_channel
+    ON analyses (channel_id, completed_at, id);
+CREATE INDEX IF NOT EXISTS analyses_by_status
+    ON analyses (status, completed_at, id);
+CREATE INDEX IF NOT EXISTS analyses_by_time
+    ON analyses (completed_at, id);
+"""
+
+# Created once older databases have gained the media_key column.
+_MEDIA_KEY_INDEX = """
+CREATE INDEX IF NOT EXISTS analyses_by_media_key
+    ON analyses (media_key, completed_at, id);
+"""
+
+# Pruning runs every this many inserts, rather than on each one.
+PRUNE_INTERVAL = 1000
+
+
+class HistoryEntry(TypedDict):
+    id: int
+    request_id: str
+    team_id: Optional[str]
+    user_id: str
+    channel_id: str
+    message_ts: str
+    filename: Optional[str]
+    status: str
+    score: Optional[float]
+    # When the media was uploaded, if known.
+    submitted_at: Optional[float]
+    completed_at: float
+    # Identifies the analyzed media, to avoid analyzing it again.
+    media_key: Optional[str]
+
+
+class HistoryQuery(TypedDict, total=False):
+    user_id: str
+    channel_id: str
+    status: str
+    # Only analyses completed at or after this time.
+    since: float
+
+
+VERDICTS = ("MANIPULATED", "AUTHENTIC", "UNKNOWN")
+
+
+def parse_days(arg: str) -> Optional[int]:
+    """Read a number of days, e.g. `7` or `7d`."""
+    days = arg.lower().removesuffix("d")
+    return int(days) if days.isdigit() and int(days) > 0 else None
+
+
+def parse_history_args(
+    text: str,
+    user_id: str,
+    channel_id: str,
+    now: Optional[float] = None,
+    admin: bool = False,
+) -> Optional[HistoryQuery]:
+    """
+    Turn `/analysis-history` arguments into a query.
+
+    By default the user's own analyses are listed. `here` keeps only those
+    from the current channel, a verdict only those with that verdict, and a
+    number of days (e.g. `7` or `7d`) how far back to look. Results may have
+    been delivered privately, so only admins see everyone's analyses `here`.
+
+    Returns:
+        the query, or None when the arguments aren't understood
+    """
+    query: HistoryQuery = {"user_id": user_id}
+    for arg in text.lower().split():
+        if arg == "here":
+            if admin:
+                query.pop("user_id", None)
+            query["channel_id"] = channel_id
+        elif arg.upper() in VERDICTS:
+            query["status"] = arg.upper()
+        elif days := parse_days(arg):
+            query["since"] = (now if now is not None else time.time()) - days * 86400
+        else:
+            return None
+    return query
+
+
+def encode_cursor(entry: HistoryEntry) -> str:
+    return f"{entry['completed_at']!r}:{entry['id']}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    completed_at, _, entry_id = cursor.partition(":")
+    return float(completed_at), int(entry_id)
+
+
+class HistoryStore:
+    """
+    Bounded SQLite history of completed analyses.
+
+    Every filter (user, channel, verdict, time) is backed by an index ending
+    in `(completed_at, id)`, and pages are fetched with keyset pagination, so a
+    query reads only the rows it returns however large the table grows. Once
+    there are more than `max_rows` entries the oldest are dropped.
+
+    SQLite calls block, so they run on a dedicated thread, which also keeps
+    them in order.
+    """
+
+    def __init__(self, path: str, max_rows: int = 1000000):
+        self.path = path
+        self.max_rows = max_rows
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._connection:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            columns = {
+                row["name"] for row in connection.execute("PRAGMA table_info(analyses)")
+            }
+            if "media_key" not in columns:
+                connection.execute("ALTER TABLE analyses ADD COLUMN media_key TEXT")
+            connection.executescript(_MEDIA_KEY_INDEX)
+            self._connection = connection
+        return self._connection
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+    async def record(
+        self,
+        request_id: str,
+        user_id: str,
+        channel_id: str,
+        message_ts: str,
+        status: str,
+        score: Optional[float] = None,
+        filename: Optional[str] = None,
+        team_id: Optional[str] = None,
+        submitted_at: Optional[float] = None,
+        completed_at: Optional[float] = None,
+        media_key: Optional[str] = None,
+    ) -> None:
+        """Add a completed analysis to the history."""
+        await self._run(
+            self._record,
+            (
+                request_id,
+                team_id,
+                user_id,
+                channel_id,
+                message_ts,
+                filename,
+                status,
+                score,
+                submitted_at,
+                completed_at if completed_at is not None else time.time(),
+                media_key,
+            ),
+        )
+
+    def _record(self, row: tuple) -> None:
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO analyses (request_id, team_id, user_id, "
+                "channel_id, message_ts, filename, status, score, submitted_at, "
+                "completed_at, media_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+        self._inserts += 1
+        if self._inserts % PRUNE_INTERVAL == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        connection = self._connect()
+        with connection:
+            # Ids only grow, so everything below the newest `max_rows` goes.
+            connection.execute(
+                "DELETE FROM analyses WHERE id <= ("
+                "SELECT id FROM analyses ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    async def query(
+        self, query: HistoryQuery, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[list[HistoryEntry], Optional[str]]:
+        """
+        Fetch a page of history, newest first.
+
+        Args:
+            query: filters, all of which must match
+            limit: page size
+            cursor: returned with the previous page, to get the next one
+
+        Returns:
+            the entries, and the cursor for the next page if there is one
+        """
+        return await self._run(self._query, query, limit, cursor)
+
+    async def verdicts(self, media_keys: list[str]) -> dict[str, str]:
+        """
+        The latest verdict of each piece of media analyzed before.
+
+        Returns:
+            the status of every key found in the history, by key
+        """
+        if not media_keys:
+            return {}
+        return await self._run(self._verdicts, media_keys)
+
+    def _verdicts(self, media_keys: list[str]) -> dict[str, str]:
+        placeholders = ", ".join("?" * len(media_keys))
+        rows = self._connect().execute(
+            "SELECT media_key, status FROM analyses "
+            f"WHERE media_key IN ({placeholders}) ORDER BY completed_at, id",
+            media_keys,
+        )
+        # Later rows overwrite earlier ones, leaving the latest verdict.
+        return {row["media_key"]: row["status"] for row in rows}
+
+    def _select(
+        self, query: HistoryQuery, limit: int, cursor: Optional[str]
+    ) -> tuple[str, list[Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        for column in ("user_id", "channel_id", "status"):
+            if column in query:
+                clauses.append(f"{column} = ?")
+                params.append(query[column])
+        if "since" in query:
+            clauses.append("completed_at >= ?")
+            params.append(query["since"])
+        if cursor:
+            clauses.append("(completed_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM analyses {where} ORDER BY completed_at DESC, id DESC LIMIT ?"
+        return sql, [*params, limit]
+
+    def _query(
+        self, query: HistoryQuery, limit: int, cursor: Optional[str]
+    ) -> tuple[list[HistoryEntry], Optional[str]]:
+        # One more row than asked for tells whether there is a next page.
+        sql, params = self._select(query, limit + 1, cursor)
+        rows = self._connect().execute(sql, params).fetchall()
+
+        entries: list[HistoryEntry] = [dict(row) for row in rows[:limit]]  # type: ignore[misc]
+        next_cursor = encode_cursor(entries[-1]) if len(rows) > limit else None
+        return entries, next_cursor
+
+    def iter_entries(
+        self, query: HistoryQuery, chunk_size: int = 1000
+    ) -> Iterator[HistoryEntry]:
+        """
+        Every entry matching a query, newest first, however many there are.
+
+        Entries are read `chunk_size` at a time, with the same keyset pagination
+        as `query`, on a read-only connection of their own: this blocks, but
+        doesn't hold up the app recording new entries meanwhile.
+        """
+        if not Path(self.path).exists():
+            return
+
+        uri = f"{Path(self.path).resolve().as_uri()}?mode=ro"
+        connection = sqlite3.connect(uri, uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            cursor: Optional[str] = None
+            while True:
+                sql, params = self._select(query, chunk_size, cursor)
+                entries: list[HistoryEntry] = [
+                    dict(row)  # type: ignore[misc]
+                    for row in connection.execute(sql, params)
+                ]
+                yield from entries
+                if len(entries) < chunk_size:
+                    return
+                cursor = encode_cursor(entries[-1])
+        finally:
+            connection.close()
+
+    def close(self) -> None:
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, TypeVar
+
+from realitydefender import RealityDefender, RealityDefenderError
+from realitydefender.detection.upload import get_signed_url
+from realitydefender.model import DetectionResult, UploadResult
+
+from reality_defender_slack_app.autoscan import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _create_client(api_key: str) -> RealityDefender:
+    return RealityDefender(api_key=api_key)
+
+
+class PooledKey:
+    """One shared API key, its client and how it's being used."""
+
+    def __init__(self, client: RealityDefender, label: str, bucket: TokenBucket | None):
+        self.client = client
+        # Never the key itself, it must not end up in logs or Slack.
+        self.label = label
+        self.bucket = bucket
+        self.in_flight = 0
+        self.calls = 0
+        self.rejections = 0
+        self.unavailable_until = 0.0
+
+
+class KeyPool:
+    """
+    Shares the work of every user across a set of organisation API keys.
+
+    Uploads go to the least busy key that still has room under its rate limit.
+    A key reporting that it is out of quota, or otherwise unauthorized, is set
+    aside for `cooldown` seconds and the call fails over to another key.
+    Results are fetched with the key that uploaded the media.
+
+    The pool offers the subset of the `RealityDefender` client used by the
+    app, so it can stand in for a user's own client.
+    """
+
+    def __init__(
+        self,
+        api_keys: Iterable[str],
+        rate_per_minute: float = 0,
+        cooldown: float = 300.0,
+        client_factory: Callable[[str], RealityDefender] = _create_client,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        max_tracked: int = 10000,
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.max_tracked = max_tracked
+        self.keys = [
+            PooledKey(
+                client_factory(key),
+                f"key {index + 1} (…{key[-4:]})",
+                TokenBucket(rate_per_minute, clock=clock) if rate_per_minute else None,
+            )
+            for index, key in enumerate(api_keys)
+        ]
+        if not self.keys:
+            raise ValueError("At least one API key is required")
+        # Key that uploaded each recent request.
+        self._owners: OrderedDict[str, PooledKey] = OrderedDict()
+
+    async def _acquire(
+        self, excluded: Set[PooledKey], preferred: Optional[PooledKey], limited: bool
+    ) -> PooledKey:
+        while True:
+            now = self.clock()
+            candidates = sorted(
+                (
+                    key
+                    for key in self.keys
+                    if key not in excluded and key.unavailable_until <= now
+                ),
+                # Preferred key first, then the least busy.
+                key=lambda key: (key is not preferred, key.in_flight),
+            )
+            if not candidates:
+                raise RealityDefenderError(
+                    "Every shared API key is out of quota", "unauthorized"
+                )
+
+            for key in candidates:
+                if not limited or not key.bucket or key.bucket.take():
+                    return key
+
+            # Every usable key is at its rate limit, wait for the next token.
+            await self.sleep(60.0 / self.rate_per_minute)
+
+    async def _call(
+        self,
+        work: Callable[[RealityDefender], Awaitable[T]],
+        preferred: Optional[PooledKey] = None,
+        limited: bool = True,
+    ) -> tuple[T, PooledKey]:
+        excluded: Set[PooledKey] = set()
+        while True:
+            key = await self._acquire(excluded, preferred, limited)
+            key.in_flight += 1
+            key.calls += 1
+            try:
+                return await work(key.client), key
+            except RealityDefenderError as e:
+                if e.code != "unauthorized":
+                    raise
+                key.rejections += 1
+                key.unavailable_until = self.clock() + self.cooldown
+                excluded.add(key)
+                logger.warning(
+                    f"Shared {key.label} rejected ({e.message}), "
+                    f"unused for {self.cooldown:.0f}s"
+                )
+            finally:
+                key.in_flight -= 1
+
+    def _track(self, request_id: str, key: PooledKey) -> None:
+        self._owners[request_id] = key
+        self._owners.move_to_end(request_id)
+        while len(self._owners) > self.max_tracked:
+            self._owners.popitem(last=False)
+
+    async def upload(self, file_path: str) -> UploadResult:
+        result, key = await self._call(
+            lambda client: client.upload(file_path=file_path)
+        )
+        self._track(result["request_id"], key)
+        return result
+
+    async def signed_url(self, filename: str) -> Dict[str, Any]:
+        """Request a signed upload URL, as `get_signed_url` does."""
+        response, key = await self._call(
+            lambda client: get_signed_url(client.client, filename)
+        )
+        if response.get("requestId"):
+            self._track(response["requestId"], key)
+        return response
+
+    async def get_result(self, request_id: str, **kwargs: Any) -> DetectionResult:
+        result, _ = await self._call(
+            lambda client: client.get_result(request_id, **kwargs),
+            preferred=self._owners.get(request_id),
+            limited=False,
+        )
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = self.clock()
+        return {
+            key.label: {
+                "in_flight": key.in_flight,
+                "calls": key.calls,
+                "rejections": key.rejections,
+                "available_in": max(0.0, key.unavailable_until - now),
+            }
+            for key in self.keys
+        }
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, NamedTuple, NotRequired, Optional, TypedDict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class MediaFormat(TypedDict):
+    kind: str
+    extensions: list[str]
+    size_limit: int
+
+
+# Formats accepted by Reality Defender and the largest file it takes for each.
+SUPPORTED_FORMATS: list[MediaFormat] = [
+    {"kind": "video", "extensions": ["mp4", "mov"], "size_limit": 262144000},
+    {
+        "kind": "image",
+        "extensions": ["jpg", "jpeg", "png", "gif", "webp"],
+        "size_limit": 52428800,
+    },
+    {
+        "kind": "audio",
+        "extensions": ["flac", "wav", "mp3", "m4a", "aac", "alac", "ogg"],
+        "size_limit": 20971520,
+    },
+]
+
+MIMETYPE_EXTENSIONS = {
+    "video/mp4": "mp4",
+    "video/quicktime": "mov",
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/vnd.wave": "wav",
+    "audio/mpeg": "mp3",
+    "audio/mp4": "m4a",
+    "audio/x-m4a": "m4a",
+    "audio/aac": "aac",
+    "audio/ogg": "ogg",
+}
+
+_FORMATS_BY_EXTENSION = {
+    extension: media_format
+    for media_format in SUPPORTED_FORMATS
+    for extension in media_format["extensions"]
+}
+
+# Enough leading bytes to recognize every supported format.
+SNIFF_BYTES = 16
+
+
+class MediaRejectedError(Exception):
+    """Raised when a file can't or shouldn't be sent for analysis."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+class DownloadedMedia(NamedTuple):
+    path: str
+    filetype: str
+    size: int
+    sha256: str
+
+
+class MediaPlan(TypedDict):
+    key: str
+    url: str
+    name: str
+    filetype: Optional[str]
+    mimetype: Optional[str]
+    size: Optional[int]
+    # Slack's largest thumbnail of the file, if it has one.
+    thumbnail: NotRequired[str]
+    # For a thumbnail analyzed instead of its file, the plan for the file.
+    preview_of: NotRequired[MediaPlan]
+
+
+# Thumbnails Slack makes of images and videos, from largest to smallest. The
+# video one is a still of its poster frame.
+THUMBNAIL_FIELDS = ("thumb_1024", "thumb_960", "thumb_720", "thumb_480", "thumb_video")
+
+
+# Hosts serving `url_private` files, the only ones trusted with a bot token.
+SLACK_FILE_HOSTS = ("files.slack.com",)
+
+
+def is_slack_file_url(url: str) -> bool:
+    """Whether a URL is a file hosted by Slack, rather than on another site."""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    return parts.scheme == "https" and any(
+        host == slack_host or host.endswith("." + slack_host)
+        for slack_host in SLACK_FILE_HOSTS
+    )
+
+
+def media_format(filetype: Optional[str]) -> Optional[MediaFormat]:
+    """Look up the supported format for a file extension, if any."""
+    if not filetype:
+        return None
+    return _FORMATS_BY_EXTENSION.get(filetype.lower().lstrip("."))
+
+
+def normalize_filetype(
+    filetype: Optional[str] = None, mimetype: Optional[str] = None
+) -> Optional[str]:
+    """
+    Resolve Slack's `filetype` and `mimetype` to a supported extension.
+
+    Returns:
+        the extension without a dot, or None when neither is supported
+    """
+    if filetype and media_format(filetype):
+        return "jpg" if filetype.lower() == "jpeg" else filetype.lower()
+    if mimetype:
+        return MIMETYPE_EXTENSIONS.get(mimetype.split(";")[0].strip().lower())
+    return None
+
+
+def filetype_from_name(name: str) -> Optional[str]:
+    """Guess a supported extension from a file name or URL."""
+    name = name.split("?")[0].rsplit("/", 1)[-1]
+    if "." not in name:
+        return None
+    return normalize_filetype(name.rsplit(".", 1)[-1])
+
+
+def sniff_filetype(head: bytes) -> Optional[str]:
+    """
+    Recognize a supported format from the first bytes of a file.
+
+    Args:
+        head: at least `SNIFF_BYTES` leading bytes, when the file is that large
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "webp"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "wav"
+    if head.startswith(b"fLaC"):
+        return "flac"
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand == b"qt  ":
+            return "mov"
+        if brand in (b"M4A ", b"M4B "):
+            return "m4a"
+        return "mp4"
+    if head.startswith(b"ID3") or head[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+        return "mp3"
+    if head[:2] in (b"\xff\xf1", b"\xff\xf9"):
+        return "aac"
+    return None
+
+
+def check_size(name: str, filetype: Optional[str], size: Optional[int]) -> None:
+    """Raise MediaRejectedError if `size` is over the limit for the format."""
+    fmt = media_format(filetype)
+    if fmt and size is not None and size > fmt["size_limit"]:
+        raise MediaRejectedError(
+            name,
+            f"file is too large ({size / 1048576:.1f} MB, "
+            f"the limit for {fmt['kind']} is {fmt['size_limit'] / 1048576:.0f} MB)",
+        )
+
+
+def _plan_file(file: dict) -> MediaPlan:
+    url: str = file.get("url_private") or file.get("url_private_download") or ""
+    name: str = file.get("name") or url.rsplit("/", 1)[-1]
+    mimetype: Optional[str] = file.get("mimetype")
+    filetype = normalize_filetype(file.get("filetype"), mimetype)
+
+    if not url or (not filetype and (file.get("filetype") or mimetype)):
+        raise MediaRejectedError(name, "unsupported file type")
+
+    size: Optional[int] = file.get("size")
+    check_size(name, filetype, size)
+
+    plan: MediaPlan = {
+        "key": file.get("id") or url,
+        "url": url,
+        "name": name,
+        "filetype": filetype,
+        "mimetype": mimetype,
+        "size": size,
+    }
+    thumbnail = next((file[f] for f in THUMBNAIL_FIELDS if file.get(f)), None)
+    if thumbnail:
+        plan["thumbnail"] = thumbnail
+    return plan
+
+
+def preview_plan(plan: MediaPlan, min_size: int) -> Optional[MediaPlan]:
+    """
+    Plan the analysis of a file's thumbnail, to get a verdict sooner than
+    from the file itself.
+
+    Returns:
+        None if the file has no thumbnail, or isn't known to be at least
+        `min_size` bytes
+    """
+    thumbnail = plan.get("thumbnail")
+    if not thumbnail or plan["size"] is None or plan["size"] < min_size:
+        return None
+    return {
+        "key": f"preview:{plan['key']}",
+        "url": thumbnail,
+        "name": plan["name"],
+        "filetype": filetype_from_name(thumbnail),
+        "mimetype": None,
+        "size": None,
+        "preview_of": plan,
+    }
+
+
+async def plan_media(
+    message: Any, client: Any = None
+) -> tuple[list[MediaPlan], list[MediaRejectedError]]:
+    """
+    Decide what to analyze in a Slack message, before downloading anything.
+
+    File size and type come from the message payload. When the payload lacks
+    them (e.g. hidden or truncated file objects) they are fetched with
+    `files.info`. Anything whose type is still unknown is planned with no
+    filetype, and sniffed from its first bytes while downloading.
+
+    Args:
+        message: a Slack message payload, as found in shortcuts and events
+        client: Slack web client used for `files.info`, if any
+
+    Returns:
+        the media to analyze, and the files that were rejected and why
+    """
+    plans: list[MediaPlan] = []
+    rejected: list[MediaRejectedError] = []
+
+    for block in message.get("blocks", []):
+        if block.get("type") != "image":
+            continue
+        slack_file: dict = block.get("slack_file", {})
+        url: str = block.get("image_url") or slack_file.get("url") or ""
+        if not url:
+            continue
+        plans.append(
+            {
+                "key": slack_file.get("id") or url,
+                "url": url,
+                "name": url.split("?")[0].rsplit("/", 1)[-1],
+                "filetype": filetype_from_name(url),
+                "mimetype": None,
+                "size": None,
+            }
+        )
+
+    for file in message.get("files", []):
+        if (
+            client
+            and file.get("id")
+            and (
+                file.get("size") is None
+                or not (file.get("filetype") or file.get("mimetype"))
+                or not file.get("url_private")
+            )
+        ):
+            try:
+                response = await client.files_info(file=file["id"])
+                file = {**file, **response.get("file", {})}
+            except Exception:
+                logger.warning(
+                    f"Could not get info for file {file['id']}", exc_info=True
+                )
+
+        try:
+            plans.append(_plan_file(file))
+        except MediaRejectedError as e:
+            rejected.append(e)
+
+    return plans, rejected
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Literal, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - optional dependency
+    uvloop = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+PerformanceProfile = Literal["standard", "fast"]
+
+_fast_json = False
+
+
+def use_fast_json(enabled: bool) -> bool:
+    """
+    Serialize with orjson from now on, if it is installed.
+
+    Returns:
+        whether orjson is used
+    """
+    global _fast_json
+    _fast_json = enabled and orjson is not None
+    return _fast_json
+
+
+def dumps(value: Any, pretty: bool = False) -> str:
+    """
+    Serialize to JSON, with orjson when enabled.
+
+    Both write compact JSON, with non-ASCII characters as is, so the output
+    is the same either way.
+    """
+    if _fast_json:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(value, option=option).decode()
+    if pretty:
+        return json.dumps(value, indent=2, ensure_ascii=False)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON, with orjson when enabled."""
+    if _fast_json:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class LazyJson:
+    """
+    Pretty JSON for a log message, only serialized if the message is emitted.
+
+    Payloads logged at debug level are then free when debug logging is off.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return dumps(self.value, pretty=True)
+
+
+def loop_factory(
+    profile: PerformanceProfile,
+) -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """The event loop to run the app on, None for asyncio's default."""
+    if profile == "fast" and uvloop is not None:
+        factory: Callable[[], asyncio.AbstractEventLoop] = uvloop.new_event_loop
+        return factory
+    return None
+
+
+def apply_profile(profile: PerformanceProfile) -> None:
+    """Switch serialization to the profile, and log what it could use."""
+    fast_json = use_fast_json(profile == "fast")
+    if profile == "fast":
+        missing = [
+            name
+            for name, module in (("uvloop", uvloop), ("orjson", orjson))
+            if module is None
+        ]
+        if missing:
+            logger.warning(
+                f"Fast profile without {', '.join(missing)}, install the `fast` "
+                "extra to use them"
+            )
+    logger.info(
+        f"Performance profile {profile}: event loop "
+        f"{'uvloop' if loop_factory(profile) else 'asyncio'}, "
+        f"JSON {'orjson' if fast_json else 'json'}"
+    )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from typing import NamedTuple
+
+from reality_defender_slack_app.workers import MediaWorkers
+
+logger = logging.getLogger(__name__)
+
+# Pillow is imported by the workers once there is an image to optimize, not
+# at startup.
+PILLOW_INSTALLED = importlib.util.find_spec("PIL") is not None
+
+# Never downsample below this, detection accuracy drops on smaller images.
+MIN_DIMENSION = 1024
+
+# Formats we know how to re-encode without visible loss.
+OPTIMIZABLE_FILETYPES = frozenset({"jpg", "jpeg", "png"})
+
+
+class OptimizedImage(NamedTuple):
+    path: str
+    original_size: int
+    optimized_size: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - self.optimized_size
+
+
+def optimize_image(path: str, filetype: str, max_dimension: int) -> OptimizedImage:
+    """
+    Downsample an image to `max_dimension` and strip its metadata. Rotation
+    from the EXIF orientation is applied first, as it is dropped with the rest.
+
+    Runs in a worker process. Images within the limit are left untouched, as
+    is any image that wouldn't get smaller.
+
+    Args:
+        path: image to optimize
+        filetype: extension of the image, without a dot
+        max_dimension: maximum width or height of the result
+    """
+    original_size = os.path.getsize(path)
+    unchanged = OptimizedImage(path, original_size, original_size)
+    if not PILLOW_INSTALLED or filetype.lower() not in OPTIMIZABLE_FILETYPES:
+        return unchanged
+
+    from PIL import Image, ImageOps
+
+    max_dimension = max(max_dimension, MIN_DIMENSION)
+    with Image.open(path) as image:
+        if max(image.size) <= max_dimension:
+            return unchanged
+
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        root, extension = os.path.splitext(path)
+        optimized_path = f"{root}_optimized{extension}"
+        # Only pixel data is saved, EXIF and other metadata is dropped.
+        if filetype.lower() == "png":
+            image.save(optimized_path, format="PNG", optimize=True)
+        else:
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(optimized_path, format="JPEG", quality=92, subsampling=0)
+
+    optimized_size = os.path.getsize(optimized_path)
+    if optimized_size >= original_size:
+        os.unlink(optimized_path)
+        return unchanged
+
+    return OptimizedImage(optimized_path, original_size, optimized_size)
+
+
+class ImageOptimizer:
+    """
+    Optional pre-upload stage that shrinks oversized images off the event loop.
+    """
+
+    def __init__(self, max_dimension: int, workers: MediaWorkers):
+        self.max_dimension = max_dimension
+        self.workers = workers
+        self.bytes_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_dimension) and PILLOW_INSTALLED
+
+    async def optimize(self, path: str, filetype: str) -> OptimizedImage:
+        """
+        Optimize an image in the media worker pool.
+
+        When optimization fails the original file is used, it is only ever
+        an optimization.
+        """
+        if not self.enabled or filetype.lower() not in OPTIMIZABLE_FILETYPES:
+            size = os.path.getsize(path)
+            return OptimizedImage(path, size, size)
+
+        try:
+            result = await self.workers.run(
+                optimize_image, path, filetype, self.max_dimension
+            )
+        except Exception:
+            logger.warning(f"Could not optimize {path}", exc_info=True)
+            size = os.path.getsize(path)
+            return OptimizedImage(path, size, size)
+
+        if result.bytes_saved:
+            self.bytes_saved += result.bytes_saved
+            logger.info(
+                f"Optimized {path}: {result.original_size} -> {result.optimized_size} "
+                f"bytes ({result.bytes_saved} saved)"
+            )
+        return result
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, NotRequired, Optional, Tuple, TypedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ScanFinding(TypedDict):
+    message_ts: str
+    filename: Optional[str]
+
+
+class ScanCheckpoint(TypedDict):
+    channel_id: str
+    user_id: str
+    oldest: str
+    cursor: Optional[str]
+    status_ts: Optional[str]
+    scanned: int
+    queued: int
+    skipped: int
+    team_id: NotRequired[str]
+    # Number of files found with each verdict, analyzed before or by the scan.
+    verdicts: NotRequired[Dict[str, int]]
+    # Files found manipulated, to list in the summary.
+    manipulated: NotRequired[list[ScanFinding]]
+    # Analyses queued by the scan that have finished.
+    completed: NotRequired[int]
+    # Set once every page has been scanned.
+    done: NotRequired[bool]
+
+
+def record_verdict(
+    checkpoint: ScanCheckpoint,
+    status: str,
+    message_ts: str,
+    filename: Optional[str] = None,
+) -> None:
+    """Count a file's verdict towards a scan's summary."""
+    verdicts = checkpoint.setdefault("verdicts", {})
+    verdicts[status] = verdicts.get(status, 0) + 1
+    if status == "MANIPULATED":
+        checkpoint.setdefault("manipulated", []).append(
+            {"message_ts": message_ts, "filename": filename}
+        )
+
+
+async def iter_history_pages(
+    client: Any,
+    channel_id: str,
+    oldest: str,
+    cursor: Optional[str] = None,
+    limit: int = 200,
+) -> AsyncIterator[Tuple[list[dict], Optional[str]]]:
+    """
+    Stream a channel's history one page at a time.
+
+    Only a single page is held in memory. Each page comes with the cursor for
+    the following one, which is what should be checkpointed once the page has
+    been handled.
+
+    Args:
+        client: Slack web client
+        channel_id: channel to read
+        oldest: only messages after this timestamp are returned
+        cursor: cursor to resume from, if any
+        limit: page size requested from Slack
+    """
+    while True:
+        kwargs: Dict[str, Any] = {
+            "channel": channel_id,
+            "oldest": oldest,
+            "limit": limit,
+        }
+        if cursor:
+            kwargs["cursor"] = cursor
+
+        response = await client.conversations_history(**kwargs)
+        messages: list[dict] = response.get("messages", [])
+        cursor = (response.get("response_metadata") or {}).get("next_cursor") or None
+
+        yield messages, cursor
+
+        if not cursor:
+            return
+
+
+class CheckpointStore:
+    """
+    Persists channel scan checkpoints as small JSON files, one per channel.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory) / "scans"
+
+    def _path(self, channel_id: str) -> Path:
+        return self.directory / f"{channel_id}.json"
+
+    def save(self, checkpoint: ScanCheckpoint) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(checkpoint["channel_id"])
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(checkpoint))
+        # Atomic, so a crash never leaves a half written checkpoint behind.
+        os.replace(tmp_path, path)
+
+    def load(self, channel_id: str) -> Optional[ScanCheckpoint]:
+        try:
+            checkpoint: ScanCheckpoint = json.loads(self._path(channel_id).read_text())
+            return checkpoint
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring corrupt scan checkpoint for {channel_id}")
+            return None
+
+    def delete(self, channel_id: str) -> None:
+        self._path(channel_id).unlink(missing_ok=True)
+
+    def all(self) -> list[ScanCheckpoint]:
+        if not self.directory.exists():
+            return []
+        checkpoints = [self.load(path.stem) for path in self.directory.glob("*.json")]
+        return [checkpoint for checkpoint in checkpoints if checkpoint]
+
+
+class KnownMediaCache:
+    """
+    Bounded LRU of media that has already been submitted for analysis.
+
+    Values are the verdict once known, or None while the analysis is pending.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, Optional[str]] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    def add(self, key: str, status: Optional[str] = None) -> None:
+        self.entries[key] = status
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Awaitable, Callable, Deque, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Priority classes, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BULK = 2
+
+
+class WaitStats:
+    """Running wait-time statistics for one priority class."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "max": self.max}
+
+
+class _Ticket:
+    __slots__ = ("future", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, enqueued_at: float):
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class WorkScheduler:
+    """
+    Runs work with bounded concurrency, serving higher priorities first.
+
+    Within a priority class, owners (users or channels) share the available
+    slots fairly in proportion to their weight, so one owner with a large
+    backlog can't starve the others.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        name: str = "scheduler",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.concurrency = concurrency
+        self.name = name
+        self.clock = clock
+        self.running = 0
+        self.queues: Dict[Priority, Dict[str, Deque[_Ticket]]] = {
+            priority: {} for priority in Priority
+        }
+        self.weights: Dict[str, float] = {}
+        self.wait_stats: Dict[Priority, WaitStats] = {
+            priority: WaitStats() for priority in Priority
+        }
+        # Virtual time per (priority, owner), advanced by 1/weight per grant.
+        self._vtime: Dict[Tuple[Priority, str], float] = {}
+        self._floor: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+
+    def set_weight(self, owner: str, weight: float) -> None:
+        """Give an owner a larger (or smaller) share of its priority class."""
+        self.weights[owner] = weight
+
+    def pending(self, priority: Priority | None = None) -> int:
+        """Number of queued, not yet running, work items."""
+        priorities = [priority] if priority is not None else list(Priority)
+        return sum(len(queue) for p in priorities for queue in self.queues[p].values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Wait-time statistics keyed by priority class name."""
+        return {
+            priority.name.lower(): {
+                **self.wait_stats[priority].as_dict(),
+                "pending": self.pending(priority),
+            }
+            for priority in Priority
+        }
+
+    async def run(
+        self, priority: Priority, owner: str, work: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Wait for a slot and run `work` in it.
+
+        Args:
+            priority: priority class of the work
+            owner: fairness key, e.g. the user or channel the work is for
+            work: factory for the coroutine to run once a slot is granted
+        """
+        await self._acquire(priority, owner)
+        try:
+            return await work()
+        finally:
+            self.running -= 1
+            self._dispatch()
+
+    async def _acquire(self, priority: Priority, owner: str) -> None:
+        ticket = _Ticket(asyncio.get_running_loop().create_future(), self.clock())
+
+        owners = self.queues[priority]
+        if owner not in owners:
+            owners[owner] = deque()
+            # Owners coming back from idle don't get credit for the time they
+            # weren't competing.
+            key = (priority, owner)
+            self._vtime[key] = max(self._vtime.get(key, 0.0), self._floor[priority])
+        owners[owner].append(ticket)
+
+        self._dispatch()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # The slot was granted just as we were cancelled, hand it back.
+                self.running -= 1
+                self._dispatch()
+            else:
+                self._remove(priority, owner, ticket)
+            raise
+
+    def _dispatch(self) -> None:
+        while self.running < self.concurrency:
+            ticket = self._next_ticket()
+            if not ticket:
+                return
+            self.running += 1
+            ticket.future.set_result(None)
+
+    def _next_ticket(self) -> _Ticket | None:
+        for priority in Priority:
+            owners = self.queues[priority]
+            if not owners:
+                continue
+
+            owner = min(owners, key=lambda o: self._vtime[(priority, o)])
+            queue = owners[owner]
+            ticket = queue.popleft()
+            if not queue:
+                del owners[owner]
+
+            key = (priority, owner)
+            self._floor[priority] = self._vtime[key]
+            self._vtime[key] += 1.0 / self.weights.get(owner, 1.0)
+
+            wait = self.clock() - ticket.enqueued_at
+            self.wait_stats[priority].add(wait)
+            logger.debug(
+                f"{self.name}: granted {priority.name} work for {owner} after {wait:.3f}s"
+            )
+            return ticket
+        return None
+
+    def _remove(self, priority: Priority, owner: str, ticket: _Ticket) -> None:
+        queue = self.queues[priority].get(owner)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self.queues[priority][owner]
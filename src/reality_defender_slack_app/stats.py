@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional, TypedDict
+
+
+class PendingAnalysis(TypedDict):
+    channel_id: str
+    filename: Optional[str]
+    submitted_at: float
+
+
+class RecentVerdict(TypedDict):
+    request_id: str
+    channel_id: str
+    filename: Optional[str]
+    status: str
+    score: Optional[float]
+    completed_at: float
+
+
+class UserStats:
+    """A user's pending analyses, latest verdicts and number of each verdict."""
+
+    def __init__(self, recent: int):
+        # Analyses not finished yet, by request ID.
+        self.pending: Dict[str, PendingAnalysis] = {}
+        # Latest verdicts, newest last.
+        self.recent: Deque[RecentVerdict] = deque(maxlen=recent)
+        # Number of analyses finished with each status.
+        self.counts: Counter[str] = Counter()
+
+
+class UserStatsTracker:
+    """
+    Keeps each user's analysis stats up to date as their analyses are
+    submitted and finished, for the App Home dashboard.
+
+    Every update and lookup only touches the user concerned, so showing a
+    user's stats costs the same however many analyses other users have.
+    Users inactive the longest are forgotten beyond `max_users`.
+    """
+
+    def __init__(
+        self,
+        recent: int = 5,
+        clock: Callable[[], float] = time.time,
+        max_users: int = 10000,
+    ):
+        self.recent = recent
+        self.clock = clock
+        self.max_users = max_users
+        self._users: OrderedDict[str, UserStats] = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[UserStats]:
+        """A user's stats, None if they haven't analyzed anything yet."""
+        return self._users.get(user_id)
+
+    def _user(self, user_id: str) -> UserStats:
+        stats = self._users.get(user_id)
+        if stats is None:
+            stats = self._users[user_id] = UserStats(self.recent)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return stats
+
+    def submitted(
+        self,
+        user_id: str,
+        request_id: str,
+        channel_id: str,
+        filename: Optional[str] = None,
+        submitted_at: Optional[float] = None,
+    ) -> None:
+        """Record an analysis being started, or resumed after a restart."""
+        self._user(user_id).pending[request_id] = {
+            "channel_id": channel_id,
+            "filename": filename,
+            "submitted_at": submitted_at or self.clock(),
+        }
+
+    def completed(
+        self,
+        user_id: str,
+        request_id: str,
+        channel_id: str,
+        status: str,
+        score: Optional[float] = None,
+    ) -> None:
+        """Record the verdict of an analysis, pending or not."""
+        stats = self._user(user_id)
+        pending = stats.pending.pop(request_id, None)
+        stats.counts[status] += 1
+        stats.recent.append(
+            {
+                "request_id": request_id,
+                "channel_id": pending["channel_id"] if pending else channel_id,
+                "filename": pending["filename"] if pending else None,
+                "status": status,
+                "score": score,
+                "completed_at": self.clock(),
+            }
+        )
+
+    def dropped(self, user_id: str, request_id: str) -> None:
+        """Forget an analysis that will never finish, e.g. a failed upload."""
+        stats = self._users.get(user_id)
+        if stats:
+            stats.pending.pop(request_id, None)
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Protocol
+
+import aiohttp
+
+from reality_defender_slack_app.performance import dumps
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "reality-defender-slack-app"
+
+
+class Span:
+    """One timed stage of an analysis."""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+        "_tracer",
+    )
+
+    def __init__(
+        self,
+        tracer: Optional[Tracer],
+        name: str,
+        trace_id: int,
+        parent_id: Optional[int],
+        start_ns: int,
+        attributes: Dict[str, Any],
+    ):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        if self._tracer:
+            self.attributes[key] = value
+
+    def end(self, error: Optional[str] = None) -> None:
+        """Close the span and queue it for export, once."""
+        if self.end_ns or not self._tracer:
+            return
+        self.end_ns = time.time_ns()
+        if error:
+            self.error = error
+        self._tracer._finished(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": f"{self.parent_id:016x}" if self.parent_id else None,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "end": self.end_ns / 1e9,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+# Stands in for every span while tracing is off, or for traces not sampled.
+NOOP_SPAN = Span(None, "noop", 0, None, 0, {})
+
+
+class SpanExporter(Protocol):
+    async def export(self, spans: list[Span]) -> None: ...
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _write(self, lines: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def export(self, spans: list[Span]) -> None:
+        lines = "".join(dumps(span.to_dict()) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    otlp: Dict[str, Any] = {
+        "traceId": f"{span.trace_id:032x}",
+        "spanId": f"{span.span_id:016x}",
+        "name": span.name,
+        # SPAN_KIND_INTERNAL
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in span.attributes.items()
+        ],
+        # STATUS_CODE_ERROR or STATUS_CODE_OK
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = f"{span.parent_id:016x}"
+    return otlp
+
+
+class CollectorSpanExporter:
+    """
+    Sends finished spans to a collector, such as the OpenTelemetry Collector or
+    Jaeger, with OTLP over HTTP and JSON (e.g. `http://localhost:4318/v1/traces`).
+    """
+
+    def __init__(self, url: str, session: Optional[aiohttp.ClientSession] = None):
+        self.url = url
+        self._session = session
+
+    async def export(self, spans: list[Span]) -> None:
+        if not self._session or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10), json_serialize=dumps
+            )
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": SERVICE_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        async with self._session.post(self.url, json=payload) as response:
+            if response.status >= 300:
+                raise RuntimeError(
+                    f"Collector answered {response.status}: {await response.text()}"
+                )
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+
+class Tracer:
+    """
+    Times each analysis, from download to notification, as a trace of spans.
+
+    A trace starts with a root span per file, stages are child spans, and the
+    root is looked up by request ID once the file is uploaded. Finished spans
+    are buffered and exported in batches from a background task, so the work
+    done per span is a few attribute assignments. The buffer is bounded: spans
+    are dropped, oldest first, if the exporter can't keep up.
+
+    With no exporter, or for traces not sampled, every span is `NOOP_SPAN`.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        sample_rate: float = 1.0,
+        interval: float = 5.0,
+        batch_size: int = 512,
+        max_buffered: int = 10000,
+        max_open: int = 10000,
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.batch_size = batch_size
+        self._buffer: deque[Span] = deque(maxlen=max_buffered)
+        self.max_open = max_open
+        # Root span of each request being analyzed.
+        self._open: OrderedDict[str, Span] = OrderedDict()
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_trace(self, name: str, **attributes: Any) -> Span:
+        """Start the root span of a new trace, if it is sampled."""
+        if not self.exporter or random.random() >= self.sample_rate:
+            return NOOP_SPAN
+        return Span(
+            self, name, random.getrandbits(128), None, time.time_ns(), attributes
+        )
+
+    def start_span(
+        self,
+        parent: Span,
+        name: str,
+        start: Optional[float] = None,
+        **attributes: Any,
+    ) -> Span:
+        """
+        Start a stage of a trace.
+
+        Args:
+            parent: the span it belongs to
+            name: name of the stage
+            start: when the stage started, as a Unix time, if not now
+        """
+        if parent is NOOP_SPAN:
+            return NOOP_SPAN
+        start_ns = int(start * 1e9) if start is not None else time.time_ns()
+        return Span(self, name, parent.trace_id, parent.span_id, start_ns, attributes)
+
+    @contextlib.contextmanager
+    def span(self, parent: Span, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time a block as a stage, marked as failed if it raises."""
+        span = self.start_span(parent, name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(error=f"{type(e).__name__}: {e}")
+            raise
+        span.end()
+
+    def attach(self, request_id: str, root: Span) -> None:
+        """Follow a trace by the request ID its media was uploaded as."""
+        if root is NOOP_SPAN:
+            return
+        self._open[request_id] = root
+        while len(self._open) > self.max_open:
+            _, stale = self._open.popitem(last=False)
+            stale.end(error="abandoned")
+
+    def get(self, request_id: str) -> Span:
+        return self._open.get(request_id, NOOP_SPAN)
+
+    def detach(self, request_id: str) -> Span:
+        return self._open.pop(request_id, NOOP_SPAN)
+
+    def _finished(self, span: Span) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span)
+
+    async def flush(self) -> None:
+        """Export everything finished so far."""
+        while self._buffer and self.exporter:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self.batch_size, len(self._buffer)))
+            ]
+            try:
+                await self.exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"Dropped {len(batch)} spans, export failed: {e}")
+                return
+
+    async def close(self) -> None:
+        """Export what's left, then release the exporter's connections."""
+        await self.flush()
+        if isinstance(self.exporter, CollectorSpanExporter):
+            await self.exporter.close()
+
+    async def run(self) -> None:
+        """Export finished spans every `interval` seconds."""
+        if not self.exporter:
+            return
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
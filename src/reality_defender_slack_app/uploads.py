@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, TypedDict
+
+import aiohttp
+from realitydefender import RealityDefenderError
+
+from reality_defender_slack_app.breaker import retry_with_backoff
+
+logger = logging.getLogger(__name__)
+
+# Returned by resumable upload endpoints while the upload is incomplete.
+RESUME_INCOMPLETE = 308
+
+_RANGE = re.compile(r"bytes=0-(\d+)")
+
+
+class SignedUpload(TypedDict):
+    request_id: str
+    media_id: str
+    signed_url: str
+
+
+class UploadManifest(TypedDict):
+    request_id: str
+    signed_url: str
+    file_path: str
+    size: int
+    # Bytes the server has acknowledged so far.
+    offset: int
+    # The RequestData to register again when resuming after a restart.
+    request: Dict[str, Any]
+
+
+def parse_signed_url(response: Dict[str, Any]) -> SignedUpload:
+    """
+    Extract the upload details from a Reality Defender signed URL response.
+
+    Raises:
+        RealityDefenderError: if any of them is missing
+    """
+    request_id: str = response.get("requestId", "")
+    media_id: str = response.get("mediaId", "")
+    signed_url: str = (response.get("response") or {}).get("signedUrl", "")
+    if not request_id or not media_id or not signed_url:
+        raise RealityDefenderError(
+            "Invalid response from API - missing requestId, mediaId, or signedUrl",
+            "server_error",
+        )
+    return {"request_id": request_id, "media_id": media_id, "signed_url": signed_url}
+
+
+def _read_chunk(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+class UploadStore:
+    """
+    Persists upload manifests as small JSON files, one per request.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory) / "uploads"
+
+    def _path(self, request_id: str) -> Path:
+        return self.directory / f"{request_id}.json"
+
+    def save(self, manifest: UploadManifest) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(manifest["request_id"])
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest))
+        # Atomic, so a crash never leaves a half written manifest behind.
+        os.replace(tmp_path, path)
+
+    def load(self, request_id: str) -> Optional[UploadManifest]:
+        try:
+            manifest: UploadManifest = json.loads(self._path(request_id).read_text())
+            return manifest
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring corrupt upload manifest for {request_id}")
+            return None
+
+    def delete(self, request_id: str) -> None:
+        self._path(request_id).unlink(missing_ok=True)
+
+    def all(self) -> list[UploadManifest]:
+        if not self.directory.exists():
+            return []
+        manifests = [self.load(path.stem) for path in self.directory.glob("*.json")]
+        return [manifest for manifest in manifests if manifest]
+
+
+class ChunkedUploader:
+    """
+    Uploads large media in chunks with the resumable upload protocol.
+
+    Each chunk is a PUT carrying a `Content-Range` header. The server answers
+    308 with a `Range` header for what it has so far, or 200/201 once the file
+    is complete. Only a failed chunk is sent again, after asking the server
+    how much it already has. Progress is saved to a manifest after every
+    chunk, so an upload interrupted by a restart carries on from there.
+    """
+
+    def __init__(
+        self,
+        store: UploadStore,
+        chunk_size: int = 8388608,
+        attempts: int = 3,
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.attempts = attempts
+        # Bytes sent and total size, per request being uploaded.
+        self.progress: Dict[str, Tuple[int, int]] = {}
+        self._session = session
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Our own session: signed URLs must not receive the API key header.
+        if not self._session or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def percent(self, request_id: str) -> Optional[int]:
+        """How much of an upload is done, if it is in progress."""
+        if request_id not in self.progress:
+            return None
+        sent, size = self.progress[request_id]
+        return int(100 * sent / size) if size else 100
+
+    def start(
+        self, upload: SignedUpload, file_path: str, request: Dict[str, Any]
+    ) -> UploadManifest:
+        """Record a new upload, before any of it is sent."""
+        manifest: UploadManifest = {
+            "request_id": upload["request_id"],
+            "signed_url": upload["signed_url"],
+            "file_path": os.path.abspath(file_path),
+            "size": os.path.getsize(file_path),
+            "offset": 0,
+            "request": request,
+        }
+        self.store.save(manifest)
+        return manifest
+
+    async def upload(self, manifest: UploadManifest) -> None:
+        """
+        Send whatever the server doesn't have yet.
+
+        The manifest is removed once the upload is complete. It is kept when the
+        upload is cancelled, so it can be resumed, and it is up to the caller to
+        discard it after any other error.
+
+        Raises:
+            RealityDefenderError: if a chunk can't be sent
+        """
+        request_id = manifest["request_id"]
+        size = manifest["size"]
+        if manifest["offset"]:
+            manifest["offset"] = await retry_with_backoff(
+                lambda: self._query_offset(manifest), attempts=self.attempts
+            )
+
+        self.progress[request_id] = (manifest["offset"], size)
+        try:
+            while manifest["offset"] < size:
+                manifest["offset"] = await self._send_chunk(manifest)
+                self.progress[request_id] = (manifest["offset"], size)
+                self.store.save(manifest)
+        finally:
+            self.progress.pop(request_id, None)
+
+        self.store.delete(request_id)
+        logger.info(f"Uploaded {size} bytes for {request_id} in chunks")
+
+    async def _send_chunk(self, manifest: UploadManifest) -> int:
+        attempt = 0
+
+        async def send() -> int:
+            nonlocal attempt
+            attempt += 1
+            start = manifest["offset"]
+            if attempt > 1:
+                # The failed chunk may have partly arrived.
+                start = await self._query_offset(manifest)
+            return await self._put_chunk(manifest, start)
+
+        return await retry_with_backoff(send, attempts=self.attempts)
+
+    async def _put_chunk(self, manifest: UploadManifest, start: int) -> int:
+        size = manifest["size"]
+        if start >= size:
+            return size
+        length = min(self.chunk_size, size - start)
+        data = await asyncio.to_thread(
+            _read_chunk, manifest["file_path"], start, length
+        )
+        end = start + length - 1
+        headers = {"Content-Range": f"bytes {start}-{end}/{size}"}
+        return await self._put(manifest, data, headers, end)
+
+    async def _query_offset(self, manifest: UploadManifest) -> int:
+        headers = {"Content-Range": f"bytes */{manifest['size']}"}
+        return await self._put(manifest, b"", headers)
+
+    async def _put(
+        self,
+        manifest: UploadManifest,
+        data: bytes,
+        headers: Dict[str, str],
+        end: Optional[int] = None,
+    ) -> int:
+        """
+        PUT to the signed URL and return how many bytes the server has.
+
+        Args:
+            end: offset of the last byte sent, None when only asking how much
+                the server has
+        """
+        try:
+            async with self._get_session().put(
+                manifest["signed_url"], data=data, headers=headers
+            ) as response:
+                if response.status in (200, 201):
+                    if end is not None and end != manifest["size"] - 1:
+                        # A plain presigned PUT ignores Content-Range and
+                        # keeps this chunk as the whole file.
+                        raise RealityDefenderError(
+                            f"Upload completed after {end + 1} of "
+                            f"{manifest['size']} bytes, the signed URL doesn't "
+                            "accept resumable uploads",
+                            "invalid_request",
+                        )
+                    return manifest["size"]
+                if response.status == RESUME_INCOMPLETE:
+                    match = _RANGE.match(response.headers.get("Range", ""))
+                    return int(match.group(1)) + 1 if match else 0
+
+                message = f"Upload failed with status {response.status}: "
+                message += await response.text()
+                if 400 <= response.status < 500 and response.status not in (408, 429):
+                    # Expired or rejected uploads won't get better by retrying.
+                    raise RealityDefenderError(message, "invalid_request")
+                raise RealityDefenderError(message, "upload_failed")
+        except aiohttp.ClientError as e:
+            raise RealityDefenderError(f"Upload failed: {e}", "upload_failed")
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
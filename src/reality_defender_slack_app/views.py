@@ -1,12 +1,28 @@
-from typing import Any
+from itertools import islice
+from typing import Any, Awaitable, Callable
 
+from reality_defender_slack_app.scan import ScanFinding
+from reality_defender_slack_app.stats import UserStats
 
-async def app_home_default(client: Any, event: Any) -> None:
+# Pending analyses listed on the home tab, at most.
+HOME_PENDING_LIMIT = 10
+
+
+async def app_home_default(
+    client: Any, event: Any, stats: UserStats | None = None
+) -> None:
+    """
+    Publish the home tab of a user who registered their key.
+
+    Args:
+        stats: the user's analyses, shown above the help when given
+    """
     await client.views_publish(
         user_id=event["user"],
         view={
             "type": "home",
             "blocks": [
+                *(_home_dashboard(stats) if stats else []),
                 {
                     "type": "section",
                     "text": {
@@ -43,6 +59,63 @@ async def app_home_default(client: Any, event: Any) -> None:
     )
 
 
+def _home_dashboard(stats: UserStats) -> list[dict[str, Any]]:
+    """Blocks listing a user's pending analyses, latest verdicts and totals."""
+    if stats.pending:
+        lines = [
+            f"⏳ `{analysis['filename'] or 'media'}` in <#{analysis['channel_id']}> "
+            f"(ID: `{request_id}`)"
+            for request_id, analysis in islice(
+                stats.pending.items(), HOME_PENDING_LIMIT
+            )
+        ]
+        if len(stats.pending) > HOME_PENDING_LIMIT:
+            lines.append(f"…and {len(stats.pending) - HOME_PENDING_LIMIT} more")
+        pending = "\n".join(lines)
+    else:
+        pending = "Nothing is being analyzed right now."
+
+    if stats.recent:
+        lines = []
+        for verdict in reversed(stats.recent):
+            emoji, _ = describe_verdict(verdict["status"])
+            score: float = verdict["score"] or 0.0
+            completed_at = int(verdict["completed_at"])
+            lines.append(
+                f"{emoji} <!date^{completed_at}^{{date_short}} {{time}}|{completed_at}> "
+                f"`{verdict['filename'] or 'media'}` - {verdict['status'].lower()} "
+                f"({score:.2%}) in <#{verdict['channel_id']}>"
+            )
+        recent = "\n".join(lines)
+    else:
+        recent = "No results yet."
+
+    counts = [f"{len(stats.pending)} pending"] + [
+        f"{count} {status.lower()}" for status, count in stats.counts.most_common()
+    ]
+    return [
+        {
+            "type": "section",
+            "text": {"type": "mrkdwn", "text": f"⏳ *Pending analyses*\n{pending}"},
+        },
+        {
+            "type": "section",
+            "text": {"type": "mrkdwn", "text": f"🗂️ *Latest results*\n{recent}"},
+        },
+        {
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": " · ".join(counts) + " since the app last started. "
+                    "Use `/analysis-history` to see older results.",
+                }
+            ],
+        },
+        {"type": "divider"},
+    ]
+
+
 async def app_home_first_boot(client: Any, event: Any) -> None:
     await client.views_publish(
         user_id=event["user"],
@@ -95,6 +168,35 @@ async def notify_error_user_unavailable(client: Any, trigger_id: str) -> None:
     )
 
 
+async def notify_error_invalid_key(client: Any, trigger_id: str) -> None:
+    await client.views_open(
+        trigger_id=trigger_id,
+        view={
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Reality Defender"},
+            "close": {"type": "plain_text", "text": "Close"},
+            "blocks": [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": "Reality Defender rejected your API key, so nothing was analyzed.",
+                    },
+                },
+                {
+                    "type": "context",
+                    "elements": [
+                        {
+                            "type": "mrkdwn",
+                            "text": "Use the `/setup-rd your-key` command to register a valid Reality Defender API key.",
+                        }
+                    ],
+                },
+            ],
+        },
+    )
+
+
 async def notify_acknowledge_analysis_request(
     client: Any, trigger_id: str, unsupported: bool = False
 ) -> None:
@@ -168,3 +270,346 @@ async def notify_error_analysis_request(client: Any, trigger_id: str) -> None:
             ],
         },
     )
+
+
+def describe_verdict(status: str) -> tuple[str, str]:
+    """Return the emoji and human-readable text for an analysis status."""
+    if status == "MANIPULATED":
+        return "⚠️", "MANIPULATED CONTENT DETECTED"
+    elif status == "AUTHENTIC":
+        return "✅", "Content appears authentic"
+    return "❓", "Could not determine content authenticity. Please try again later."
+
+
+async def notify_batch_complete(
+    client: Any,
+    channel_id: str,
+    message_ts: str,
+    user_id: str,
+    entries: list[dict[str, Any]],
+    timed_out: bool = False,
+    post: Callable[..., Awaitable[Any]] | None = None,
+) -> None:
+    """
+    Post the results of every file analyzed from one message, in its thread.
+
+    Args:
+        post: posts the summary, `client.chat_postMessage` by default
+    """
+    finished = [entry for entry in entries if entry.get("status") is not None]
+    manipulated = sum(1 for entry in finished if entry["status"] == "MANIPULATED")
+
+    if manipulated:
+        headline = f"⚠️ *Analysis Complete* - {manipulated} of {len(entries)} files flagged as manipulated"
+    else:
+        headline = (
+            f"✅ *Analysis Complete* - {len(finished)} of {len(entries)} files analyzed"
+        )
+
+    lines: list[str] = []
+    for entry in entries:
+        if entry.get("status") is None:
+            lines.append(
+                f"⏳ `{entry['filename']}` - still processing (ID: `{entry['request_id']}`)"
+            )
+            continue
+        emoji, text = describe_verdict(entry["status"])
+        score: float = entry.get("score") or 0.0
+        lines.append(
+            f"{emoji} `{entry['filename']}` - {text} ({score:.2%}) (ID: `{entry['request_id']}`)"
+        )
+
+    blocks: list[dict[str, Any]] = [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"{headline}\n<@{user_id}> Your content analysis is ready:",
+            },
+        },
+        {"type": "divider"},
+        {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines)}},
+    ]
+    if timed_out:
+        blocks.append(
+            {
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": "Some files took too long to analyze. Their results will be posted "
+                        "separately once they are ready.",
+                    }
+                ],
+            }
+        )
+
+    await (post or client.chat_postMessage)(
+        channel=channel_id,
+        thread_ts=message_ts,
+        text=f"{headline}\n" + "\n".join(lines),
+        blocks=blocks,
+    )
+
+
+def preview_message(
+    user_id: str,
+    request_id: str,
+    status: str,
+    score: float | None,
+    full_analysis: str | None = None,
+) -> tuple[str, list[dict[str, Any]]]:
+    """
+    Text and blocks of the preliminary verdict from a file's thumbnail.
+
+    Args:
+        full_analysis: value of the "Analyze full file" button, None when the
+            full file is already being analyzed
+    """
+    emoji, text = describe_verdict(status)
+    lines = [
+        f"{emoji} *Preview Analyzed* - ID: `{request_id}`",
+        f"<@{user_id}> A quick check of your file's thumbnail is ready:",
+        f"*Result:* {text} ({(score or 0.0):.2%})",
+    ]
+    if full_analysis:
+        lines.append("Thumbnails can hide manipulation that only shows at full size.")
+    else:
+        lines.append("🔎 Analyzing the full file to confirm...")
+
+    blocks: list[dict[str, Any]] = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines)}}
+    ]
+    if full_analysis:
+        blocks.append(
+            {
+                "type": "actions",
+                "elements": [
+                    {
+                        "type": "button",
+                        "text": {"type": "plain_text", "text": "Analyze full file"},
+                        "action_id": "analyze_full_file",
+                        "value": full_analysis,
+                    }
+                ],
+            }
+        )
+    return "\n".join(lines), blocks
+
+
+async def notify_preview_complete(
+    client: Any,
+    channel_id: str,
+    message_ts: str,
+    user_id: str,
+    request_id: str,
+    status: str,
+    score: float | None,
+    full_analysis: str | None = None,
+    post: Callable[..., Awaitable[Any]] | None = None,
+) -> None:
+    """
+    Post the preliminary verdict from a file's thumbnail, in its thread.
+
+    Args:
+        full_analysis: value of the "Analyze full file" button, None when the
+            full file is already being analyzed
+        post: posts the verdict, `client.chat_postMessage` by default
+    """
+    text, blocks = preview_message(user_id, request_id, status, score, full_analysis)
+    await (post or client.chat_postMessage)(
+        channel=channel_id, thread_ts=message_ts, text=text, blocks=blocks
+    )
+
+
+# Most manipulated files listed in a scan summary.
+SCAN_FINDINGS_LIMIT = 10
+
+
+def _message_link(channel_id: str, message_ts: str) -> str:
+    return f"https://slack.com/archives/{channel_id}/p{message_ts.replace('.', '')}"
+
+
+async def post_scan_progress(
+    client: Any,
+    channel_id: str,
+    status_ts: str | None,
+    scanned: int,
+    queued: int,
+    skipped: int,
+    done: bool = False,
+    verdicts: dict[str, int] | None = None,
+    manipulated: list[ScanFinding] | None = None,
+    pending: int = 0,
+) -> str | None:
+    """
+    Post or update the single progress message of a channel scan.
+
+    Args:
+        verdicts: number of files found with each verdict so far
+        manipulated: files found manipulated, with their message_ts and filename
+        pending: analyses queued by the scan that haven't finished yet
+
+    Returns:
+        the timestamp of the progress message, to update it later on
+    """
+    if done:
+        headline = "✅ *Channel scan complete*"
+    else:
+        headline = "🔎 *Scanning channel history...*"
+
+    text = (
+        f"{headline}\n"
+        f"Messages scanned: {scanned}\n"
+        f"Files queued for analysis: {queued}\n"
+        f"Files skipped (already analyzed): {skipped}"
+    )
+    if verdicts:
+        counts = ", ".join(
+            f"{describe_verdict(status)[0]} {count} {status.lower()}"
+            for status, count in sorted(verdicts.items())
+        )
+        text += f"\nVerdicts: {counts}"
+    if done and pending:
+        text += f"\nFiles still being analyzed: {pending}"
+    blocks: list[dict[str, Any]] = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+    ]
+    if manipulated:
+        lines = [
+            f"• <{_message_link(channel_id, finding['message_ts'])}|"
+            f"{finding.get('filename') or 'media'}>"
+            for finding in manipulated[:SCAN_FINDINGS_LIMIT]
+        ]
+        if len(manipulated) > SCAN_FINDINGS_LIMIT:
+            lines.append(f"…and {len(manipulated) - SCAN_FINDINGS_LIMIT} more")
+        blocks.append(
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": "⚠️ *Manipulated media found*\n" + "\n".join(lines),
+                },
+            }
+        )
+    if done and pending:
+        blocks.append(
+            {
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": "Results are posted in each message's thread as they become available.",
+                    }
+                ],
+            }
+        )
+
+    if status_ts:
+        await client.chat_update(
+            channel=channel_id, ts=status_ts, text=text, blocks=blocks
+        )
+        return status_ts
+
+    response = await client.chat_postMessage(
+        channel=channel_id, text=text, blocks=blocks
+    )
+    ts: str | None = response.get("ts")
+    return ts
+
+
+async def notify_service_degraded(client: Any, trigger_id: str) -> None:
+    await client.views_open(
+        trigger_id=trigger_id,
+        view={
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Reality Defender"},
+            "close": {"type": "plain_text", "text": "Close"},
+            "blocks": [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": "⏳ Reality Defender is currently degraded and can't accept new analyses. "
+                        "Please try again in a few minutes.",
+                    },
+                }
+            ],
+        },
+    )
+
+
+async def notify_media_rejected(
+    client: Any, trigger_id: str, reasons: list[str]
+) -> None:
+    details = "\n".join(f"• {reason}" for reason in reasons)
+    await client.views_open(
+        trigger_id=trigger_id,
+        view={
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Reality Defender"},
+            "close": {"type": "plain_text", "text": "Close"},
+            "blocks": [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": "Some files attached to this message can't be analyzed:\n"
+                        + details,
+                    },
+                }
+            ],
+        },
+    )
+
+
+async def respond_analysis_history(
+    respond: Any,
+    entries: list[Any],
+    next_page: str | None,
+    replace_original: bool = False,
+) -> None:
+    """
+    Reply to /analysis-history with a page of past analyses.
+
+    Args:
+        respond: responder for the command, or for the "Next page" button
+        entries: the analyses on this page, newest first
+        next_page: value of the "Next page" button, None on the last page
+        replace_original: whether to replace the previous page
+    """
+    if not entries:
+        await respond(text="No analyses found.", replace_original=replace_original)
+        return
+
+    lines: list[str] = []
+    for entry in entries:
+        emoji, _ = describe_verdict(entry["status"])
+        score: float = entry.get("score") or 0.0
+        completed_at = int(entry["completed_at"])
+        lines.append(
+            f"{emoji} <!date^{completed_at}^{{date_short}} {{time}}|{completed_at}> "
+            f"`{entry.get('filename') or 'media'}` - {entry['status'].lower()} "
+            f"({score:.2%}) in <#{entry['channel_id']}> (ID: `{entry['request_id']}`)"
+        )
+
+    text = "🗂️ *Analysis history*\n" + "\n".join(lines)
+    blocks: list[dict[str, Any]] = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+    ]
+    if next_page:
+        blocks.append(
+            {
+                "type": "actions",
+                "elements": [
+                    {
+                        "type": "button",
+                        "text": {"type": "plain_text", "text": "Next page"},
+                        "action_id": "analysis_history_next",
+                        "value": next_page,
+                    }
+                ],
+            }
+        )
+
+    await respond(text=text, blocks=blocks, replace_original=replace_original)
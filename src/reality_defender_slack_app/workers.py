@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from reality_defender_slack_app.scheduler import WaitStats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROCESS = "process"
+THREAD = "thread"
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> Tuple[float, float, T]:
+    """Run `fn` in a worker, reporting when it started and how long it took."""
+    started = time.time()
+    result = fn(*args)
+    return started, time.time() - started, result
+
+
+class MediaWorkers:
+    """
+    Pool running CPU-bound media work off the event loop.
+
+    Work is handed over by file path rather than by buffer: media is already on
+    disk once downloaded, so nothing large is pickled between processes and
+    workers read the file themselves.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        mode: str = PROCESS,
+        executor: Optional[Executor] = None,
+    ):
+        if mode not in (PROCESS, THREAD):
+            raise ValueError(f"Unknown worker mode: {mode}")
+        self.workers = workers
+        self.mode = mode
+        self.in_flight = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_stats = WaitStats()
+        self._executor = executor
+
+    @property
+    def running(self) -> int:
+        """Work items currently being run by a worker."""
+        return min(self.in_flight, self.workers)
+
+    @property
+    def queued(self) -> int:
+        """Work items waiting for a free worker."""
+        return max(0, self.in_flight - self.workers)
+
+    @property
+    def saturation(self) -> float:
+        """Share of the workers in use, above 1 when work is queuing."""
+        return self.in_flight / self.workers
+
+    def _get_executor(self) -> Executor:
+        if not self._executor:
+            if self.mode == PROCESS:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="media"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run `fn(*args)` in the pool.
+
+        In process mode `fn` must be a module level function, and `args`
+        should be small: paths and settings rather than file contents.
+        """
+        submitted = time.time()
+        self.in_flight += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            started, elapsed, result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _timed, fn, *args
+            )
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.busy_seconds += elapsed
+        self.wait_stats.add(max(0.0, started - submitted))
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Saturation metrics for the pool."""
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "saturation": self.saturation,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": self.busy_seconds,
+            "mean_wait": self.wait_stats.mean,
+            "max_wait": self.wait_stats.max,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
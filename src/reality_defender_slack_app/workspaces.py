@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+from slack_sdk.oauth.installation_store.async_installation_store import (
+    AsyncInstallationStore,
+)
+from slack_sdk.web.async_client import AsyncWebClient
+
+logger = logging.getLogger(__name__)
+
+
+class WorkspaceNotInstalledError(Exception):
+    """Raised when there is no bot installation for a workspace."""
+
+    def __init__(self, team_id: Optional[str]):
+        super().__init__(f"The app is not installed in workspace {team_id}")
+        self.team_id = team_id
+
+
+class Workspaces:
+    """
+    Slack clients and resource limits for each workspace served.
+
+    With a single workspace everything goes through the app's own client and
+    token. When serving several, each workspace's bot token is looked up in
+    the installation store, and its client is created once and reused. Each
+    workspace can also be capped to a number of concurrent uploads, so one
+    busy workspace can't take every upload slot.
+    """
+
+    def __init__(
+        self,
+        default_client: AsyncWebClient,
+        default_token: str = "",
+        installation_store: Optional[AsyncInstallationStore] = None,
+        team_concurrency: int = 0,
+    ):
+        self.default_client = default_client
+        self.default_token = default_token
+        self.installation_store = installation_store
+        self.team_concurrency = team_concurrency
+        self._clients: Dict[str, AsyncWebClient] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        # Upload slots held per workspace.
+        self.in_use: Dict[str, int] = {}
+
+    @property
+    def multi_workspace(self) -> bool:
+        return self.installation_store is not None
+
+    async def token(self, team_id: Optional[str]) -> str:
+        """
+        Bot token to use for a workspace.
+
+        Raises:
+            WorkspaceNotInstalledError: if the app isn't installed there
+        """
+        if not self.installation_store:
+            return self.default_token
+
+        bot = await self.installation_store.async_find_bot(
+            enterprise_id=None, team_id=team_id
+        )
+        if not bot or not bot.bot_token:
+            raise WorkspaceNotInstalledError(team_id)
+        return bot.bot_token
+
+    async def client(self, team_id: Optional[str]) -> AsyncWebClient:
+        """
+        Slack client for a workspace.
+
+        Raises:
+            WorkspaceNotInstalledError: if the app isn't installed there
+        """
+        if not self.installation_store:
+            return self.default_client
+
+        key = team_id or ""
+        client = self._clients.get(key)
+        if not client:
+            client = AsyncWebClient(
+                token=await self.token(team_id),
+                logger=self.default_client.logger,
+                # Share the app's pool of connections to Slack.
+                session=self.default_client.session,
+            )
+            self._clients[key] = client
+        return client
+
+    def forget(self, team_id: Optional[str]) -> None:
+        """Drop what's cached for a workspace, e.g. once the app is uninstalled."""
+        self._clients.pop(team_id or "", None)
+        self._limits.pop(team_id or "", None)
+
+    @contextlib.asynccontextmanager
+    async def limit(self, team_id: Optional[str]) -> AsyncIterator[None]:
+        """Hold one of the workspace's upload slots, if they are capped."""
+        if not self.team_concurrency:
+            yield
+            return
+
+        key = team_id or ""
+        semaphore = self._limits.get(key)
+        if not semaphore:
+            semaphore = asyncio.Semaphore(self.team_concurrency)
+            self._limits[key] = semaphore
+        async with semaphore:
+            self.in_use[key] = self.in_use.get(key, 0) + 1
+            try:
+                yield
+            finally:
+                self.in_use[key] -= 1
+                if not self.in_use[key]:
+                    del self.in_use[key]
@@ -0,0 +1,11 @@
+class FakeClock:
+    """A clock that only moves when told to, for `clock` arguments."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from reality_defender_slack_app.autoscan import AutoScanPolicy, TokenBucket
+from tests.conftest import FakeClock
+
+
+def test_token_bucket_refills_over_time() -> None:
+    """Test that the token bucket refills at the configured rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=2, clock=clock)
+
+    assert bucket.take()
+    assert bucket.take()
+    assert not bucket.take()
+
+    clock.now = 30.0
+    assert bucket.take()
+    assert not bucket.take()
+
+
+def test_token_bucket_admits_more_than_capacity_in_debt() -> None:
+    """Test that taking more tokens than the bucket holds waits for a full bucket."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=2, clock=clock)
+
+    assert bucket.take(5)
+    assert bucket.tokens == -3
+    clock.now = 60.0
+    assert not bucket.take()
+    clock.now = 120.0
+    assert not bucket.take(5)
+    clock.now = 150.0
+    assert bucket.take(5)
+
+
+def test_policy_requires_opt_in() -> None:
+    """Test that channels have to opt in to auto-scan."""
+    policy = AutoScanPolicy(channels=["C1"])
+
+    assert policy.admit("C1")
+    assert not policy.admit("C2")
+
+    policy.enable("C2")
+    assert policy.admit("C2")
+
+    policy.disable("C1")
+    assert not policy.admit("C1")
+
+
+def test_policy_sampling() -> None:
+    """Test that only the sampled fraction of messages is admitted."""
+    values = iter([0.1, 0.9])
+    policy = AutoScanPolicy(channels=["C1"], sample_rate=0.5, rng=lambda: next(values))
+
+    assert policy.admit("C1")
+    assert not policy.admit("C1")
+
+
+def test_policy_rate_limits_per_channel() -> None:
+    """Test that each channel has its own rate limit."""
+    clock = FakeClock()
+    policy = AutoScanPolicy(channels=["C1", "C2"], rate_per_minute=2, clock=clock)
+
+    assert policy.admit("C1", items=2)
+    assert not policy.admit("C1")
+    assert policy.admit("C2")
+
+
+def test_policy_opt_ins_survive_restarts(tmp_path: Path) -> None:
+    """Test that channels opted in or out are saved to the state directory."""
+    policy = AutoScanPolicy(channels=["C1"], directory=str(tmp_path))
+    policy.load()
+    policy.enable("C2")
+    policy.disable("C1")
+
+    restarted = AutoScanPolicy(channels=["C1", "C3"], directory=str(tmp_path))
+    restarted.load()
+    assert restarted.channels == {"C2", "C3"}
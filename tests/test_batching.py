@@ -0,0 +1,101 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from reality_defender_slack_app.batching import BatchTracker
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_once_all_results_are_in() -> None:
+    """Test that a batch is flushed when its last file finishes."""
+    on_flush = AsyncMock()
+    tracker = BatchTracker(on_flush, timeout=60)
+
+    key = tracker.open("C1", "111.222", "U1", expected=2)
+    tracker.attach(key, "req1", "a.png")
+    tracker.attach(key, "req2", "b.mp4")
+
+    assert await tracker.record(key, "req1", {"status": "AUTHENTIC", "score": 0.1})
+    on_flush.assert_not_called()
+
+    assert await tracker.record(key, "req2", {"status": "MANIPULATED", "score": 0.9})
+    on_flush.assert_called_once()
+
+    batch, timed_out = on_flush.call_args[0]
+    assert timed_out is False
+    assert batch.key == ("C1", "111.222")
+    assert batch.entries["req2"]["status"] == "MANIPULATED"
+    assert key not in tracker.batches
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_partial_results_on_timeout() -> None:
+    """Test that a batch is flushed with partial results when it times out."""
+    on_flush = AsyncMock()
+    tracker = BatchTracker(on_flush, timeout=0.01)
+
+    key = tracker.open("C1", "111.222", "U1", expected=2)
+    tracker.attach(key, "req1", "a.png")
+    tracker.attach(key, "req2", "b.png")
+    await tracker.record(key, "req1", {"status": "AUTHENTIC", "score": 0.1})
+
+    await asyncio.sleep(0.05)
+
+    on_flush.assert_called_once()
+    batch, timed_out = on_flush.call_args[0]
+    assert timed_out is True
+    assert batch.entries["req2"]["status"] is None
+
+    # Late results are no longer part of a batch.
+    assert not await tracker.record(key, "req2", {"status": "AUTHENTIC"})
+
+
+@pytest.mark.asyncio
+async def test_record_unknown_request_is_not_consumed() -> None:
+    """Test that results outside any batch are left to the caller."""
+    tracker = BatchTracker(AsyncMock(), timeout=60)
+
+    assert not await tracker.record(("C1", "1"), "req1", {"status": "AUTHENTIC"})
+
+
+@pytest.mark.asyncio
+async def test_seal_completes_batch_with_uploaded_files() -> None:
+    """Test that sealing a batch stops waiting for files that never uploaded."""
+    on_flush = AsyncMock()
+    tracker = BatchTracker(on_flush, timeout=60)
+
+    key = tracker.open("C1", "111.222", "U1", expected=3)
+    tracker.attach(key, "req1", "a.png")
+    await tracker.record(key, "req1", {"status": "AUTHENTIC", "score": 0.2})
+    on_flush.assert_not_called()
+
+    await tracker.seal(key)
+
+    on_flush.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_seal_empty_batch_is_discarded() -> None:
+    """Test that a batch without any upload is dropped silently."""
+    on_flush = AsyncMock()
+    tracker = BatchTracker(on_flush, timeout=60)
+
+    key = tracker.open("C1", "111.222", "U1", expected=2)
+    await tracker.seal(key)
+
+    on_flush.assert_not_called()
+    assert key not in tracker.batches
+
+
+@pytest.mark.asyncio
+async def test_open_joins_existing_batch() -> None:
+    """Test that running the shortcut twice on a message joins the same batch."""
+    tracker = BatchTracker(AsyncMock(), timeout=60)
+
+    first = tracker.open("C1", "111.222", "U1", expected=2)
+    second = tracker.open("C1", "111.222", "U1", expected=1)
+
+    assert first == second
+    assert tracker.batches[first].expected == 3
+    await tracker.seal(first)
@@ -0,0 +1,145 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from realitydefender import RealityDefenderError
+
+from reality_defender_slack_app.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    retry_with_backoff,
+)
+from tests.conftest import FakeClock
+
+
+def test_breaker_opens_on_error_rate() -> None:
+    """Test that the breaker opens once enough calls fail."""
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4)
+
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.is_open
+    assert not breaker.allow()
+
+
+def test_breaker_opens_on_slow_calls() -> None:
+    """Test that calls slower than the latency threshold count as failures."""
+    breaker = CircuitBreaker("test", latency_threshold=1.0, min_calls=2)
+
+    breaker.record_success(5.0)
+    breaker.record_success(5.0)
+
+    assert breaker.state == OPEN
+
+
+def test_breaker_half_open_probe() -> None:
+    """Test that a single probe is let through after the reset timeout."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", min_calls=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 10.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_failed_probe_reopens() -> None:
+    """Test that a failed probe re-opens the breaker for another timeout."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", min_calls=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert breaker.retry_after == 10.0
+
+
+@pytest.mark.asyncio
+async def test_breaker_call_rejects_when_open() -> None:
+    """Test that calls fail fast while the breaker is open."""
+    breaker = CircuitBreaker("test", min_calls=1)
+    breaker.record_failure()
+    work = AsyncMock()
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(work)
+
+    work.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignores_client_errors() -> None:
+    """Test that errors caused by the request don't open the breaker."""
+    breaker = CircuitBreaker("test", min_calls=1)
+    work = AsyncMock(side_effect=RealityDefenderError("bad key", "unauthorized"))
+
+    with pytest.raises(RealityDefenderError):
+        await breaker.call(work)
+
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_retry_with_backoff_retries_server_errors() -> None:
+    """Test that transient failures are retried with jittered backoff."""
+    work = AsyncMock(side_effect=[RealityDefenderError("boom", "server_error"), "ok"])
+    sleep = AsyncMock()
+
+    result = await retry_with_backoff(
+        work, attempts=3, base_delay=1.0, sleep=sleep, rng=lambda: 0.5
+    )
+
+    assert result == "ok"
+    assert work.call_count == 2
+    sleep.assert_called_once_with(0.5)
+
+
+@pytest.mark.asyncio
+async def test_retry_with_backoff_gives_up() -> None:
+    """Test that the last error is raised once attempts run out."""
+    work = AsyncMock(side_effect=RealityDefenderError("boom", "server_error"))
+
+    with pytest.raises(RealityDefenderError):
+        await retry_with_backoff(work, attempts=3, sleep=AsyncMock())
+
+    assert work.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_with_backoff_skips_client_errors() -> None:
+    """Test that client errors are not retried."""
+    work = AsyncMock(side_effect=RealityDefenderError("bad", "invalid_file"))
+
+    with pytest.raises(RealityDefenderError):
+        await retry_with_backoff(work, attempts=3, sleep=AsyncMock())
+
+    assert work.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_with_backoff_stops_when_breaker_opens() -> None:
+    """Test that retries stop as soon as the breaker opens."""
+    breaker = CircuitBreaker("test", min_calls=1)
+    work = AsyncMock(side_effect=RealityDefenderError("boom", "server_error"))
+
+    with pytest.raises(RealityDefenderError):
+        await retry_with_backoff(work, attempts=5, breaker=breaker, sleep=AsyncMock())
+
+    assert work.call_count == 1
+    assert breaker.state == OPEN
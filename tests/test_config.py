@@ -1,5 +1,6 @@
 import os
 import logging
+import pytest
 from unittest.mock import patch, MagicMock
 from reality_defender_slack_app.config import Config, load_config, setup_logging
 
@@ -60,6 +61,28 @@ def test_load_config_from_os_environ() -> None:
     assert config.log_level == "ERROR"
 
 
+@patch.dict(
+    os.environ,
+    {
+        "SLACK_BOT_TOKEN": "xoxb-os-token",
+        "SLACK_APP_TOKEN": "xapp-os-token",
+    },
+)
+@patch("reality_defender_slack_app.config.load_dotenv")
+def test_load_config_reads_dotenv(mock_load_dotenv: MagicMock) -> None:
+    """Test that .env is only read when loading from os.environ."""
+    load_config(
+        {
+            "SLACK_BOT_TOKEN": "xoxb-env-token",
+            "SLACK_APP_TOKEN": "xapp-env-token",
+        }
+    )
+    mock_load_dotenv.assert_not_called()
+
+    load_config()
+    mock_load_dotenv.assert_called_once_with()
+
+
 @patch("reality_defender_slack_app.config.logging.basicConfig")
 def test_setup_logging_default_level(mock_basic_config: MagicMock) -> None:
     """Test setup_logging with default INFO level."""
@@ -137,3 +160,14 @@ def test_setup_logging_with_all_levels(mock_basic_config: MagicMock) -> None:
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
+
+
+def test_config_with_installation_store() -> None:
+    """Test that a bot token isn't needed when serving several workspaces."""
+    config = Config.model_validate(
+        {"SLACK_APP_TOKEN": "xapp-test-token", "SLACK_INSTALLATION_DIR": "./installs"}
+    )
+    assert config.slack_bot_token == ""
+
+    with pytest.raises(ValueError):
+        Config.model_validate({"SLACK_APP_TOKEN": "xapp-test-token"})
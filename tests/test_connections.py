@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from reality_defender_slack_app.connections import (
+    create_session,
+    open_connection,
+    warm_up,
+)
+
+
+async def _fails() -> None:
+    raise ConnectionError("refused")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_each_connection(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that failed and slow connections are reported, not raised."""
+    never = asyncio.Event()
+
+    with caplog.at_level(logging.WARNING):
+        elapsed = await warm_up(
+            {"fast": asyncio.sleep(0), "broken": _fails(), "slow": never.wait()},
+            timeout=0.1,
+        )
+
+    assert elapsed["fast"] is not None
+    assert elapsed["broken"] is None
+    assert elapsed["slow"] is None
+    assert "Could not connect to broken ahead of time" in caplog.text
+    assert "Connecting to slow took over 0.1s" in caplog.text
+    assert await warm_up({}, timeout=1) == {}
+
+
+@pytest.mark.asyncio
+async def test_open_connection_is_kept_for_reuse() -> None:
+    """Test that a warmed up connection is reused by the next request."""
+    peers: list[Any] = []
+
+    async def handle(request: web.Request) -> web.Response:
+        peers.append(
+            request.transport.get_extra_info("peername") if request.transport else None
+        )
+        return web.Response(status=404)
+
+    web_app = web.Application()
+    web_app.router.add_route("*", "/{tail:.*}", handle)
+    async with TestServer(web_app) as server:
+        session = create_session()
+        try:
+            await open_connection(session, str(server.make_url("/")))
+            async with session.get(server.make_url("/api/test")) as response:
+                assert response.status == 404
+        finally:
+            await session.close()
+
+    assert len(peers) == 2
+    # Both requests came in over the same connection.
+    assert peers[0] == peers[1]
@@ -0,0 +1,80 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from realitydefender import RealityDefender, RealityDefenderError
+
+from reality_defender_slack_app.credentials import (
+    INVALID,
+    UNKNOWN,
+    VALID,
+    KeyValidator,
+)
+
+
+@pytest.mark.asyncio
+async def test_validate_remembers_outcome_until_ttl() -> None:
+    """Test that keys are checked once per TTL."""
+    now = 0.0
+    check = AsyncMock()
+    validator = KeyValidator(ttl=60, check=check, clock=lambda: now)
+    client = RealityDefender(api_key="good-key")
+
+    assert validator.status("good-key") is None
+    assert await validator.validate(client) == VALID
+    assert await validator.validate(client) == VALID
+    assert validator.status("good-key") == VALID
+    assert check.call_count == 1
+
+    now = 61.0
+    assert validator.status("good-key") is None
+    assert await validator.validate(client) == VALID
+    assert check.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_rejected_key() -> None:
+    """Test that keys refused by Reality Defender are remembered as invalid."""
+    check = AsyncMock(
+        side_effect=RealityDefenderError("Invalid API key", "unauthorized")
+    )
+    validator = KeyValidator(check=check)
+
+    assert await validator.validate(RealityDefender(api_key="bad-key")) == INVALID
+    assert validator.status("bad-key") == INVALID
+    assert validator.status("other-key") is None
+
+
+@pytest.mark.asyncio
+async def test_validate_unreachable_api_is_not_remembered() -> None:
+    """Test that a key that couldn't be checked is checked again next time."""
+    check = AsyncMock(
+        side_effect=[RealityDefenderError("HTTP request failed", "server_error"), None]
+    )
+    validator = KeyValidator(check=check)
+    client = RealityDefender(api_key="some-key")
+
+    assert await validator.validate(client) == UNKNOWN
+    assert validator.status("some-key") is None
+    assert await validator.validate(client) == VALID
+
+
+@pytest.mark.asyncio
+async def test_validate_shares_concurrent_checks() -> None:
+    """Test that a key being checked isn't checked again at the same time."""
+    release = asyncio.Event()
+
+    async def check(_client: RealityDefender) -> None:
+        await release.wait()
+
+    validator = KeyValidator(check=check)
+    client = RealityDefender(api_key="slow-key")
+
+    # Callers that can't wait get an unknown outcome, the check carries on.
+    assert await validator.validate(client, wait=0.01) == UNKNOWN
+    waiting = asyncio.gather(validator.validate(client), validator.validate(client))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert list(await waiting) == [VALID, VALID]
+    assert validator.status("slow-key") == VALID
@@ -0,0 +1,113 @@
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from reality_defender_slack_app.delivery import (
+    CHANNEL,
+    DM,
+    EPHEMERAL,
+    ChannelAccess,
+    Delivery,
+    is_undeliverable,
+)
+
+
+def _slack_error(error: str) -> SlackApiError:
+    return SlackApiError(error, {"ok": False, "error": error})
+
+
+def _client(**errors: Any) -> AsyncMock:
+    client = AsyncMock()
+    client.conversations_open.return_value = {"channel": {"id": "D1"}}
+    for method, error in errors.items():
+        getattr(client, method).side_effect = error
+    return client
+
+
+def test_is_undeliverable() -> None:
+    """Test that only errors about access to the channel are undeliverable."""
+    assert is_undeliverable(_slack_error("not_in_channel"))
+    assert is_undeliverable(_slack_error("channel_not_found"))
+    assert not is_undeliverable(_slack_error("ratelimited"))
+    assert not is_undeliverable(ValueError("not_in_channel"))
+
+
+@pytest.mark.asyncio
+async def test_post_in_channel() -> None:
+    """Test that messages are posted in the channel's thread when possible."""
+    delivery = Delivery(ChannelAccess())
+    client = _client()
+
+    route = await delivery.post(client, "C1", "U1", "Done", thread_ts="1.0")
+
+    assert route == CHANNEL
+    client.chat_postMessage.assert_called_once_with(
+        channel="C1", thread_ts="1.0", text="Done"
+    )
+    assert delivery.access.route("C1") == CHANNEL
+
+
+@pytest.mark.asyncio
+async def test_post_falls_back_to_ephemeral() -> None:
+    """Test that the requester is told in the channel when the bot can't post."""
+    delivery = Delivery(ChannelAccess())
+    client = _client(chat_postMessage=_slack_error("restricted_action"))
+
+    route = await delivery.post(client, "C1", "U1", "Done", thread_ts="1.0")
+
+    assert route == EPHEMERAL
+    client.chat_postEphemeral.assert_called_once_with(
+        channel="C1", user="U1", thread_ts="1.0", text="Done"
+    )
+
+    # The channel isn't tried again.
+    client.chat_postMessage.reset_mock()
+    await delivery.post(client, "C1", "U1", "Done again", thread_ts="2.0")
+    client.chat_postMessage.assert_not_called()
+    assert client.chat_postEphemeral.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_post_falls_back_to_dm() -> None:
+    """Test that results from channels the bot isn't in go to a direct message."""
+    delivery = Delivery(ChannelAccess())
+    client = _client(chat_postEphemeral=_slack_error("channel_not_found"))
+    client.chat_postMessage.side_effect = [_slack_error("not_in_channel"), {}]
+    blocks = [{"type": "divider"}]
+
+    route = await delivery.post(client, "G1", "U1", "Done", "1.0", blocks=blocks)
+
+    assert route == DM
+    client.conversations_open.assert_called_once_with(users="U1")
+    client.chat_postMessage.assert_called_with(channel="D1", text="Done", blocks=blocks)
+    assert delivery.access.stats() == {CHANNEL: 0, EPHEMERAL: 0, DM: 1}
+
+
+@pytest.mark.asyncio
+async def test_post_raises_other_errors() -> None:
+    """Test that errors unrelated to channel access don't trigger a fallback."""
+    delivery = Delivery(ChannelAccess())
+    client = _client(chat_postMessage=_slack_error("ratelimited"))
+
+    with pytest.raises(SlackApiError):
+        await delivery.post(client, "C1", "U1", "Done")
+
+    client.chat_postEphemeral.assert_not_called()
+    assert delivery.access.route("C1") is None
+
+
+def test_channel_access_expires_and_forgets() -> None:
+    """Test that routes are forgotten after the TTL or on request."""
+    now = 0.0
+    access = ChannelAccess(ttl=60, clock=lambda: now)
+    access.remember("C1", DM)
+    access.remember("C2", DM)
+
+    access.forget("C1")
+    assert access.route("C1") is None
+    assert access.route("C2") == DM
+
+    now = 61.0
+    assert access.route("C2") is None
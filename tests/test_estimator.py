@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from reality_defender_slack_app.estimator import (
+    CompletionEstimator,
+    media_kind,
+    size_bucket,
+)
+
+
+def test_size_bucket() -> None:
+    """Test that sizes are grouped in buckets growing four times at a time."""
+    assert size_bucket(50000) == "<1MB"
+    assert size_bucket(1048576) == "<4MB"
+    assert size_bucket(100 * 1048576) == "<256MB"
+    assert size_bucket(500 * 1048576) == "256MB+"
+
+
+def test_media_kind() -> None:
+    """Test that file types are grouped by kind of media."""
+    assert media_kind("png") == "image"
+    assert media_kind("MP4") == "video"
+    assert media_kind("flac") == "audio"
+    assert media_kind(None) == "other"
+
+
+def test_estimates_fall_back_to_kind_then_default() -> None:
+    """Test that unseen buckets borrow from their kind, unseen kinds the default."""
+    estimator = CompletionEstimator(5.0)
+    assert estimator.predict("png", 50000) == 5.0
+
+    estimator.observe("png", 50000, 2.0, predicted=5.0)
+
+    assert estimator.predict("jpg", 60000) == 2.0
+    assert estimator.predict("png", 40 * 1048576) == 2.0
+    assert estimator.predict("mp4", 50000) == 5.0
+
+
+def test_estimates_are_smoothed() -> None:
+    """Test that estimates move part of the way towards each observation."""
+    estimator = CompletionEstimator(5.0, alpha=0.5)
+    estimator.observe("mp4", 300 * 1048576, 60.0, predicted=5.0)
+    estimator.observe("mp4", 300 * 1048576, 80.0, predicted=60.0)
+    estimator.observe("mp4", 2 * 1048576, 10.0, predicted=70.0)
+
+    assert estimator.predict("mov", 300 * 1048576) == 70.0
+    assert estimator.predict("mov", 2 * 1048576) == 10.0
+    stats = estimator.stats()
+    assert stats["video:256MB+"] == {
+        "seconds": 70.0,
+        "bias": 37.5,
+        "error": 37.5,
+        "samples": 2,
+    }
+    assert estimator.dirty
+    # Every video counts towards the kind.
+    assert stats["video"]["samples"] == 3
+    assert stats["video"]["seconds"] == pytest.approx(40.0)
+
+
+def test_estimates_survive_restarts(tmp_path: Path) -> None:
+    """Test that estimates are saved to and loaded from the state directory."""
+    estimator = CompletionEstimator(5.0, directory=str(tmp_path))
+    estimator.load()
+    estimator.observe("wav", 3 * 1048576, 8.0, predicted=5.0)
+    estimator.save()
+    assert not estimator.dirty
+
+    restarted = CompletionEstimator(5.0, directory=str(tmp_path))
+    restarted.load()
+    assert restarted.predict("wav", 3 * 1048576) == 8.0
+
+
+def test_unreadable_estimates_are_ignored(tmp_path: Path) -> None:
+    """Test that a corrupt estimates file doesn't stop the app from starting."""
+    (tmp_path / "estimates.json").write_text("{not json")
+    estimator = CompletionEstimator(5.0, directory=str(tmp_path))
+    estimator.load()
+    assert estimator.predict("png", 1000) == 5.0
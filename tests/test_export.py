@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from reality_defender_slack_app.export import (
+    EXPORT_FIELDS,
+    main,
+    parse_export_args,
+    write_export,
+)
+from reality_defender_slack_app.history import HistoryEntry, HistoryStore
+
+
+def _entry(index: int) -> HistoryEntry:
+    return {
+        "id": index,
+        "request_id": f"req{index}",
+        "team_id": None,
+        "user_id": "U123",
+        "channel_id": "C123",
+        "message_ts": "1.0",
+        "filename": "photo.png",
+        "status": "MANIPULATED",
+        "score": 0.9,
+        "submitted_at": 1000.0,
+        "completed_at": 1012.5,
+        "media_key": None,
+    }
+
+
+async def _fill(path: Path, count: int) -> None:
+    store = HistoryStore(str(path))
+    for index in range(count):
+        await store.record(
+            f"req{index}",
+            "U123",
+            "C123",
+            "1.0",
+            "AUTHENTIC" if index % 2 else "MANIPULATED",
+            score=0.5,
+            submitted_at=1000.0 + index,
+            completed_at=1010.0 + index,
+        )
+    store.close()
+
+
+def test_write_jsonl() -> None:
+    """Test that each analysis is a JSON line with its timing."""
+    out = io.StringIO()
+
+    assert write_export([_entry(1), _entry(2)], out, "jsonl") == 2
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record["request_id"] for record in records] == ["req1", "req2"]
+    assert records[0]["completed_at"] == "1970-01-01T00:16:52.500000+00:00"
+    assert records[0]["duration_seconds"] == 12.5
+    assert tuple(records[0]) == EXPORT_FIELDS
+
+
+def test_write_csv() -> None:
+    """Test that the CSV export has a header and one row per analysis."""
+    out = io.StringIO()
+
+    assert write_export([_entry(1)], out, "csv") == 1
+
+    [row] = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert row["request_id"] == "req1"
+    assert row["status"] == "MANIPULATED"
+    assert row["team_id"] == ""
+
+
+def test_write_csv_defuses_formulas() -> None:
+    """Test that Slack text is never run as a formula when the CSV is opened."""
+    entry = _entry(1)
+    entry["filename"] = '=HYPERLINK("https://evil")'
+    out = io.StringIO()
+
+    write_export([entry], out, "csv")
+    jsonl = io.StringIO()
+    write_export([entry], jsonl, "jsonl")
+
+    [row] = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert row["filename"] == '\'=HYPERLINK("https://evil")'
+    assert row["score"] == "0.9"
+    assert json.loads(jsonl.getvalue())["filename"] == entry["filename"]
+
+
+def test_write_export_consumes_entries_lazily() -> None:
+    """Test that entries are written as they come, not gathered first."""
+    out = io.StringIO()
+    written: list[int] = []
+
+    def entries() -> Iterator[HistoryEntry]:
+        for index in range(3):
+            # Everything before this entry is already written.
+            written.append(out.getvalue().count("\n"))
+            yield _entry(index)
+
+    write_export(entries(), out, "jsonl")
+    assert written == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_iter_entries_reads_in_chunks(tmp_path: Path) -> None:
+    """Test that every entry is read once, across chunk boundaries."""
+    path = tmp_path / "history.sqlite3"
+    await _fill(path, 25)
+
+    store = HistoryStore(str(path))
+    entries = list(store.iter_entries({}, chunk_size=10))
+    assert [entry["request_id"] for entry in entries] == [
+        f"req{index}" for index in reversed(range(25))
+    ]
+    assert len(list(store.iter_entries({"status": "AUTHENTIC"}, chunk_size=4))) == 12
+    assert list(HistoryStore(str(tmp_path / "missing.sqlite3")).iter_entries({})) == []
+
+
+def test_parse_export_args() -> None:
+    """Test reading the /analysis-export arguments."""
+    assert parse_export_args("") == ("jsonl", {})
+    assert parse_export_args("CSV manipulated 30d", now=2592000.0) == (
+        "csv",
+        {"status": "MANIPULATED", "since": 0.0},
+    )
+    assert parse_export_args("xlsx") is None
+
+
+@pytest.mark.asyncio
+async def test_cli(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test exporting from the command line."""
+    await _fill(tmp_path / "history.sqlite3", 4)
+    output = tmp_path / "analyses.csv"
+
+    assert (
+        main(
+            [
+                "--state-dir",
+                str(tmp_path),
+                "--format",
+                "csv",
+                "--status",
+                "authentic",
+                "--output",
+                str(output),
+            ]
+        )
+        == 0
+    )
+
+    with open(output, newline="", encoding="utf-8") as exported:
+        rows = list(csv.DictReader(exported))
+    assert [row["request_id"] for row in rows] == ["req3", "req1"]
+    assert "Exported 2 analyses" in capsys.readouterr().err
+
+    assert main(["--state-dir", str(tmp_path / "empty")]) == 1
@@ -0,0 +1,138 @@
+from typing import Any, AsyncIterator, Iterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+
+from reality_defender_slack_app.app import App
+from reality_defender_slack_app.health import HealthServer, LoopMonitor
+from reality_defender_slack_app.scheduler import Priority
+from tests.conftest import FakeClock
+
+
+@pytest.fixture
+def app(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> Iterator[App]:
+    monkeypatch.chdir(tmp_path)
+    with (
+        patch("reality_defender_slack_app.app.AsyncApp"),
+        patch("reality_defender_slack_app.app.AsyncSocketModeHandler") as handler,
+    ):
+        handler.return_value.client.is_connected = AsyncMock(return_value=True)
+        yield App(slack_bot_token="xoxb-test", slack_app_token="xapp-test")
+
+
+@pytest_asyncio.fixture
+async def server(app: App) -> AsyncIterator[tuple[HealthServer, FakeClock, TestClient]]:
+    clock = FakeClock(100.0)
+    health = HealthServer(app, monitor=LoopMonitor(interval=0.5, clock=clock))
+    async with TestClient(TestServer(health.web_app)) as client:
+        yield health, clock, client
+
+
+@pytest.mark.asyncio
+async def test_liveness_follows_loop_lag(
+    server: tuple[HealthServer, FakeClock, TestClient],
+) -> None:
+    """Test that liveness fails when the loop lags or stops ticking."""
+    health, clock, client = server
+
+    response = await client.get("/healthz")
+    assert response.status == 200
+    assert (await response.json())["alive"] is True
+
+    health.monitor.lag = 2.5
+    response = await client.get("/healthz")
+    assert response.status == 503
+    assert (await response.json())["loop_lag"] == 2.5
+
+    health.monitor.lag = 0.0
+    clock.now += 5
+    response = await client.get("/healthz")
+    assert response.status == 503
+    assert (await response.json())["stalled_for"] == 4.5
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_measures_lag() -> None:
+    """Test that a late timer is reported as lag."""
+    clock = FakeClock(100.0)
+    monitor = LoopMonitor(interval=0.5, clock=clock)
+    sleeps = 0
+
+    async def late_sleep(delay: float) -> None:
+        nonlocal sleeps
+        sleeps += 1
+        if sleeps > 1:
+            raise StopAsyncIteration
+        # The loop was held for 1.5s more than the timer asked for.
+        clock.now += delay + 1.5
+
+    with patch("asyncio.sleep", late_sleep), pytest.raises(StopAsyncIteration):
+        await monitor.run()
+    assert monitor.lag == 1.5
+    assert monitor.last_beat == clock.now
+    assert not monitor.responsive(max_lag=1.0)
+
+
+@pytest.mark.asyncio
+async def test_readiness(
+    app: App, server: tuple[HealthServer, FakeClock, TestClient]
+) -> None:
+    """Test that readiness needs Socket Mode, warm-up and closed breakers."""
+    _, _, client = server
+
+    response = await client.get("/readyz")
+    assert response.status == 503
+    assert (await response.json())["warmed_up"] is False
+
+    app.warmed_up = True
+    response = await client.get("/readyz")
+    assert response.status == 200
+    assert (await response.json())["breakers"] == {
+        "upload": "closed",
+        "result": "closed",
+    }
+
+    for _ in range(5):
+        app.breakers["upload"].record_failure()
+    response = await client.get("/readyz")
+    assert response.status == 503
+    assert (await response.json())["breakers"]["upload"] == "open"
+
+    app.breakers["upload"].state = "closed"
+    app.handler.client.is_connected.return_value = False  # type: ignore[attr-defined]
+    response = await client.get("/readyz")
+    assert response.status == 503
+    assert (await response.json())["socket_mode_connected"] is False
+
+
+@pytest.mark.asyncio
+async def test_queue_depth(
+    app: App, server: tuple[HealthServer, FakeClock, TestClient]
+) -> None:
+    """Test that the backlog counts queued and in-flight analyses."""
+    _, _, client = server
+    for request_id, status in (
+        ("r1", "pending"),
+        ("r2", "processing"),
+        ("r3", "uploading"),
+    ):
+        app.active_requests[request_id] = {
+            "user_id": "U1",
+            "media_id": "m",
+            "channel_id": "C1",
+            "message_ts": "1",
+            "status": status,
+        }
+    app.auto_scan_queue.put_nowait(MagicMock())
+    app.upload_scheduler.running = 1
+    app.upload_scheduler.queues[Priority.BULK]["C1"] = MagicMock(__len__=lambda _: 2)
+
+    response = await client.get("/queue")
+    assert response.status == 200
+    depth = await response.json()
+    assert depth["backlog"] == 1 + 2 + 1 + 2
+    assert depth["uploads"] == {"queued": 2, "running": 1}
+    assert depth["analyses"] == {"pending": 1, "processing": 1, "uploading": 1}
+    assert depth["auto_scan_queued"] == 1
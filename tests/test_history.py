@@ -0,0 +1,203 @@
+import sqlite3
+from pathlib import Path
+from typing import AsyncIterator
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from reality_defender_slack_app.history import (
+    HistoryQuery,
+    HistoryStore,
+    parse_history_args,
+)
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path: Path) -> AsyncIterator[HistoryStore]:
+    history = HistoryStore(str(tmp_path / "state" / "history.sqlite3"))
+    yield history
+    history.close()
+
+
+async def _fill(store: HistoryStore, count: int) -> None:
+    for index in range(count):
+        await store.record(
+            f"req{index}",
+            f"user{index % 2}",
+            f"channel{index % 3}",
+            f"{index}.0",
+            "MANIPULATED" if index % 4 == 0 else "AUTHENTIC",
+            score=index / 100,
+            completed_at=1000.0 + index,
+        )
+
+
+@pytest.mark.asyncio
+async def test_query_filters(store: HistoryStore) -> None:
+    """Test that every filter is applied, newest first."""
+    await _fill(store, 12)
+
+    entries, cursor = await store.query({"user_id": "user0"})
+    assert [entry["request_id"] for entry in entries] == [
+        "req10",
+        "req8",
+        "req6",
+        "req4",
+        "req2",
+        "req0",
+    ]
+    assert cursor is None
+
+    entries, _ = await store.query({"channel_id": "channel1", "status": "AUTHENTIC"})
+    assert [entry["request_id"] for entry in entries] == ["req10", "req7", "req1"]
+
+    entries, _ = await store.query({"status": "MANIPULATED", "since": 1004.0})
+    assert [entry["request_id"] for entry in entries] == ["req8", "req4"]
+
+
+@pytest.mark.asyncio
+async def test_pages_have_no_gaps_or_duplicates(store: HistoryStore) -> None:
+    """Test keyset pagination, including entries completed at the same time."""
+    for index in range(25):
+        await store.record(
+            f"req{index}", "user1", "channel1", "1.0", "AUTHENTIC", completed_at=1000.0
+        )
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        entries, cursor = await store.query(
+            {"user_id": "user1"}, limit=10, cursor=cursor
+        )
+        seen += [entry["request_id"] for entry in entries]
+        pages += 1
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == sorted(f"req{index}" for index in range(25))
+
+
+@pytest.mark.asyncio
+async def test_recording_again_replaces_entry(store: HistoryStore) -> None:
+    """Test that a request is only ever listed once."""
+    await store.record("req1", "user1", "channel1", "1.0", "UNKNOWN")
+    await store.record("req1", "user1", "channel1", "1.0", "AUTHENTIC", score=0.1)
+
+    entries, _ = await store.query({})
+    assert [(entry["request_id"], entry["status"]) for entry in entries] == [
+        ("req1", "AUTHENTIC")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_verdicts_of_known_media(store: HistoryStore) -> None:
+    """Test looking up the latest verdict of media analyzed before."""
+    await store.record(
+        "req1", "u1", "c1", "1.0", "UNKNOWN", media_key="a", completed_at=1
+    )
+    await store.record(
+        "req2", "u1", "c1", "2.0", "MANIPULATED", media_key="a", completed_at=2
+    )
+    await store.record(
+        "req3", "u1", "c1", "3.0", "AUTHENTIC", media_key="b", completed_at=3
+    )
+    await store.record("req4", "u1", "c1", "4.0", "AUTHENTIC")
+
+    assert await store.verdicts(["a", "b", "c"]) == {
+        "a": "MANIPULATED",
+        "b": "AUTHENTIC",
+    }
+    assert await store.verdicts([]) == {}
+
+
+@pytest.mark.asyncio
+async def test_older_databases_gain_media_keys(tmp_path: Path) -> None:
+    """Test that a history created before media keys were recorded still opens."""
+    path = tmp_path / "history.sqlite3"
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE analyses (id INTEGER PRIMARY KEY, request_id TEXT NOT NULL "
+        "UNIQUE, team_id TEXT, user_id TEXT NOT NULL, channel_id TEXT NOT NULL, "
+        "message_ts TEXT NOT NULL, filename TEXT, status TEXT NOT NULL, score REAL, "
+        "submitted_at REAL, completed_at REAL NOT NULL)"
+    )
+    connection.execute(
+        "INSERT INTO analyses (request_id, user_id, channel_id, message_ts, status, "
+        "completed_at) VALUES ('req0', 'u1', 'c1', '1.0', 'AUTHENTIC', 1)"
+    )
+    connection.commit()
+    connection.close()
+
+    store = HistoryStore(str(path))
+    await store.record("req1", "u1", "c1", "2.0", "MANIPULATED", media_key="a")
+    entries, _ = await store.query({})
+    assert [entry["media_key"] for entry in entries] == ["a", None]
+    assert await store.verdicts(["a"]) == {"a": "MANIPULATED"}
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_oldest_entries_are_pruned(tmp_path: Path) -> None:
+    """Test that the history is bounded to `max_rows`."""
+    store = HistoryStore(str(tmp_path / "history.sqlite3"), max_rows=5)
+    with patch("reality_defender_slack_app.history.PRUNE_INTERVAL", 4):
+        await _fill(store, 12)
+
+    entries, _ = await store.query({}, limit=20)
+    assert [entry["request_id"] for entry in entries] == [
+        "req11",
+        "req10",
+        "req9",
+        "req8",
+        "req7",
+    ]
+    store.close()
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"user_id": "user1"},
+        {"channel_id": "channel1"},
+        {"user_id": "user1", "channel_id": "channel1"},
+        {"status": "MANIPULATED"},
+        {"user_id": "user1", "status": "MANIPULATED", "since": 1000.0},
+        {"since": 1000.0},
+        {},
+    ],
+)
+@pytest.mark.asyncio
+async def test_queries_use_an_index(store: HistoryStore, query: HistoryQuery) -> None:
+    """Test that no query, on any page, scans or sorts the whole table."""
+    await _fill(store, 50)
+
+    for cursor in (None, "1040.0:41"):
+        sql, params = store._select(query, 10, cursor)
+        plan = [
+            row["detail"]
+            for row in store._connect().execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        ]
+        assert all("USING" in detail and "INDEX" in detail for detail in plan), plan
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_parse_history_args() -> None:
+    """Test reading the /analysis-history arguments."""
+    assert parse_history_args("", "U1", "C1") == {"user_id": "U1"}
+    assert parse_history_args("here Manipulated 7d", "U1", "C1", now=864000.0) == {
+        "user_id": "U1",
+        "channel_id": "C1",
+        "status": "MANIPULATED",
+        "since": 259200.0,
+    }
+    # Only admins see everyone's analyses in a channel.
+    assert parse_history_args("here", "U1", "C1", admin=True) == {"channel_id": "C1"}
+    assert parse_history_args("3", "U1", "C1", now=864000.0) == {
+        "user_id": "U1",
+        "since": 604800.0,
+    }
+    assert parse_history_args("0d", "U1", "C1") is None
+    assert parse_history_args("everything", "U1", "C1") is None
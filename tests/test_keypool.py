@@ -0,0 +1,100 @@
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from realitydefender import RealityDefenderError
+
+from reality_defender_slack_app.keypool import KeyPool
+from tests.conftest import FakeClock
+
+
+def _pool(keys: list[str], **kwargs: Any) -> tuple[KeyPool, dict[str, MagicMock]]:
+    clients: dict[str, MagicMock] = {}
+
+    def factory(key: str) -> MagicMock:
+        client = MagicMock()
+        client.upload = AsyncMock(return_value={"request_id": f"req-{key}"})
+        client.get_result = AsyncMock(return_value={"status": "AUTHENTIC"})
+        clients[key] = client
+        return client
+
+    return KeyPool(keys, client_factory=factory, **kwargs), clients
+
+
+@pytest.mark.asyncio
+async def test_uploads_spread_across_keys() -> None:
+    """Test that uploads go to the least busy key and results to their uploader."""
+    pool, clients = _pool(["key-aaaa", "key-bbbb"])
+    pool.keys[0].in_flight = 1
+
+    result = await pool.upload("video.mp4")
+    assert result["request_id"] == "req-key-bbbb"
+
+    pool.keys[0].in_flight = 0
+    await pool.get_result("req-key-bbbb", max_attempts=1)
+    clients["key-bbbb"].get_result.assert_called_once_with(
+        "req-key-bbbb", max_attempts=1
+    )
+    clients["key-aaaa"].get_result.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_key() -> None:
+    """Test that each key is held to its rate, waiting once all are at it."""
+    clock = FakeClock()
+    pool, clients = _pool(["key-aaaa", "key-bbbb"], rate_per_minute=1, clock=clock)
+    pool.sleep = clock.sleep
+
+    for _ in range(3):
+        await pool.upload("video.mp4")
+
+    assert clients["key-aaaa"].upload.call_count == 2
+    assert clients["key-bbbb"].upload.call_count == 1
+    assert clock.now == 60.0
+
+
+@pytest.mark.asyncio
+async def test_failover_when_out_of_quota() -> None:
+    """Test that a key out of quota is set aside and another one used."""
+    clock = FakeClock()
+    pool, clients = _pool(["key-aaaa", "key-bbbb"], cooldown=300, clock=clock)
+    clients["key-aaaa"].upload.side_effect = RealityDefenderError(
+        "Upload limit reached", "unauthorized"
+    )
+
+    result = await pool.upload("video.mp4")
+    assert result["request_id"] == "req-key-bbbb"
+    assert pool.stats()["key 1 (…aaaa)"]["rejections"] == 1
+
+    await pool.upload("video.mp4")
+    assert clients["key-aaaa"].upload.call_count == 1
+
+    clients["key-bbbb"].upload.side_effect = RealityDefenderError(
+        "Upload limit reached", "unauthorized"
+    )
+    with pytest.raises(RealityDefenderError, match="Every shared API key"):
+        await pool.upload("video.mp4")
+
+    clock.now = 301
+    clients["key-aaaa"].upload.side_effect = None
+    assert (await pool.upload("video.mp4"))["request_id"] == "req-key-aaaa"
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_failed_over() -> None:
+    """Test that server errors are left to the caller's retries."""
+    pool, clients = _pool(["key-aaaa", "key-bbbb"])
+    clients["key-aaaa"].upload.side_effect = RealityDefenderError(
+        "API error", "server_error"
+    )
+
+    with pytest.raises(RealityDefenderError):
+        await pool.upload("video.mp4")
+    clients["key-bbbb"].upload.assert_not_called()
+    assert pool.keys[0].in_flight == 0
+
+
+def test_keys_required() -> None:
+    """Test that an empty pool is refused."""
+    with pytest.raises(ValueError):
+        KeyPool([])
@@ -0,0 +1,175 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from reality_defender_slack_app.media import (
+    MediaRejectedError,
+    check_size,
+    filetype_from_name,
+    is_slack_file_url,
+    normalize_filetype,
+    plan_media,
+    preview_plan,
+    sniff_filetype,
+)
+
+
+def test_normalize_filetype() -> None:
+    """Test that Slack filetypes and mimetypes map to supported extensions."""
+    assert normalize_filetype("png") == "png"
+    assert normalize_filetype("jpeg") == "jpg"
+    assert normalize_filetype("mp3") == "mp3"
+    assert normalize_filetype(None, "video/quicktime") == "mov"
+    assert normalize_filetype("binary", "audio/x-wav") == "wav"
+    assert normalize_filetype("pdf", "application/pdf") is None
+
+
+def test_filetype_from_name() -> None:
+    """Test guessing the type of media from a name or URL."""
+    assert filetype_from_name("https://files.slack.com/a/b/photo.JPG?t=1") == "jpg"
+    assert filetype_from_name("https://example.com/image") is None
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", "png"),
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF", "jpg"),
+        (b"GIF89a\x01\x00", "gif"),
+        (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "webp"),
+        (b"RIFF\x00\x00\x00\x00WAVEfmt ", "wav"),
+        (b"\x00\x00\x00\x18ftypmp42", "mp4"),
+        (b"\x00\x00\x00\x14ftypqt  ", "mov"),
+        (b"\x00\x00\x00\x20ftypM4A ", "m4a"),
+        (b"ID3\x04\x00", "mp3"),
+        (b"fLaC\x00\x00", "flac"),
+        (b"OggS\x00\x02", "ogg"),
+        (b"%PDF-1.7", None),
+    ],
+)
+def test_sniff_filetype(head: bytes, expected: str | None) -> None:
+    """Test that supported formats are recognized from their first bytes."""
+    assert sniff_filetype(head) == expected
+
+
+def test_check_size() -> None:
+    """Test that size limits depend on the kind of media."""
+    check_size("a.mp4", "mp4", 100 * 1048576)
+
+    with pytest.raises(MediaRejectedError) as e:
+        check_size("a.mp3", "mp3", 100 * 1048576)
+    assert "too large" in e.value.reason
+
+
+@pytest.mark.asyncio
+async def test_plan_media_from_payload() -> None:
+    """Test planning from complete payload metadata, without any API call."""
+    client = AsyncMock()
+    message = {
+        "blocks": [{"type": "image", "image_url": "https://example.com/x.png"}],
+        "files": [
+            {
+                "id": "F1",
+                "name": "clip.mp4",
+                "filetype": "mp4",
+                "mimetype": "video/mp4",
+                "size": 1024,
+                "url_private": "https://files/clip.mp4",
+            },
+            {
+                "id": "F2",
+                "name": "notes.pdf",
+                "filetype": "pdf",
+                "mimetype": "application/pdf",
+                "size": 10,
+                "url_private": "https://files/notes.pdf",
+            },
+            {
+                "id": "F3",
+                "name": "huge.png",
+                "filetype": "png",
+                "mimetype": "image/png",
+                "size": 60 * 1048576,
+                "url_private": "https://files/huge.png",
+            },
+        ],
+    }
+
+    plans, rejected = await plan_media(message, client)
+
+    client.files_info.assert_not_called()
+    assert [plan["key"] for plan in plans] == ["https://example.com/x.png", "F1"]
+    assert plans[1]["filetype"] == "mp4"
+    assert plans[1]["size"] == 1024
+    assert [e.name for e in rejected] == ["notes.pdf", "huge.png"]
+    assert "too large" in rejected[1].reason
+
+
+@pytest.mark.asyncio
+async def test_plan_media_fetches_missing_metadata() -> None:
+    """Test that files.info is used when the payload lacks file metadata."""
+    client = AsyncMock()
+    client.files_info.return_value = {
+        "file": {
+            "id": "F1",
+            "name": "voice.m4a",
+            "filetype": "m4a",
+            "mimetype": "audio/mp4",
+            "size": 30 * 1048576,
+            "url_private": "https://files/voice.m4a",
+        }
+    }
+
+    plans, rejected = await plan_media({"files": [{"id": "F1"}]}, client)
+
+    client.files_info.assert_called_once_with(file="F1")
+    assert plans == []
+    assert "too large" in rejected[0].reason
+
+
+@pytest.mark.asyncio
+async def test_preview_plan_uses_largest_thumbnail() -> None:
+    """Test that large files with a thumbnail can be triaged from it."""
+    message = {
+        "files": [
+            {
+                "id": "F1",
+                "name": "clip.mp4",
+                "filetype": "mp4",
+                "mimetype": "video/mp4",
+                "size": 50 * 1048576,
+                "url_private": "https://files/clip.mp4",
+                "thumb_video": "https://files-tmb/clip_thumb_video.jpeg",
+            },
+            {
+                "id": "F2",
+                "name": "photo.png",
+                "filetype": "png",
+                "mimetype": "image/png",
+                "size": 1024,
+                "url_private": "https://files/photo.png",
+                "thumb_480": "https://files-tmb/photo_480.png",
+                "thumb_1024": "https://files-tmb/photo_1024.png",
+            },
+        ]
+    }
+
+    (video, photo), _ = await plan_media(message)
+    preview = preview_plan(video, 10 * 1048576)
+
+    assert preview is not None
+    assert preview["key"] == "preview:F1"
+    assert preview["url"] == "https://files-tmb/clip_thumb_video.jpeg"
+    assert preview["filetype"] == "jpg"
+    assert preview.get("preview_of") == video
+    assert photo.get("thumbnail") == "https://files-tmb/photo_1024.png"
+    # Small files are analyzed in full straight away.
+    assert preview_plan(photo, 10 * 1048576) is None
+
+
+def test_is_slack_file_url() -> None:
+    """Test that only files hosted by Slack are trusted with the bot token."""
+    assert is_slack_file_url("https://files.slack.com/files-pri/T1-F1/a.png")
+    assert not is_slack_file_url("http://files.slack.com/files-pri/T1-F1/a.png")
+    assert not is_slack_file_url("https://files.slack.com.evil.example/a.png")
+    assert not is_slack_file_url("https://example.com/a.png")
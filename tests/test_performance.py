@@ -0,0 +1,84 @@
+import logging
+from typing import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from reality_defender_slack_app import performance
+from reality_defender_slack_app.performance import (
+    LazyJson,
+    apply_profile,
+    dumps,
+    loads,
+    loop_factory,
+    use_fast_json,
+)
+
+
+@pytest.fixture(autouse=True)
+def standard_json() -> Iterator[None]:
+    yield
+    use_fast_json(False)
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_dumps_loads_round_trip(fast: bool) -> None:
+    """Test that both serializers produce the same JSON."""
+    if fast and performance.orjson is None:
+        pytest.skip("orjson is not installed")
+    assert use_fast_json(fast) == fast
+
+    value = {"text": "café", "files": [{"id": "F1", "size": 3}], "score": 0.5}
+    assert loads(dumps(value)) == value
+    assert loads(dumps(value).encode()) == value
+    assert dumps(value) == '{"text":"café","files":[{"id":"F1","size":3}],"score":0.5}'
+    assert dumps(value, pretty=True).splitlines()[1] == '  "text": "café",'
+
+
+def test_use_fast_json_without_orjson() -> None:
+    """Test that the standard library is used when orjson is missing."""
+    with patch.object(performance, "orjson", None):
+        assert use_fast_json(True) is False
+    assert dumps({"a": 1}) == '{"a":1}'
+
+
+def test_lazy_json_only_serialized_when_logged(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that debug payloads cost nothing while debug logging is off."""
+    logger = logging.getLogger("test_performance")
+
+    with patch.object(performance, "dumps", wraps=performance.dumps) as dumps_mock:
+        with caplog.at_level(logging.INFO, logger="test_performance"):
+            logger.debug("Payload: %s", LazyJson({"a": 1}))
+        dumps_mock.assert_not_called()
+
+        with caplog.at_level(logging.DEBUG, logger="test_performance"):
+            logger.debug("Payload: %s", LazyJson({"a": 1}))
+        dumps_mock.assert_called_with({"a": 1}, pretty=True)
+
+    assert caplog.messages == ['Payload: {\n  "a": 1\n}']
+
+
+def test_loop_factory() -> None:
+    """Test that uvloop is only used for the fast profile, if installed."""
+    assert loop_factory("standard") is None
+    with patch.object(performance, "uvloop", None):
+        assert loop_factory("fast") is None
+    if performance.uvloop is not None:
+        assert loop_factory("fast") is performance.uvloop.new_event_loop
+
+
+def test_apply_profile_warns_about_missing_packages(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that the fast profile says which packages it could not use."""
+    with (
+        patch.object(performance, "uvloop", None),
+        patch.object(performance, "orjson", None),
+        caplog.at_level(logging.INFO),
+    ):
+        apply_profile("fast")
+
+    assert "Fast profile without uvloop, orjson" in caplog.text
+    assert "event loop asyncio, JSON json" in caplog.text
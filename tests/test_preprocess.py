@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pytest
+
+from reality_defender_slack_app.preprocess import (
+    ImageOptimizer,
+    optimize_image,
+)
+from reality_defender_slack_app.workers import MediaWorkers
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _noisy_image(path: Path, size: tuple[int, int], fmt: str) -> None:
+    """Write an image that doesn't compress to nothing."""
+    image = Image.effect_noise(size, 64).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    image.save(path, format=fmt, exif=exif)
+
+
+def test_optimize_image_downsamples_large_images(tmp_path: Path) -> None:
+    """Test that large images are shrunk and lose their metadata."""
+    path = tmp_path / "photo.jpg"
+    _noisy_image(path, (3000, 2000), "JPEG")
+
+    result = optimize_image(str(path), "jpg", 1500)
+
+    assert result.path != str(path)
+    assert result.bytes_saved > 0
+    assert path.exists()
+    with Image.open(result.path) as image:
+        assert image.size == (1500, 1000)
+        assert not image.getexif()
+
+
+def test_optimize_image_applies_orientation(tmp_path: Path) -> None:
+    """Test that a rotated photo stays upright once its metadata is stripped."""
+    path = tmp_path / "portrait.jpg"
+    image = Image.effect_noise((3000, 2000), 64).convert("RGB")
+    exif = Image.Exif()
+    # Rotate 90 degrees clockwise to display.
+    exif[0x0112] = 6
+    image.save(path, format="JPEG", exif=exif)
+
+    result = optimize_image(str(path), "jpg", 1500)
+
+    with Image.open(result.path) as optimized:
+        assert optimized.size == (1000, 1500)
+        assert not optimized.getexif()
+
+
+def test_optimize_image_keeps_small_images(tmp_path: Path) -> None:
+    """Test that images within the limit, or not re-encodable, are untouched."""
+    path = tmp_path / "photo.png"
+    _noisy_image(path, (800, 600), "PNG")
+
+    result = optimize_image(str(path), "png", 1024)
+    assert result.path == str(path)
+    assert result.bytes_saved == 0
+
+    result = optimize_image(str(path), "gif", 1024)
+    assert result.path == str(path)
+
+
+def test_optimize_image_never_goes_below_minimum(tmp_path: Path) -> None:
+    """Test that tiny limits are raised to the minimum dimension."""
+    path = tmp_path / "photo.jpg"
+    _noisy_image(path, (2048, 1024), "JPEG")
+
+    result = optimize_image(str(path), "jpg", 100)
+
+    with Image.open(result.path) as image:
+        assert image.size == (1024, 512)
+
+
+@pytest.mark.asyncio
+async def test_image_optimizer(tmp_path: Path) -> None:
+    """Test optimizing in the worker pool and keeping count of bytes saved."""
+    path = tmp_path / "photo.jpg"
+    _noisy_image(path, (2500, 2500), "JPEG")
+
+    workers = MediaWorkers(1, mode="thread")
+    optimizer = ImageOptimizer(1024, workers)
+    result = await optimizer.optimize(str(path), "jpg")
+
+    assert result.path != str(path)
+    assert optimizer.bytes_saved == result.bytes_saved > 0
+    assert workers.completed == 1
+    workers.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_image_optimizer_disabled_or_failing(tmp_path: Path) -> None:
+    """Test that the original file is used when optimizing is off or fails."""
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"not really a jpeg")
+
+    workers = MediaWorkers(1, mode="thread")
+    optimizer = ImageOptimizer(0, workers)
+    assert not optimizer.enabled
+    result = await optimizer.optimize(str(path), "jpg")
+    assert result.path == str(path)
+    assert workers.completed == 0
+
+    optimizer = ImageOptimizer(1024, workers)
+    result = await optimizer.optimize(str(path), "jpg")
+
+    assert result.path == str(path)
+    assert optimizer.bytes_saved == 0
+    assert workers.failed == 1
+    workers.shutdown()
@@ -0,0 +1,90 @@
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from reality_defender_slack_app.scan import (
+    CheckpointStore,
+    KnownMediaCache,
+    ScanCheckpoint,
+    iter_history_pages,
+)
+
+
+def _checkpoint(channel_id: str = "C1") -> ScanCheckpoint:
+    return {
+        "channel_id": channel_id,
+        "user_id": "U1",
+        "oldest": "0",
+        "cursor": "abc",
+        "status_ts": "111.222",
+        "scanned": 10,
+        "queued": 2,
+        "skipped": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_iter_history_pages_follows_cursor() -> None:
+    """Test that pages are streamed following Slack's cursors."""
+    client = AsyncMock()
+    client.conversations_history.side_effect = [
+        {"messages": [{"ts": "1"}], "response_metadata": {"next_cursor": "page2"}},
+        {"messages": [{"ts": "2"}], "response_metadata": {"next_cursor": ""}},
+    ]
+
+    pages = [page async for page in iter_history_pages(client, "C1", "0")]
+
+    assert pages == [([{"ts": "1"}], "page2"), ([{"ts": "2"}], None)]
+    assert "cursor" not in client.conversations_history.call_args_list[0][1]
+    assert client.conversations_history.call_args_list[1][1]["cursor"] == "page2"
+
+
+@pytest.mark.asyncio
+async def test_iter_history_pages_resumes_from_cursor() -> None:
+    """Test that a scan can resume from a saved cursor."""
+    client = AsyncMock()
+    client.conversations_history.return_value = {"messages": []}
+
+    pages = [page async for page in iter_history_pages(client, "C1", "0", "saved")]
+
+    assert pages == [([], None)]
+    assert client.conversations_history.call_args[1]["cursor"] == "saved"
+
+
+def test_checkpoint_store_round_trip(tmp_path: Path) -> None:
+    """Test that checkpoints can be saved, listed, and deleted."""
+    store = CheckpointStore(str(tmp_path))
+    assert store.load("C1") is None
+    assert store.all() == []
+
+    store.save(_checkpoint("C1"))
+    store.save(_checkpoint("C2"))
+
+    assert store.load("C1") == _checkpoint("C1")
+    assert sorted(c["channel_id"] for c in store.all()) == ["C1", "C2"]
+
+    store.delete("C1")
+    assert store.load("C1") is None
+
+
+def test_checkpoint_store_ignores_corrupt_files(tmp_path: Path) -> None:
+    """Test that a corrupt checkpoint is ignored instead of crashing."""
+    store = CheckpointStore(str(tmp_path))
+    store.directory.mkdir(parents=True)
+    (store.directory / "C1.json").write_text("{not json")
+
+    assert store.load("C1") is None
+
+
+def test_known_media_cache_is_bounded() -> None:
+    """Test that the known media cache evicts the least recently added keys."""
+    cache = KnownMediaCache(max_size=2)
+
+    cache.add("a")
+    cache.add("b", "AUTHENTIC")
+    cache.add("c")
+
+    assert "a" not in cache
+    assert cache.get("b") == "AUTHENTIC"
+    assert "c" in cache
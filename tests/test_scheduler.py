@@ -0,0 +1,174 @@
+import asyncio
+import functools
+
+import pytest
+
+from reality_defender_slack_app.scheduler import Priority, WorkScheduler
+
+
+async def _hold(release: asyncio.Event) -> None:
+    await release.wait()
+
+
+async def _noop() -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_run_returns_work_result() -> None:
+    """Test that run returns whatever the work returns."""
+    scheduler = WorkScheduler(concurrency=1)
+
+    async def work() -> str:
+        return "done"
+
+    assert await scheduler.run(Priority.INTERACTIVE, "U1", work) == "done"
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_work_jumps_ahead() -> None:
+    """Test that interactive work is served before queued background work."""
+    scheduler = WorkScheduler(concurrency=1)
+    release = asyncio.Event()
+    order: list[str] = []
+
+    async def record(name: str) -> None:
+        order.append(name)
+
+    blocker = asyncio.create_task(
+        scheduler.run(Priority.BACKGROUND, "C1", lambda: _hold(release))
+    )
+    await asyncio.sleep(0)
+
+    tasks = [
+        asyncio.create_task(scheduler.run(Priority.BULK, "C1", lambda: record("bulk"))),
+        asyncio.create_task(
+            scheduler.run(Priority.BACKGROUND, "C1", lambda: record("background"))
+        ),
+        asyncio.create_task(
+            scheduler.run(Priority.INTERACTIVE, "U1", lambda: record("interactive"))
+        ),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.pending() == 3
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert order == ["interactive", "background", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_owners_share_slots_fairly() -> None:
+    """Test that a large backlog from one owner doesn't starve another."""
+    scheduler = WorkScheduler(concurrency=1)
+    release = asyncio.Event()
+    order: list[str] = []
+
+    async def record(name: str) -> None:
+        order.append(name)
+
+    blocker = asyncio.create_task(
+        scheduler.run(Priority.BULK, "other", lambda: _hold(release))
+    )
+    await asyncio.sleep(0)
+
+    tasks = [
+        asyncio.create_task(
+            scheduler.run(
+                Priority.BULK, "noisy", functools.partial(record, f"noisy{i}")
+            )
+        )
+        for i in range(3)
+    ]
+    tasks.append(
+        asyncio.create_task(
+            scheduler.run(Priority.BULK, "quiet", lambda: record("quiet"))
+        )
+    )
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert order.index("quiet") <= 1
+
+
+@pytest.mark.asyncio
+async def test_weights_give_larger_share() -> None:
+    """Test that owners with a larger weight get more slots."""
+    scheduler = WorkScheduler(concurrency=1)
+    scheduler.set_weight("heavy", 3.0)
+    release = asyncio.Event()
+    order: list[str] = []
+
+    async def record(name: str) -> None:
+        order.append(name)
+
+    blocker = asyncio.create_task(
+        scheduler.run(Priority.BULK, "blocker", lambda: _hold(release))
+    )
+    await asyncio.sleep(0)
+
+    tasks = [
+        asyncio.create_task(
+            scheduler.run(Priority.BULK, owner, functools.partial(record, owner))
+        )
+        for owner in ["light", "light", "heavy", "heavy", "heavy", "heavy"]
+    ]
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert order[:4].count("heavy") >= 3
+
+
+@pytest.mark.asyncio
+async def test_stats_report_wait_per_priority() -> None:
+    """Test that wait times are reported per priority class."""
+    now = [0.0]
+    scheduler = WorkScheduler(concurrency=1, clock=lambda: now[0])
+    release = asyncio.Event()
+
+    blocker = asyncio.create_task(
+        scheduler.run(Priority.INTERACTIVE, "U1", lambda: _hold(release))
+    )
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(scheduler.run(Priority.BULK, "C1", _noop))
+    await asyncio.sleep(0)
+
+    now[0] = 2.5
+    release.set()
+    await asyncio.gather(blocker, waiting)
+
+    stats = scheduler.stats()
+    assert stats["interactive"]["count"] == 1
+    assert stats["interactive"]["max"] == 0.0
+    assert stats["bulk"]["count"] == 1
+    assert stats["bulk"]["mean"] == 2.5
+    assert stats["bulk"]["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue() -> None:
+    """Test that cancelling a queued run frees its place."""
+    scheduler = WorkScheduler(concurrency=1)
+    release = asyncio.Event()
+
+    blocker = asyncio.create_task(
+        scheduler.run(Priority.BULK, "C1", lambda: _hold(release))
+    )
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(scheduler.run(Priority.BULK, "C2", _noop))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert scheduler.pending() == 0
+    release.set()
+    await blocker
+    assert scheduler.running == 0
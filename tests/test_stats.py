@@ -0,0 +1,53 @@
+from reality_defender_slack_app.stats import UserStatsTracker
+
+
+def test_stats_follow_analyses() -> None:
+    """Test that pending analyses move to the latest verdicts once finished."""
+    tracker = UserStatsTracker(clock=lambda: 100.0)
+    assert tracker.get("U1") is None
+
+    tracker.submitted("U1", "req1", "C1", "photo.png", submitted_at=50.0)
+    tracker.submitted("U1", "req2", "C1", "clip.mp4")
+    tracker.completed("U1", "req1", "C1", "MANIPULATED", 0.9)
+    tracker.dropped("U1", "req2")
+
+    stats = tracker.get("U1")
+    assert stats is not None
+    assert stats.pending == {}
+    assert stats.counts == {"MANIPULATED": 1}
+    assert list(stats.recent) == [
+        {
+            "request_id": "req1",
+            "channel_id": "C1",
+            "filename": "photo.png",
+            "status": "MANIPULATED",
+            "score": 0.9,
+            "completed_at": 100.0,
+        }
+    ]
+    assert tracker.get("U2") is None
+
+
+def test_stats_keep_latest_verdicts_only() -> None:
+    """Test that only the latest verdicts are kept, every verdict is counted."""
+    tracker = UserStatsTracker(recent=2)
+    for i in range(5):
+        tracker.completed("U1", f"req{i}", "C1", "AUTHENTIC")
+
+    stats = tracker.get("U1")
+    assert stats is not None
+    assert [verdict["request_id"] for verdict in stats.recent] == ["req3", "req4"]
+    assert stats.counts["AUTHENTIC"] == 5
+
+
+def test_stats_forget_inactive_users() -> None:
+    """Test that users inactive the longest are forgotten beyond the limit."""
+    tracker = UserStatsTracker(max_users=2)
+    tracker.submitted("U1", "req1", "C1")
+    tracker.submitted("U2", "req2", "C1")
+    tracker.completed("U1", "req1", "C1", "AUTHENTIC")
+    tracker.submitted("U3", "req3", "C1")
+
+    assert tracker.get("U1") is not None
+    assert tracker.get("U2") is None
+    assert tracker.get("U3") is not None
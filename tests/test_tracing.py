@@ -0,0 +1,160 @@
+import json
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from reality_defender_slack_app.tracing import (
+    NOOP_SPAN,
+    CollectorSpanExporter,
+    FileSpanExporter,
+    Span,
+    Tracer,
+)
+
+
+class ListExporter:
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    async def export(self, spans: list[Span]) -> None:
+        self.spans += spans
+
+
+@pytest_asyncio.fixture
+async def collector() -> AsyncIterator[tuple[list[Any], str]]:
+    received: list[Any] = []
+
+    async def handle(request: web.Request) -> web.Response:
+        received.append(await request.json())
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post("/v1/traces", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield received, f"http://127.0.0.1:{port}/v1/traces"
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_trace_has_a_span_per_stage() -> None:
+    """Test that stages are children of the analysis they belong to."""
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+
+    root = tracer.start_trace("analysis", priority="interactive")
+    tracer.start_span(root, "queue", start=1000.0).end()
+    with tracer.span(root, "download") as span:
+        span.set("file.size", 1024)
+    tracer.attach("req123", root)
+    assert tracer.get("req123") is root
+    tracer.detach("req123").end()
+    await tracer.flush()
+
+    queue, download, analysis = exporter.spans
+    assert [span.name for span in exporter.spans] == ["queue", "download", "analysis"]
+    assert {queue.trace_id, download.trace_id} == {analysis.trace_id}
+    assert queue.parent_id == download.parent_id == analysis.span_id
+    assert queue.start_ns == 1000 * 10**9
+    assert download.attributes == {"file.size": 1024}
+    assert analysis.attributes == {"priority": "interactive"}
+    assert tracer.get("req123") is NOOP_SPAN
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_is_marked() -> None:
+    """Test that an exception ends the span with an error, once."""
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+    root = tracer.start_trace("analysis")
+
+    with pytest.raises(ValueError):
+        with tracer.span(root, "upload"):
+            raise ValueError("quota")
+    root.end(error="failed")
+    root.end()
+    await tracer.flush()
+
+    assert [(span.name, span.error) for span in exporter.spans] == [
+        ("upload", "ValueError: quota"),
+        ("analysis", "failed"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_disabled_or_unsampled_traces_are_noops() -> None:
+    """Test that nothing is recorded without an exporter or when not sampled."""
+    for tracer in (Tracer(), Tracer(ListExporter(), sample_rate=0.0)):
+        root = tracer.start_trace("analysis")
+        assert root is NOOP_SPAN
+        with tracer.span(root, "download") as span:
+            span.set("file.size", 1)
+        tracer.attach("req123", root)
+        root.end()
+
+        assert tracer.get("req123") is NOOP_SPAN
+        assert not tracer._buffer
+        assert NOOP_SPAN.attributes == {}
+
+
+def test_buffer_and_open_traces_are_bounded() -> None:
+    """Test that spans are dropped, rather than kept, when nothing exports."""
+    tracer = Tracer(ListExporter(), max_buffered=3, max_open=2)
+    for index in range(5):
+        tracer.attach(f"req{index}", tracer.start_trace("analysis"))
+
+    assert list(tracer._open) == ["req3", "req4"]
+    assert len(tracer._buffer) == 3
+    assert tracer.dropped == 0
+    for _ in range(2):
+        tracer.start_trace("analysis").end()
+    assert tracer.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_file_exporter(tmp_path: Path) -> None:
+    """Test that spans are appended to the file as JSON lines."""
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer(FileSpanExporter(str(path)))
+    root = tracer.start_trace("analysis")
+    with tracer.span(root, "poll") as span:
+        span.set("poll.attempts", 3)
+    root.end()
+    await tracer.flush()
+
+    poll, analysis = [json.loads(line) for line in path.read_text().splitlines()]
+    assert poll["name"] == "poll"
+    assert poll["parent_id"] == analysis["span_id"]
+    assert poll["attributes"] == {"poll.attempts": 3}
+    assert analysis["parent_id"] is None
+    assert len(analysis["trace_id"]) == 32
+
+
+@pytest.mark.asyncio
+async def test_collector_exporter(collector: tuple[list[Any], str]) -> None:
+    """Test that spans are sent to a collector with OTLP/HTTP JSON."""
+    received, url = collector
+    exporter = CollectorSpanExporter(url)
+    tracer = Tracer(exporter)
+    root = tracer.start_trace("analysis", verdict="AUTHENTIC")
+    with tracer.span(root, "notify"):
+        pass
+    root.end()
+    await tracer.flush()
+    await exporter.close()
+
+    [payload] = received
+    [resource] = payload["resourceSpans"]
+    notify, analysis = resource["scopeSpans"][0]["spans"]
+    assert notify["parentSpanId"] == analysis["spanId"]
+    assert "parentSpanId" not in analysis
+    assert analysis["attributes"] == [
+        {"key": "verdict", "value": {"stringValue": "AUTHENTIC"}}
+    ]
+    assert int(notify["endTimeUnixNano"]) >= int(notify["startTimeUnixNano"])
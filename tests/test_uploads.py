@@ -0,0 +1,205 @@
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from realitydefender import RealityDefenderError
+
+from reality_defender_slack_app.uploads import (
+    ChunkedUploader,
+    SignedUpload,
+    UploadStore,
+    parse_signed_url,
+)
+
+CHUNK = 1024
+
+
+class FakeUploadServer:
+    """Local resumable upload endpoint, able to drop chunks on request."""
+
+    def __init__(self) -> None:
+        self.received = bytearray()
+        self.requests: list[str] = []
+        # Content-Range values to fail once, after keeping half of the chunk.
+        self.fail_once: set[str] = set()
+        self.status: int | None = None
+        # Whether to act like a plain presigned PUT, which ignores Content-Range.
+        self.ignore_range = False
+
+    async def handle(self, request: web.Request) -> web.Response:
+        content_range = request.headers["Content-Range"]
+        self.requests.append(content_range)
+        if self.status:
+            return web.Response(status=self.status, text="expired")
+
+        units, _, total = content_range.partition(" ")[2].partition("/")
+        if units != "*":
+            start = int(units.split("-")[0])
+            data = await request.read()
+            if self.ignore_range:
+                self.received = bytearray(data)
+                return web.Response(status=200)
+            if start != len(self.received):
+                return web.Response(status=400, text="out of order")
+            if content_range in self.fail_once:
+                self.fail_once.discard(content_range)
+                self.received += data[: len(data) // 2]
+                return web.Response(status=503, text="try again")
+            self.received += data
+
+        if len(self.received) == int(total):
+            return web.Response(status=200)
+        headers = (
+            {"Range": f"bytes=0-{len(self.received) - 1}"} if self.received else {}
+        )
+        return web.Response(status=308, headers=headers)
+
+
+@pytest_asyncio.fixture
+async def server() -> AsyncIterator[tuple[FakeUploadServer, str]]:
+    fake = FakeUploadServer()
+    app = web.Application()
+    app.router.add_put("/upload", fake.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield fake, f"http://127.0.0.1:{port}/upload"
+    await runner.cleanup()
+
+
+@pytest.fixture
+def media(tmp_path: Path) -> Path:
+    path = tmp_path / "video.mp4"
+    path.write_bytes(bytes(range(256)) * 10)
+    return path
+
+
+def _upload(url: str) -> SignedUpload:
+    return {"request_id": "req123", "media_id": "media123", "signed_url": url}
+
+
+def test_parse_signed_url() -> None:
+    """Test reading the upload details from the API response."""
+    upload = parse_signed_url(
+        {
+            "requestId": "req123",
+            "mediaId": "media123",
+            "response": {"signedUrl": "https://upload.example.com"},
+        }
+    )
+    assert upload["signed_url"] == "https://upload.example.com"
+
+    with pytest.raises(RealityDefenderError):
+        parse_signed_url({"requestId": "req123"})
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload(
+    server: tuple[FakeUploadServer, str], media: Path, tmp_path: Path
+) -> None:
+    """Test that a file is sent in chunks and the manifest is removed."""
+    fake, url = server
+    store = UploadStore(str(tmp_path / "state"))
+    uploader = ChunkedUploader(store, chunk_size=CHUNK)
+
+    manifest = uploader.start(_upload(url), str(media), {"user_id": "U123"})
+    assert store.load("req123") is not None
+
+    await uploader.upload(manifest)
+    await uploader.close()
+
+    assert bytes(fake.received) == media.read_bytes()
+    assert fake.requests == [
+        "bytes 0-1023/2560",
+        "bytes 1024-2047/2560",
+        "bytes 2048-2559/2560",
+    ]
+    assert store.load("req123") is None
+    assert uploader.percent("req123") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_resumes_from_server_offset(
+    server: tuple[FakeUploadServer, str], media: Path, tmp_path: Path
+) -> None:
+    """Test that only what the server is missing is sent again."""
+    fake, url = server
+    fake.fail_once.add("bytes 1024-2047/2560")
+    uploader = ChunkedUploader(UploadStore(str(tmp_path / "state")), chunk_size=CHUNK)
+
+    await uploader.upload(uploader.start(_upload(url), str(media), {}))
+    await uploader.close()
+
+    assert bytes(fake.received) == media.read_bytes()
+    assert fake.requests == [
+        "bytes 0-1023/2560",
+        "bytes 1024-2047/2560",
+        "bytes */2560",
+        "bytes 1536-2559/2560",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resume_after_restart(
+    server: tuple[FakeUploadServer, str], media: Path, tmp_path: Path
+) -> None:
+    """Test that a new uploader carries on from a saved manifest."""
+    fake, url = server
+    store = UploadStore(str(tmp_path / "state"))
+    manifest = ChunkedUploader(store, chunk_size=CHUNK).start(
+        _upload(url), str(media), {"user_id": "U123"}
+    )
+    fake.received += media.read_bytes()[:CHUNK]
+    manifest["offset"] = CHUNK
+    store.save(manifest)
+
+    uploader = ChunkedUploader(store, chunk_size=CHUNK)
+    [resumed] = store.all()
+    assert resumed["request"] == {"user_id": "U123"}
+    await uploader.upload(resumed)
+    await uploader.close()
+
+    assert bytes(fake.received) == media.read_bytes()
+    assert fake.requests[0] == "bytes */2560"
+    assert "bytes 0-1023/2560" not in fake.requests
+
+
+@pytest.mark.asyncio
+async def test_rejected_upload_is_not_retried(
+    server: tuple[FakeUploadServer, str], media: Path, tmp_path: Path
+) -> None:
+    """Test that client errors, e.g. an expired URL, fail straight away."""
+    fake, url = server
+    fake.status = 403
+    store = UploadStore(str(tmp_path / "state"))
+    uploader = ChunkedUploader(store, chunk_size=CHUNK)
+
+    with pytest.raises(RealityDefenderError) as e:
+        await uploader.upload(uploader.start(_upload(url), str(media), {}))
+    await uploader.close()
+
+    assert e.value.code == "invalid_request"
+    assert len(fake.requests) == 1
+    # Discarding the manifest is up to the caller.
+    assert store.load("req123") is not None
+
+
+@pytest.mark.asyncio
+async def test_upload_completed_early_fails(
+    server: tuple[FakeUploadServer, str], media: Path, tmp_path: Path
+) -> None:
+    """Test that a URL accepting a single chunk as the whole file is an error."""
+    fake, url = server
+    fake.ignore_range = True
+    uploader = ChunkedUploader(UploadStore(str(tmp_path / "state")), chunk_size=CHUNK)
+
+    with pytest.raises(RealityDefenderError) as e:
+        await uploader.upload(uploader.start(_upload(url), str(media), {}))
+    await uploader.close()
+
+    assert e.value.code == "invalid_request"
+    assert fake.requests == ["bytes 0-1023/2560"]
@@ -1,11 +1,18 @@
+from typing import Any
+
 import pytest
 from unittest.mock import AsyncMock
+from reality_defender_slack_app.stats import UserStatsTracker
 from reality_defender_slack_app.views import (
+    HOME_PENDING_LIMIT,
     app_home_default,
     app_home_first_boot,
     notify_error_user_unavailable,
+    notify_error_invalid_key,
     notify_acknowledge_analysis_request,
     notify_error_analysis_request,
+    notify_batch_complete,
+    notify_service_degraded,
 )
 
 
@@ -43,6 +50,40 @@ async def test_app_home_default_content() -> None:
     assert blocks[3]["type"] == "divider"
 
 
+@pytest.mark.asyncio
+async def test_app_home_default_dashboard() -> None:
+    """Test app_home_default view with the user's analyses."""
+    mock_client = AsyncMock()
+    tracker = UserStatsTracker()
+    for i in range(HOME_PENDING_LIMIT + 2):
+        tracker.submitted("U123456", f"req{i}", "C1", "clip.mp4")
+    tracker.completed("U123456", "req0", "C1", "AUTHENTIC", 0.1)
+
+    await app_home_default(mock_client, {"user": "U123456"}, tracker.get("U123456"))
+
+    blocks = mock_client.views_publish.call_args[1]["view"]["blocks"]
+    assert len(blocks) == 9
+    pending = blocks[0]["text"]["text"]
+    assert pending.count("⏳ `clip.mp4`") == HOME_PENDING_LIMIT
+    assert "and 1 more" in pending
+    assert "✅" in blocks[1]["text"]["text"]
+    assert "11 pending · 1 authentic" in blocks[2]["elements"][0]["text"]
+    assert "Reality Defender" in blocks[4]["text"]["text"]
+
+
+@pytest.mark.asyncio
+async def test_notify_error_invalid_key() -> None:
+    """Test that the invalid key modal only uses valid context blocks."""
+    mock_client = AsyncMock()
+
+    await notify_error_invalid_key(mock_client, "trigger123")
+
+    blocks = mock_client.views_open.call_args[1]["view"]["blocks"]
+    assert "rejected your API key" in blocks[0]["text"]["text"]
+    assert blocks[1]["type"] == "context"
+    assert "/setup-rd" in blocks[1]["elements"][0]["text"]
+
+
 @pytest.mark.asyncio
 async def test_app_home_first_boot() -> None:
     """Test app_home_first_boot view."""
@@ -177,6 +218,7 @@ async def test_all_views_have_proper_structure() -> None:
     modal_functions = [
         notify_error_user_unavailable,
         notify_error_analysis_request,
+        notify_service_degraded,
         lambda c, t: notify_acknowledge_analysis_request(c, t, unsupported=True),
         lambda c, t: notify_acknowledge_analysis_request(c, t, unsupported=False),
     ]
@@ -194,3 +236,33 @@ async def test_all_views_have_proper_structure() -> None:
         assert view["close"]["type"] == "plain_text"
         assert view["close"]["text"] == "Close"
         assert len(view["blocks"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_notify_batch_complete() -> None:
+    """Test notify_batch_complete posts a per-file breakdown in the thread."""
+    mock_client = AsyncMock()
+    entries: list[dict[str, Any]] = [
+        {
+            "request_id": "req1",
+            "filename": "a.png",
+            "status": "AUTHENTIC",
+            "score": 0.1,
+        },
+        {"request_id": "req2", "filename": "b.mp4", "status": None, "score": None},
+    ]
+
+    await notify_batch_complete(
+        mock_client, "C123", "111.222", "U123", entries, timed_out=True
+    )
+
+    mock_client.chat_postMessage.assert_called_once()
+    call_args = mock_client.chat_postMessage.call_args
+    assert call_args[1]["channel"] == "C123"
+    assert call_args[1]["thread_ts"] == "111.222"
+
+    blocks = call_args[1]["blocks"]
+    assert "<@U123>" in blocks[0]["text"]["text"]
+    assert "a.png" in blocks[2]["text"]["text"]
+    assert "still processing" in blocks[2]["text"]["text"]
+    assert blocks[-1]["type"] == "context"
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+
+import pytest
+
+from reality_defender_slack_app.workers import MediaWorkers
+
+
+def _hash_file(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_run_in_process_pool(tmp_path: Path) -> None:
+    """Test that work is handed to worker processes by path."""
+    path = tmp_path / "media.bin"
+    path.write_bytes(b"media" * 1000)
+
+    workers = MediaWorkers(1)
+    try:
+        digest = await workers.run(_hash_file, str(path))
+    finally:
+        workers.shutdown()
+
+    assert digest == hashlib.sha256(b"media" * 1000).hexdigest()
+    assert workers.completed == 1
+    assert workers.busy_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_saturation_metrics() -> None:
+    """Test that running and queued work is reported while the pool is busy."""
+    release = threading.Event()
+    workers = MediaWorkers(2, mode="thread")
+
+    tasks = [asyncio.create_task(workers.run(release.wait, 5)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+
+    stats = workers.stats()
+    assert stats["running"] == 2
+    assert stats["queued"] == 1
+    assert stats["saturation"] == 1.5
+
+    release.set()
+    await asyncio.gather(*tasks)
+    workers.shutdown()
+
+    stats = workers.stats()
+    assert stats["running"] == stats["queued"] == 0
+    assert stats["peak_queued"] == 1
+    assert stats["completed"] == 3
+    assert stats["max_wait"] > 0
+
+
+@pytest.mark.asyncio
+async def test_failures_are_counted() -> None:
+    """Test that errors raised by the work reach the caller."""
+    workers = MediaWorkers(1, mode="thread")
+
+    with pytest.raises(ZeroDivisionError):
+        await workers.run(divmod, 1, 0)
+
+    assert workers.failed == 1
+    assert workers.in_flight == 0
+    workers.shutdown()
+
+
+def test_unknown_mode() -> None:
+    """Test that only processes and threads are supported."""
+    with pytest.raises(ValueError):
+        MediaWorkers(mode="fiber")
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from slack_sdk.oauth.installation_store import Bot, FileInstallationStore
+
+from reality_defender_slack_app.workspaces import (
+    WorkspaceNotInstalledError,
+    Workspaces,
+)
+
+
+@pytest.fixture
+def installation_store(tmp_path: Path) -> FileInstallationStore:
+    store = FileInstallationStore(base_dir=str(tmp_path))
+    for team_id in ("T1", "T2"):
+        store.save_bot(
+            Bot(
+                team_id=team_id,
+                bot_token=f"xoxb-{team_id}",
+                bot_id=f"B{team_id}",
+                bot_user_id=f"U{team_id}",
+                installed_at=time.time(),
+            )
+        )
+    return store
+
+
+@pytest.mark.asyncio
+async def test_single_workspace() -> None:
+    """Test that the app's own client and token are used for everything."""
+    client = AsyncMock()
+    workspaces = Workspaces(client, "xoxb-default")
+
+    assert not workspaces.multi_workspace
+    assert await workspaces.token("T1") == "xoxb-default"
+    assert await workspaces.client(None) is client
+
+
+@pytest.mark.asyncio
+async def test_tokens_resolved_per_workspace(
+    installation_store: FileInstallationStore,
+) -> None:
+    """Test that each workspace gets a client with its own token, created once."""
+    workspaces = Workspaces(MagicMock(), installation_store=installation_store)
+
+    assert await workspaces.token("T2") == "xoxb-T2"
+    client = await workspaces.client("T1")
+    assert client.token == "xoxb-T1"
+    assert await workspaces.client("T1") is client
+
+    workspaces.forget("T1")
+    assert await workspaces.client("T1") is not client
+
+    with pytest.raises(WorkspaceNotInstalledError):
+        await workspaces.client("T3")
+
+
+@pytest.mark.asyncio
+async def test_limit_per_workspace() -> None:
+    """Test that a busy workspace can't hold more than its share of slots."""
+    workspaces = Workspaces(AsyncMock(), team_concurrency=1)
+    release = asyncio.Event()
+    entered: list[str] = []
+
+    async def work(team_id: str) -> None:
+        async with workspaces.limit(team_id):
+            entered.append(team_id)
+            await release.wait()
+
+    tasks = [asyncio.create_task(work(team)) for team in ("T1", "T1", "T2")]
+    await asyncio.sleep(0)
+
+    assert entered == ["T1", "T2"]
+    assert workspaces.in_use == {"T1": 1, "T2": 1}
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert entered == ["T1", "T2", "T1"]
+    assert workspaces.in_use == {}